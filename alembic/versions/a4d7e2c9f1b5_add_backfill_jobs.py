@@ -0,0 +1,47 @@
+"""add backfill_jobs table
+
+Revision ID: a4d7e2c9f1b5
+Revises: f3a9c2d6b8e1
+Create Date: 2026-10-19 18:41:52.117403
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d7e2c9f1b5'
+down_revision: Union[str, Sequence[str], None] = 'f3a9c2d6b8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-game state of each backfill job, so a run can resume (see scraper/backfill.py)
+    op.create_table('backfill_jobs',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('job', sa.String(length=64), nullable=False),
+    sa.Column('mlb_game_pk', sa.Integer(), nullable=False),
+    sa.Column('state', sa.String(length=16), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('claimed_by', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job', 'mlb_game_pk', name='uq_backfill_jobs_job_game'),
+    sa.CheckConstraint(
+        "state IN ('pending', 'running', 'done', 'failed')", name='ck_backfill_jobs_state'
+    ),
+    )
+    op.create_index('ix_backfill_jobs_job_state', 'backfill_jobs', ['job', 'state'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_backfill_jobs_job_state', table_name='backfill_jobs')
+    op.drop_table('backfill_jobs')
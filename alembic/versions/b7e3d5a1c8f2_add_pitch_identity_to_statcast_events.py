@@ -0,0 +1,31 @@
+"""add at_bat_number and pitch_number to statcast_events
+
+Revision ID: b7e3d5a1c8f2
+Revises: a4d7e2c9f1b5
+Create Date: 2026-10-19 20:06:37.582914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3d5a1c8f2'
+down_revision: Union[str, Sequence[str], None] = 'a4d7e2c9f1b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A pitch's identity within its game, so column repair can patch rows in place
+    op.add_column('statcast_events', sa.Column('at_bat_number', sa.Integer(), nullable=True))
+    op.add_column('statcast_events', sa.Column('pitch_number', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('statcast_events', 'pitch_number')
+    op.drop_column('statcast_events', 'at_bat_number')
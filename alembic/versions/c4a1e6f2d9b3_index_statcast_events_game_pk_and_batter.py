@@ -0,0 +1,30 @@
+"""index statcast_events on mlb_game_pk and batter_name
+
+Revision ID: c4a1e6f2d9b3
+Revises: 450bf0b767e8
+Create Date: 2026-10-19 09:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a1e6f2d9b3'
+down_revision: Union[str, Sequence[str], None] = '450bf0b767e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every attended-games query joins on mlb_game_pk; per-player WPA filters on batter_name
+    op.create_index(op.f('ix_statcast_events_mlb_game_pk'), 'statcast_events', ['mlb_game_pk'], unique=False)
+    op.create_index(op.f('ix_statcast_events_batter_name'), 'statcast_events', ['batter_name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_statcast_events_batter_name'), table_name='statcast_events')
+    op.drop_index(op.f('ix_statcast_events_mlb_game_pk'), table_name='statcast_events')
@@ -0,0 +1,37 @@
+"""add xid to game_changes and last_xmin to consumer_checkpoints
+
+Revision ID: c8f4a2e6d1b7
+Revises: b7e3d5a1c8f2
+Create Date: 2026-10-19 22:14:05.318466
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f4a2e6d1b7'
+down_revision: Union[str, Sequence[str], None] = 'b7e3d5a1c8f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The transaction that wrote each change, so a change that commits after a
+    # consumer read past its id is still found (see scraper/changes.py)
+    op.add_column('game_changes', sa.Column(
+        'xid', sa.BigInteger(), server_default=sa.text('pg_current_xact_id()::text::bigint'),
+        nullable=False,
+    ))
+    op.create_index('ix_game_changes_xid', 'game_changes', ['xid'])
+    op.add_column('consumer_checkpoints', sa.Column('last_xmin', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('consumer_checkpoints', 'last_xmin')
+    op.drop_index('ix_game_changes_xid', table_name='game_changes')
+    op.drop_column('game_changes', 'xid')
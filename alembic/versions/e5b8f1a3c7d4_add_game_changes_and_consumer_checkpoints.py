@@ -0,0 +1,43 @@
+"""add game_changes log and consumer_checkpoints
+
+Revision ID: e5b8f1a3c7d4
+Revises: c4a1e6f2d9b3
+Create Date: 2026-10-19 14:03:27.551920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8f1a3c7d4'
+down_revision: Union[str, Sequence[str], None] = 'c4a1e6f2d9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Append-only log of games whose data changed (see scraper/changes.py)
+    op.create_table('game_changes',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('mlb_game_pk', sa.Integer(), nullable=False),
+    sa.Column('change_type', sa.String(length=32), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # How far each downstream consumer (e.g. the exporter) has read the log
+    op.create_table('consumer_checkpoints',
+    sa.Column('consumer', sa.String(length=64), nullable=False),
+    sa.Column('last_change_id', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('consumer')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('consumer_checkpoints')
+    op.drop_table('game_changes')
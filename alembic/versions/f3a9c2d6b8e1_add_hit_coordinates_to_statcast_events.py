@@ -0,0 +1,33 @@
+"""add hit coordinates and spray angle to statcast_events
+
+Revision ID: f3a9c2d6b8e1
+Revises: e5b8f1a3c7d4
+Create Date: 2026-10-19 15:12:08.304417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c2d6b8e1'
+down_revision: Union[str, Sequence[str], None] = 'e5b8f1a3c7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Statcast hit coordinates (pixels) and the spray angle derived from them
+    op.add_column('statcast_events', sa.Column('hc_x', sa.Float(), nullable=True))
+    op.add_column('statcast_events', sa.Column('hc_y', sa.Float(), nullable=True))
+    op.add_column('statcast_events', sa.Column('spray_angle', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('statcast_events', 'spray_angle')
+    op.drop_column('statcast_events', 'hc_y')
+    op.drop_column('statcast_events', 'hc_x')
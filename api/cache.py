@@ -0,0 +1,250 @@
+"""Response cache and negotiated compression for the API.
+
+The bulk endpoints return large, highly repetitive JSON (the same matchup, batter
+and outcome strings on every row), and the underlying data only changes when a game
+is ingested.  ``CompressionMiddleware`` therefore:
+
+- caches the rendered body of successful GETs on cacheable routes for a short TTL
+  (``API_CACHE_TTL_SECONDS``, off by default: entries can outlive an ingest),
+- picks ``br`` or ``gzip`` from the client's ``Accept-Encoding``, and
+- memoizes each compressed encoding on the cache entry, so a hot body is compressed
+  once per encoding instead of once per request.
+
+Compression runs in the threadpool, never on the event loop; requests that miss
+the same encoding of an entry at once wait on one compression.
+
+Uncached routes are still compressed on the fly when the body is large enough.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import partial
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip-only negotiation
+    brotli = None
+
+# Server preference order when the client accepts several encodings equally.
+SUPPORTED_ENCODINGS: tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Headers the middleware recomputes for every response it sends.
+_HOP_HEADERS = {b"content-length", b"content-encoding", b"vary"}
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Return the best supported encoding for an ``Accept-Encoding`` header, or None."""
+    if not accept_encoding:
+        return None
+
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, *, cached: bool = False) -> bytes:
+    """Compress ``body`` with ``encoding``.
+
+    Cached bodies are compressed once and served many times, so they get a higher
+    compression level than bodies compressed on the fly.
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=9 if cached else 4)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9 if cached else 6, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+@dataclass
+class CachedResponse:
+    """A rendered response body plus lazily-computed compressed variants."""
+
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+    _encoded: dict[str, bytes] = field(default_factory=dict)
+    # Compressions in flight; only touched from the event loop, so no lock
+    _pending: dict[str, asyncio.Future] = field(default_factory=dict)
+
+    async def encoded(self, encoding: str) -> bytes:
+        """Return the body compressed with ``encoding``, compressing at most once."""
+        data = self._encoded.get(encoding)
+        if data is not None:
+            return data
+        pending = self._pending.get(encoding)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                run_in_threadpool(compress, self.body, encoding, cached=True)
+            )
+            pending.add_done_callback(partial(self._compressed, encoding))
+            self._pending[encoding] = pending
+        # A cancelled request must not cancel the compression others wait on
+        return await asyncio.shield(pending)
+
+    def _compressed(self, encoding: str, pending: asyncio.Future) -> None:
+        del self._pending[encoding]
+        if not pending.cancelled() and pending.exception() is None:
+            self._encoded[encoding] = pending.result()
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache of ``CachedResponse`` entries keyed by URL."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(
+        self, key: str, status: int, headers: list[tuple[bytes, bytes]], body: bytes
+    ) -> CachedResponse:
+        entry = CachedResponse(
+            status=status,
+            headers=headers,
+            body=body,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CompressionMiddleware:
+    """Pure-ASGI middleware that caches and compresses JSON responses.
+
+    Must sit *inside* CORSMiddleware (i.e. be added to the app first) so CORS
+    headers are still computed per request on cache hits.
+    """
+
+    def __init__(
+        self,
+        app,
+        cache: ResponseCache,
+        cacheable_prefixes: tuple[str, ...] = (),
+        minimum_size: int = 1024,
+    ):
+        self.app = app
+        self.cache = cache
+        self.cacheable_prefixes = cacheable_prefixes
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope.get("headers") or [])
+        accept = request_headers.get(b"accept-encoding", b"").decode("latin-1")
+        encoding = negotiate_encoding(accept)
+
+        cache_key = None
+        if (
+            self.cache.ttl_seconds > 0
+            and scope["method"] == "GET"
+            and scope["path"].startswith(self.cacheable_prefixes)
+        ):
+            query = scope.get("query_string", b"").decode("latin-1")
+            cache_key = f"{scope['path']}?{query}"
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                await self._send_entry(send, entry, encoding, cache_status=b"HIT")
+                return
+
+        start_message = None
+        chunks: list[bytes] = []
+
+        async def capture(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        if start_message is None:
+            return
+
+        status = start_message["status"]
+        body = b"".join(chunks)
+        raw_headers = list(start_message.get("headers", []))
+
+        if any(name.lower() == b"content-encoding" for name, _ in raw_headers):
+            # The app already encoded this body; pass it through untouched.
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [(name, value) for name, value in raw_headers if name.lower() not in _HOP_HEADERS]
+
+        if cache_key is not None and status == 200:
+            entry = self.cache.put(cache_key, status, headers, body)
+            await self._send_entry(send, entry, encoding, cache_status=b"MISS")
+            return
+
+        if encoding and len(body) >= self.minimum_size:
+            body = await run_in_threadpool(compress, body, encoding)
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_entry(self, send, entry: CachedResponse, encoding: str | None, cache_status):
+        headers = list(entry.headers)
+        body = entry.body
+        if encoding and len(body) >= self.minimum_size:
+            body = await entry.encoded(encoding)
+            headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        headers.append((b"x-cache", cache_status))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
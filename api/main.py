@@ -1,14 +1,46 @@
-from fastapi import Depends, FastAPI, Query
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from api.cache import CompressionMiddleware, ResponseCache
+from api.metrics import MetricsMiddleware, instrument_engine, registry
 from api.models import Game, StatcastEvent
-from config import SessionLocal, is_barrel
+from api.responses import FastJSONResponse, RowFormat, shape_rows
+from config import (
+    API_CACHE_TTL_SECONDS,
+    API_COMPRESS_MIN_BYTES,
+    SLOW_QUERY_MS,
+    get_session,
+    is_barrel,
+    on_engine_created,
+)
+from scraper import profiling
+from scraper.heartbeat import load_heartbeat_index, load_heartbeats
 from scraper.players import normalize_player_name, resolve_pitcher_display
 
-app = FastAPI(title="Baseball Game Log API")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # GAMELOG_PROFILE profiles the server from startup to shutdown
+    with profiling.profile("api"):
+        yield
+
+
+app = FastAPI(title="Baseball Game Log API", lifespan=lifespan)
+
+response_cache = ResponseCache(ttl_seconds=API_CACHE_TTL_SECONDS)
+
+# Added before CORS so it runs inside it: cache hits still get per-request CORS headers.
+app.add_middleware(
+    CompressionMiddleware,
+    cache=response_cache,
+    cacheable_prefixes=("/games", "/statcast"),
+    minimum_size=API_COMPRESS_MIN_BYTES,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -16,11 +48,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it is outermost: latency covers the whole stack and response sizes
+# are measured after compression.
+app.add_middleware(MetricsMiddleware)
+# The engine is created on the first request; instrument it then
+on_engine_created(lambda engine: instrument_engine(engine, slow_query_ms=SLOW_QUERY_MS))
 
 
 def get_db():
     """FastAPI dependency that yields a DB session and closes it after the request."""
-    db = SessionLocal()
+    db = get_session()
     try:
         yield db
     finally:
@@ -32,6 +69,12 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, SQL and connection-pool metrics."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/games")
 async def list_games(db: Session = Depends(get_db)):
     """List all attended games."""
@@ -59,18 +102,43 @@ async def list_games(db: Session = Depends(get_db)):
     }
 
 
+@app.get("/games/heartbeat-index", response_class=FastJSONResponse)
+async def heartbeat_index(db: Session = Depends(get_db)):
+    """Return drama summaries (no curve points) for every attended game."""
+    games = load_heartbeat_index(db.connection())
+    return FastJSONResponse({"games": games, "total": len(games)})
+
+
+@app.get("/games/{game_pk}/heartbeat", response_class=FastJSONResponse)
+async def game_heartbeat(game_pk: int, db: Session = Depends(get_db)):
+    """Return the full win-probability curve and drama score for one attended game."""
+    heartbeats = load_heartbeats(db.connection(), game_pks=[game_pk])
+    if not heartbeats:
+        raise HTTPException(status_code=404, detail=f"No attended game with game_pk {game_pk}")
+    return FastJSONResponse(heartbeats[0])
+
+
 # ---------------- Statcast API -----------------
 
 
-@app.get("/statcast/longest-homers")
+@app.get("/statcast/longest-homers", response_class=FastJSONResponse)
 async def longest_homers(
     limit: int = Query(default=100, le=500),
     year: int | None = None,
+    fmt: RowFormat = Query(default="rows", alias="format"),
     db: Session = Depends(get_db),
 ):
     """Return longest home runs (distance desc) across attended games."""
     query = (
-        db.query(StatcastEvent, Game)
+        db.query(
+            StatcastEvent.hit_distance_sc,
+            StatcastEvent.launch_speed,
+            StatcastEvent.launch_angle,
+            StatcastEvent.batter_name,
+            StatcastEvent.pitcher_name,
+            Game.date,
+            StatcastEvent.mlb_game_pk,
+        )
         .join(Game, StatcastEvent.mlb_game_pk == Game.mlb_game_pk)
         .filter(Game.attended.is_(True))
         .filter(StatcastEvent.hit_distance_sc.isnot(None))
@@ -83,20 +151,20 @@ async def longest_homers(
         query = query.filter(extract("year", Game.date) == year)
 
     rows = query.order_by(StatcastEvent.hit_distance_sc.desc()).limit(limit).all()
-    return {
-        "homers": [
-            {
-                "distance": ev.hit_distance_sc,
-                "launch_speed": ev.launch_speed,
-                "launch_angle": ev.launch_angle,
-                "batter": normalize_player_name(ev.batter_name),
-                "pitcher": resolve_pitcher_display(ev.pitcher_name),
-                "date": g.date.isoformat(),
-                "game_pk": ev.mlb_game_pk,
-            }
-            for ev, g in rows
-        ]
-    }
+    fields = ("distance", "launch_speed", "launch_angle", "batter", "pitcher", "date", "game_pk")
+    homers = [
+        (
+            row.hit_distance_sc,
+            row.launch_speed,
+            row.launch_angle,
+            normalize_player_name(row.batter_name),
+            resolve_pitcher_display(row.pitcher_name),
+            row.date,
+            row.mlb_game_pk,
+        )
+        for row in rows
+    ]
+    return FastJSONResponse({"homers": shape_rows(fields, homers, fmt), "format": fmt})
 
 
 # --------- WPA endpoints ----------
@@ -124,18 +192,31 @@ async def wpa_leaders(
     return {"leaders": [{"player": r.player, "wpa": round(r.wpa, 3)} for r in rows]}
 
 
-@app.get("/statcast/wpa/player/{player_name}")
-async def player_wpa_breakdown(player_name: str, db: Session = Depends(get_db)):
-    """Return game-by-game WPA breakdown for a specific player."""
-    rows = (
+@app.get("/statcast/wpa/player/{player_name}", response_class=FastJSONResponse)
+async def player_wpa_breakdown(
+    player_name: str,
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    include_events: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Return game-by-game WPA breakdown for a specific player.
+
+    Per-game totals, ordering and the career total are computed in SQL and the games
+    are paginated with ``limit``/``offset``.  ``include_events=true`` attaches the
+    individual WPA events, fetched only for the games on the requested page.
+    """
+    game_wpa = func.sum(StatcastEvent.wpa)
+    games_page = (
         db.query(
-            StatcastEvent.wpa,
-            StatcastEvent.event_datetime,
-            StatcastEvent.event_type,
-            StatcastEvent.raw_description,
+            StatcastEvent.mlb_game_pk,
             Game.date,
             Game.home_team,
             Game.away_team,
+            game_wpa.label("total_wpa"),
+            func.count(StatcastEvent.id).label("event_count"),
+            func.sum(game_wpa).over().label("career_wpa"),
+            func.count().over().label("total_games"),
         )
         .join(Game, StatcastEvent.mlb_game_pk == Game.mlb_game_pk)
         .filter(
@@ -143,42 +224,89 @@ async def player_wpa_breakdown(player_name: str, db: Session = Depends(get_db)):
             StatcastEvent.batter_name == player_name,
             StatcastEvent.wpa.isnot(None),
         )
-        .order_by(Game.date.desc(), StatcastEvent.event_datetime)
+        .group_by(StatcastEvent.mlb_game_pk, Game.date, Game.home_team, Game.away_team)
+        .order_by(Game.date.desc(), StatcastEvent.mlb_game_pk.desc())
+        .offset(offset)
+        .limit(limit)
         .all()
     )
 
-    games: dict[str, dict] = {}
-    for row in rows:
-        game_key = f"{row.date}_{row.away_team}@{row.home_team}"
-        if game_key not in games:
-            games[game_key] = {
-                "date": str(row.date),
-                "matchup": f"{row.away_team} @ {row.home_team}",
-                "events": [],
-                "total_wpa": 0,
-            }
-        games[game_key]["events"].append(
-            {
-                "wpa": round(row.wpa, 3),
-                "description": row.event_type or row.raw_description,
-                "event_datetime": row.event_datetime,
-            }
+    if games_page:
+        career_wpa = games_page[0].career_wpa
+        total_games = games_page[0].total_games
+    elif offset:
+        # Past the last page: window totals aren't available, so aggregate directly.
+        career_wpa, total_games = (
+            db.query(game_wpa, func.count(func.distinct(StatcastEvent.mlb_game_pk)))
+            .join(Game, StatcastEvent.mlb_game_pk == Game.mlb_game_pk)
+            .filter(
+                Game.attended.is_(True),
+                StatcastEvent.batter_name == player_name,
+                StatcastEvent.wpa.isnot(None),
+            )
+            .one()
         )
-        games[game_key]["total_wpa"] += row.wpa
+    else:
+        career_wpa, total_games = 0, 0
 
-    game_list = sorted(games.values(), key=lambda x: x["date"], reverse=True)
-    for game in game_list:
-        game["total_wpa"] = round(game["total_wpa"], 3)
+    games = [
+        {
+            "game_pk": row.mlb_game_pk,
+            "date": row.date,
+            "matchup": f"{row.away_team} @ {row.home_team}",
+            "total_wpa": round(row.total_wpa, 3),
+            "event_count": row.event_count,
+        }
+        for row in games_page
+    ]
 
-    return {
-        "player": player_name,
-        "games": game_list,
-        "total_wpa": round(sum(g["total_wpa"] for g in game_list), 3),
-    }
+    if include_events and games:
+        events_by_game: dict[int, list[dict]] = {game["game_pk"]: [] for game in games}
+        event_rows = (
+            db.query(
+                StatcastEvent.mlb_game_pk,
+                StatcastEvent.wpa,
+                StatcastEvent.event_datetime,
+                StatcastEvent.event_type,
+                StatcastEvent.raw_description,
+            )
+            .filter(
+                StatcastEvent.mlb_game_pk.in_(list(events_by_game)),
+                StatcastEvent.batter_name == player_name,
+                StatcastEvent.wpa.isnot(None),
+            )
+            .order_by(StatcastEvent.mlb_game_pk, StatcastEvent.id)
+            .all()
+        )
+        for row in event_rows:
+            events_by_game[row.mlb_game_pk].append(
+                {
+                    "wpa": round(row.wpa, 3),
+                    "description": row.event_type or row.raw_description,
+                    "event_datetime": row.event_datetime,
+                }
+            )
+        for game in games:
+            game["events"] = events_by_game[game["game_pk"]]
+
+    return FastJSONResponse(
+        {
+            "player": player_name,
+            "games": games,
+            "total_wpa": round(career_wpa or 0, 3),
+            "total_games": total_games or 0,
+            "limit": limit,
+            "offset": offset,
+        }
+    )
 
 
-@app.get("/statcast/barrel-map")
-async def barrel_map_data(year: int | None = None, db: Session = Depends(get_db)):
+@app.get("/statcast/barrel-map", response_class=FastJSONResponse)
+async def barrel_map_data(
+    year: int | None = None,
+    fmt: RowFormat = Query(default="rows", alias="format"),
+    db: Session = Depends(get_db),
+):
     """Return exit velocity vs launch angle data for barrel map visualization."""
     query = (
         db.query(
@@ -216,20 +344,38 @@ async def barrel_map_data(year: int | None = None, db: Session = Depends(get_db)
             return "out"
         return "hit"
 
+    fields = (
+        "exit_velocity",
+        "launch_angle",
+        "batter",
+        "pitcher",
+        "outcome",
+        "is_barrel",
+        "date",
+        "matchup",
+        "description",
+        "distance",
+    )
     batted_balls = [
-        {
-            "exit_velocity": row.launch_speed,
-            "launch_angle": row.launch_angle,
-            "batter": row.batter_name,
-            "pitcher": resolve_pitcher_display(row.pitcher_name),
-            "outcome": _categorize(row.event_type),
-            "is_barrel": is_barrel(row.launch_angle, row.launch_speed),
-            "date": str(row.date),
-            "matchup": f"{row.away_team} @ {row.home_team}",
-            "description": row.event_type or row.raw_description,
-            "distance": row.hit_distance_sc,
-        }
+        (
+            row.launch_speed,
+            row.launch_angle,
+            row.batter_name,
+            resolve_pitcher_display(row.pitcher_name),
+            _categorize(row.event_type),
+            is_barrel(row.launch_angle, row.launch_speed),
+            row.date,
+            f"{row.away_team} @ {row.home_team}",
+            row.event_type or row.raw_description,
+            row.hit_distance_sc,
+        )
         for row in rows
     ]
 
-    return {"batted_balls": batted_balls, "total_balls": len(batted_balls)}
+    return FastJSONResponse(
+        {
+            "batted_balls": shape_rows(fields, batted_balls, fmt),
+            "total_balls": len(batted_balls),
+            "format": fmt,
+        }
+    )
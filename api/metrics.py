@@ -0,0 +1,302 @@
+"""Prometheus-style metrics for the API and its SQL queries.
+
+A deliberately small in-process registry (histograms, gauges, counters) rendered in
+the Prometheus text exposition format at ``/metrics``:
+
+- ``http_request_duration_seconds`` / ``http_response_size_bytes`` per route template,
+- ``http_requests_in_flight``,
+- ``db_pool_*`` gauges read from the SQLAlchemy pool at scrape time, and
+- ``db_query_duration_seconds`` per route and SQL operation, captured with SQLAlchemy
+  ``before_cursor_execute``/``after_cursor_execute`` engine events.
+
+Queries slower than ``SLOW_QUERY_MS`` are logged with their statement and the route
+that issued them.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# ASGI scope of the request currently being served.  The router fills in
+# ``scope["route"]`` after the middleware runs, so SQL timings resolve the route
+# template lazily from the scope rather than labelling by raw path.
+_current_scope: ContextVar[dict | None] = ContextVar("current_scope", default=None)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge set directly, or computed at scrape time from ``callback``."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def collect(self) -> list[str]:
+        if self.callback is not None:
+            try:
+                self.set(self.callback())
+            except Exception as exc:  # never let a broken callback break the scrape
+                logger.warning("Gauge %s callback failed: %s", self.name, exc)
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count], sum
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (key, list(counts), self._sums[key]) for key, counts in self._counts.items()
+            )
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.labelnames, key, le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template.",
+        ("method", "route", "status"),
+        LATENCY_BUCKETS,
+    )
+)
+RESPONSE_SIZE = registry.register(
+    Histogram(
+        "http_response_size_bytes",
+        "HTTP response body size on the wire (after compression).",
+        ("method", "route"),
+        SIZE_BUCKETS,
+    )
+)
+IN_FLIGHT = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+)
+QUERY_LATENCY = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "SQL statement execution time by issuing route and operation.",
+        ("route", "operation"),
+        QUERY_BUCKETS,
+    )
+)
+SLOW_QUERIES = registry.register(
+    Counter(
+        "db_slow_queries_total",
+        "SQL statements slower than SLOW_QUERY_MS.",
+        ("route", "operation"),
+    )
+)
+
+
+def _route_template(scope) -> str:
+    if scope is None:
+        return "-"
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure-ASGI middleware recording latency, size and in-flight requests.
+
+    Add it last so it is outermost and sees the final (compressed) response size.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        token = _current_scope.set(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            _current_scope.reset(token)
+            route = _route_template(scope)
+            REQUEST_LATENCY.observe(elapsed, method=scope["method"], route=route, status=status)
+            RESPONSE_SIZE.observe(size, method=scope["method"], route=route)
+
+
+def instrument_engine(engine, slow_query_ms: float) -> None:
+    """Time every statement on ``engine`` and register pool gauges for it."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "-"
+        route = _route_template(_current_scope.get())
+        QUERY_LATENCY.observe(elapsed, route=route, operation=operation)
+        if elapsed * 1000 >= slow_query_ms:
+            SLOW_QUERIES.inc(route=route, operation=operation)
+            logger.warning(
+                "Slow query (%.1f ms, route %s): %s",
+                elapsed * 1000,
+                route,
+                " ".join(statement.split()),
+            )
+
+    pool = engine.pool
+    for name, documentation, attr in (
+        ("db_pool_size", "Configured size of the SQLAlchemy connection pool.", "size"),
+        ("db_pool_checked_out", "Connections currently checked out of the pool.", "checkedout"),
+        ("db_pool_overflow", "Connections open beyond the pool size.", "overflow"),
+        ("db_pool_checked_in", "Idle connections currently in the pool.", "checkedin"),
+    ):
+        method = getattr(pool, attr, None)
+        if method is not None:
+            registry.register(Gauge(name, documentation, callback=method))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Date, Boolean, Text, ForeignKey, Float, BigInteger, DateTime, func, text, UniqueConstraint, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -52,9 +52,9 @@ class StatcastEvent(Base):
     __tablename__ = "statcast_events"
 
     id = Column(Integer, primary_key=True, index=True)
-    mlb_game_pk = Column(Integer, nullable=False)
+    mlb_game_pk = Column(Integer, nullable=False, index=True)
     event_datetime = Column(String(30), nullable=False)
-    batter_name = Column(String(100), nullable=True)
+    batter_name = Column(String(100), nullable=True, index=True)
     pitcher_name = Column(String(100), nullable=True)
     pitch_type = Column(String(10), nullable=True)
     launch_speed = Column(Integer, nullable=True)  # EV mph
@@ -64,8 +64,14 @@ class StatcastEvent(Base):
     event_type = Column(String(30), nullable=True)  # Events field: "home_run", "field_out", etc.
     wpa = Column(Float, nullable=True)  # Win Probability Added relative to Red Sox
     hit_distance_sc = Column(Integer, nullable=True)  # Statcast distance in feet
+    hc_x = Column(Float, nullable=True)  # Statcast hit coordinates (pixels)
+    hc_y = Column(Float, nullable=True)
+    spray_angle = Column(Float, nullable=True)  # Degrees from center field, + toward RF
     clip_uuid = Column(String(40), nullable=True)
     video_url = Column(Text, nullable=True)  # Direct URL to MP4
+    # The pitch within the game (Statcast at_bat_number, pitch_number)
+    at_bat_number = Column(Integer, nullable=True)
+    pitch_number = Column(Integer, nullable=True)
     
     # Game context fields for enhanced tooltips
     inning = Column(Integer, nullable=True)
@@ -86,4 +92,68 @@ class StatcastEvent(Base):
     away_win_exp = Column(Float, nullable=True)  # Away team win probability after play
 
     def __repr__(self):
-        return f"<StatcastEvent game_pk={self.mlb_game_pk} ev={self.launch_speed}>" 
\ No newline at end of file
+        return f"<StatcastEvent game_pk={self.mlb_game_pk} ev={self.launch_speed}>"
+
+
+# ---------------- Change Tracking ---------------- #
+
+class GameChange(Base):
+    """Append-only log entry: this game's data changed and exports are stale."""
+
+    __tablename__ = "game_changes"
+
+    id = Column(BigInteger, primary_key=True)
+    mlb_game_pk = Column(Integer, nullable=False)
+    change_type = Column(String(32), nullable=False)  # "statcast", "statcast_deleted", "enrich"
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Id of the transaction that wrote the change (pg_current_xact_id)
+    xid = Column(BigInteger, nullable=False, index=True,
+                 server_default=text("pg_current_xact_id()::text::bigint"))
+
+    def __repr__(self):
+        return f"<GameChange id={self.id} game_pk={self.mlb_game_pk} type={self.change_type}>"
+
+
+class ConsumerCheckpoint(Base):
+    """Highest ``game_changes.id`` a consumer (e.g. the exporter) has processed."""
+
+    __tablename__ = "consumer_checkpoints"
+
+    consumer = Column(String(64), primary_key=True)
+    last_change_id = Column(BigInteger, nullable=False, server_default="0")
+    # Oldest transaction still running when it read the log; changes written by
+    # it or later are read again
+    last_xmin = Column(BigInteger, nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<ConsumerCheckpoint {self.consumer}={self.last_change_id}>"
+
+
+# ---------------- Backfill Jobs ---------------- #
+
+class BackfillJob(Base):
+    """One game's progress through a named backfill (see scraper/backfill.py)."""
+
+    __tablename__ = "backfill_jobs"
+    __table_args__ = (
+        UniqueConstraint("job", "mlb_game_pk", name="uq_backfill_jobs_job_game"),
+        CheckConstraint(
+            "state IN ('pending', 'running', 'done', 'failed')", name="ck_backfill_jobs_state"
+        ),
+        Index("ix_backfill_jobs_job_state", "job", "state"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    job = Column(String(64), nullable=False)  # e.g. "win_probability"
+    mlb_game_pk = Column(Integer, nullable=False)
+    state = Column(String(16), nullable=False, server_default="pending")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text, nullable=True)
+    claimed_by = Column(String(100), nullable=True)  # runner holding a "running" job
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<BackfillJob {self.job} game_pk={self.mlb_game_pk} state={self.state}>"
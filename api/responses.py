@@ -0,0 +1,48 @@
+"""Fast JSON rendering for the bulk endpoints.
+
+FastAPI runs every returned dict through ``jsonable_encoder`` before handing it to
+``json.dumps``.  For endpoints that return thousands of rows that walk costs more
+than the query itself, so the bulk endpoints build plain tuples/dicts and return a
+``FastJSONResponse`` directly, which skips the encoder and serializes with orjson.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from typing import Any, Literal
+
+import orjson
+from fastapi.responses import Response
+
+RowFormat = Literal["rows", "columnar"]
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson (dates, datetimes and numpy scalars supported)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def as_records(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> list[dict[str, Any]]:
+    """Zip row tuples into a list of ``{field: value}`` dicts."""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def as_columns(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> dict[str, list[Any]]:
+    """Transpose row tuples into a struct-of-arrays ``{field: [values...]}`` mapping."""
+    materialized = rows if isinstance(rows, list) else list(rows)
+    if not materialized:
+        return {field: [] for field in fields}
+    return {field: list(column) for field, column in zip(fields, zip(*materialized))}
+
+
+def shape_rows(
+    fields: Sequence[str], rows: Iterable[Sequence[Any]], fmt: RowFormat
+) -> list[dict[str, Any]] | dict[str, list[Any]]:
+    """Return rows as records (default) or columns, depending on the requested format."""
+    if fmt == "columnar":
+        return as_columns(fields, rows)
+    return as_records(fields, rows)
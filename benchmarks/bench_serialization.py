@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Compare JSON serialization paths for the bulk API endpoints.
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 5000 50000] [--repeat 5]
+
+Builds synthetic barrel-map rows and times three paths end to end (row build +
+encode + render to bytes):
+
+- ``default``: dict rows → FastAPI ``jsonable_encoder`` → ``JSONResponse`` (json.dumps)
+- ``orjson``: tuple rows → ``as_records`` → ``FastJSONResponse``
+- ``columnar``: tuple rows → ``as_columns`` → ``FastJSONResponse``
+"""
+
+import argparse
+import datetime as dt
+import random
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.responses import FastJSONResponse, as_columns, as_records
+
+FIELDS = (
+    "exit_velocity",
+    "launch_angle",
+    "batter",
+    "pitcher",
+    "outcome",
+    "is_barrel",
+    "date",
+    "matchup",
+    "description",
+    "distance",
+)
+BATTERS = [f"Batter {i}" for i in range(300)]
+PITCHERS = [f"Pitcher {i}" for i in range(200)]
+MATCHUPS = ["NYY @ BOS", "BOS @ TB", "TOR @ BOS", "BOS @ BAL", "SEA @ BOS"]
+EVENTS = ["single", "double", "field_out", "home_run", "force_out", "grounded_into_double_play"]
+
+
+def synthetic_rows(n: int, seed: int = 7) -> list[tuple]:
+    rng = random.Random(seed)
+    start = dt.date(2015, 4, 1)
+    rows = []
+    for _ in range(n):
+        ev = rng.randint(60, 118)
+        la = rng.randint(-40, 70)
+        event = rng.choice(EVENTS)
+        rows.append(
+            (
+                ev,
+                la,
+                rng.choice(BATTERS),
+                rng.choice(PITCHERS),
+                "home_run" if event == "home_run" else "hit",
+                8 <= la <= 50 and ev >= 98,
+                start + dt.timedelta(days=rng.randint(0, 3650)),
+                rng.choice(MATCHUPS),
+                event,
+                rng.randint(0, 470),
+            )
+        )
+    return rows
+
+
+def _default(rows: list[tuple]) -> bytes:
+    payload = {
+        "batted_balls": [dict(zip(FIELDS, row)) for row in rows],
+        "total_balls": len(rows),
+    }
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def _orjson(rows: list[tuple]) -> bytes:
+    payload = {"batted_balls": as_records(FIELDS, rows), "total_balls": len(rows)}
+    return FastJSONResponse(payload).body
+
+
+def _columnar(rows: list[tuple]) -> bytes:
+    payload = {"batted_balls": as_columns(FIELDS, rows), "total_balls": len(rows)}
+    return FastJSONResponse(payload).body
+
+
+PATHS = {"default": _default, "orjson": _orjson, "columnar": _columnar}
+
+
+def time_path(fn, rows: list[tuple], repeat: int) -> tuple[float, int]:
+    """Return (median milliseconds, body size in bytes) over ``repeat`` runs."""
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+        size = len(body)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk endpoint serialization paths.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[5_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'path':<10} {'median ms':>10} {'speedup':>8} {'bytes':>11}")
+    for n in args.rows:
+        rows = synthetic_rows(n)
+        baseline = None
+        for name, fn in PATHS.items():
+            ms, size = time_path(fn, rows, args.repeat)
+            baseline = baseline or ms
+            print(f"{n:>8}  {name:<10} {ms:>10.1f} {baseline / ms:>7.1f}x {size:>11,}")
+
+
+if __name__ == "__main__":
+    main()
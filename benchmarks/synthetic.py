@@ -0,0 +1,327 @@
+"""Synthetic ``games`` / ``statcast_events`` data at realistic distributions.
+
+Used by benchmarks/bench_pipeline.py.  ``synthetic_games(n_pitches)`` yields
+``SyntheticGame``s totalling exactly ``n_pitches`` pitches, each holding its pitches
+as NumPy columns:
+
+- ~290 pitches per game in plate appearances of ~3.9 pitches, half-innings that
+  turn over after three outs, counts, running scores and a bounded win-probability
+  walk with per-PA WPA (heavy-tailed, as real leverage is);
+- event types at MLB rates; only a PA's last pitch carries the event and its WPA;
+- batted balls with exit velocity / launch angle / distance / hit coordinates drawn
+  from league-like distributions;
+- player names from fixed pools (dictionary-friendly, like the real data).
+
+Generation is seeded, so a size always produces the same dataset.  Rows come out
+in ``EVENT_COLUMNS`` order for COPY, or as the Statcast CSV pybaseball downloads
+(``statcast_csv``) for replaying ingest offline.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import math
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+SIZES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+
+FIRST_PK = 900_000
+TEAMS = ["NYY", "TB", "TOR", "BAL", "SEA", "HOU", "LAD", "CLE", "DET", "MIN", "CWS", "KC"]
+PARKS = {"BOS": "Fenway Park"}
+
+# (event, probability, outs, in play)
+OUTCOMES = [
+    ("strikeout", 0.224, 1, False),
+    ("field_out", 0.290, 1, True),
+    ("single", 0.142, 0, True),
+    ("walk", 0.085, 0, False),
+    ("double", 0.044, 0, True),
+    ("home_run", 0.031, 0, True),
+    ("force_out", 0.020, 1, True),
+    ("grounded_into_double_play", 0.018, 2, True),
+    ("hit_by_pitch", 0.011, 0, False),
+    ("sac_fly", 0.007, 1, True),
+    ("field_error", 0.007, 0, True),
+    ("triple", 0.004, 0, True),
+    ("fielders_choice", 0.003, 0, True),
+]
+OUTCOME_NAMES = np.array([o[0] for o in OUTCOMES])
+OUTCOME_P = np.array([o[1] for o in OUTCOMES]) / sum(o[1] for o in OUTCOMES)
+OUTCOME_OUTS = np.array([o[2] for o in OUTCOMES])
+OUTCOME_IN_PLAY = np.array([o[3] for o in OUTCOMES])
+# How much an outcome helps the batting team, in units of the PA's leverage
+OUTCOME_VALUE = np.array(
+    [{"single": 0.6, "double": 1.0, "triple": 1.3, "home_run": 1.8, "walk": 0.4,
+      "hit_by_pitch": 0.4, "field_error": 0.5, "fielders_choice": 0.1,
+      "grounded_into_double_play": -1.2}.get(o[0], -0.5) for o in OUTCOMES]
+)
+# Chance the outcome scores a run (home runs always score at least one)
+OUTCOME_RUNS = np.array(
+    [{"single": 0.15, "double": 0.35, "triple": 0.6, "home_run": 1.0, "sac_fly": 1.0,
+      "field_error": 0.1}.get(o[0], 0.0) for o in OUTCOMES]
+)
+
+PITCH_TYPES = np.array(["FF", "SI", "SL", "CH", "CU", "FC", "ST", "FS"])
+PITCH_TYPE_P = np.array([0.33, 0.15, 0.17, 0.11, 0.08, 0.08, 0.05, 0.03])
+TAKEN = np.array(["ball", "called_strike", "foul", "swinging_strike", "blocked_ball"])
+TAKEN_P = np.array([0.37, 0.18, 0.27, 0.14, 0.04])
+
+_FIRST = ["Alex", "Carlos", "Chris", "Jose", "Luis", "Mike", "Matt", "Ryan", "Tyler",
+          "Juan", "Kyle", "Nick", "Josh", "Jake", "Brandon", "Rafael", "Masataka", "Trevor"]
+_LAST = ["Smith", "Garcia", "Martinez", "Rodriguez", "Johnson", "Williams", "Brown",
+         "Jones", "Davis", "Miller", "Wilson", "Lopez", "Gonzalez", "Perez", "Devers",
+         "Story", "Yoshida", "Casas", "Duran", "Abreu", "Bello", "Houck", "Whitlock"]
+# (first, last) name pools; pitchers and batters are disjoint id ranges
+BATTERS = [(_FIRST[i % len(_FIRST)], f"{_LAST[i % len(_LAST)]}{i // len(_LAST) or ''}")
+           for i in range(900)]
+PITCHERS = [(_FIRST[(i * 7) % len(_FIRST)], f"{_LAST[(i * 5) % len(_LAST)]}-{i}")
+            for i in range(700)]
+PITCHER_ID_BASE = 600_000
+
+EVENT_COLUMNS = (
+    "mlb_game_pk", "event_datetime", "batter_name", "pitcher_name", "pitch_type",
+    "launch_speed", "launch_angle", "estimated_ba", "raw_description", "event_type",
+    "wpa", "hit_distance_sc", "hc_x", "hc_y", "spray_angle", "clip_uuid", "video_url",
+    "inning", "inning_topbot", "outs_when_up", "home_score", "away_score",
+    "post_home_score", "post_away_score", "on_1b", "on_2b", "on_3b", "balls", "strikes",
+    "home_win_exp", "away_win_exp",
+)
+GAME_COLUMNS = (
+    "mlb_game_pk", "date", "home_team", "away_team", "home_score", "away_score",
+    "attended", "source", "venue_name",
+)
+
+
+@dataclass
+class SyntheticGame:
+    game: dict
+    pitches: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.pitches["pa"])
+
+
+def _names(pool, index: np.ndarray) -> np.ndarray:
+    return np.array([f"{pool[i][0]} {pool[i][1]}" for i in range(len(pool))], dtype=object)[index]
+
+
+_BATTER_NAMES = _names(BATTERS, np.arange(len(BATTERS)))
+_PITCHER_NAMES = _names(PITCHERS, np.arange(len(PITCHERS)))
+
+
+def _build_game(rng: np.random.Generator, pk: int, n: int) -> SyntheticGame:
+    # Plate appearances of 1-12 pitches (mean ~3.9) until the game's pitches run out
+    lengths = np.clip(rng.geometric(1 / 3.9, size=n), 1, 12)
+    ends = np.cumsum(lengths)
+    n_pa = int(np.searchsorted(ends, n)) + 1
+    lengths = lengths[:n_pa]
+    lengths[-1] -= ends[n_pa - 1] - n
+    pa = np.repeat(np.arange(n_pa), lengths)
+    last = np.zeros(n, dtype=bool)
+    last[np.cumsum(lengths) - 1] = True
+    pitch_in_pa = np.arange(n) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    outcome = rng.choice(len(OUTCOMES), size=n_pa, p=OUTCOME_P)
+    outs = OUTCOME_OUTS[outcome]
+    outs_before = np.concatenate(([0], np.cumsum(outs)[:-1]))
+    half = outs_before // 3
+    outs_when_up = outs_before % 3
+    inning = half // 2 + 1
+    top = half % 2 == 0
+
+    runs = (rng.random(n_pa) < OUTCOME_RUNS[outcome]).astype(int)
+    runs += (OUTCOME_NAMES[outcome] == "home_run") * rng.choice(4, size=n_pa, p=[0.58, 0.27, 0.12, 0.03])
+    away_runs = np.where(top, runs, 0)
+    home_runs = np.where(top, 0, runs)
+    post_away, post_home = np.cumsum(away_runs), np.cumsum(home_runs)
+    pre_away, pre_home = post_away - away_runs, post_home - home_runs
+
+    # Leverage grows late and in close games; WPA is from the home team's side
+    leverage = rng.laplace(0.035, 0.02, n_pa).clip(0.002, 0.3) * (1 + inning / 9)
+    batting_sign = np.where(top, -1.0, 1.0)
+    swing = (batting_sign * OUTCOME_VALUE[outcome] * leverage).clip(-0.6, 0.6)
+    post_win_exp = np.round((0.5 + np.cumsum(swing)).clip(0.01, 0.99), 4)
+    home_win_exp = np.concatenate(([0.5], post_win_exp[:-1]))
+    wpa = np.round(post_win_exp - home_win_exp, 6)
+
+    in_play = OUTCOME_IN_PLAY[outcome]
+    launch_speed = rng.normal(89, 14, n_pa).clip(35, 121)
+    launch_angle = rng.normal(12, 26, n_pa).clip(-85, 85)
+    carry = np.cos(np.radians(launch_angle - 28)).clip(0.05, 1)
+    distance = ((launch_speed - 30) * 4.6 * carry).clip(2, 480)
+    spray = rng.normal(0, 24, n_pa).clip(-45, 45)
+    pixels = distance / 2.5
+    hc_x = 125.42 + pixels * np.sin(np.radians(spray))
+    hc_y = 198.27 - pixels * np.cos(np.radians(spray))
+    xba = (1 / (1 + np.exp(-(launch_speed - 95) / 6)) * 1000 * (np.abs(launch_angle - 15) < 25) + 90)
+
+    batter = rng.integers(0, len(BATTERS), n_pa)
+    pitcher = np.where(top, pk % 350, 350 + pk % 350) + (inning >= 6) * rng.integers(0, 5, n_pa)
+    pitcher = pitcher % len(PITCHERS)
+
+    def per_pitch(values):
+        return values[pa]
+
+    taken = rng.choice(TAKEN, size=n, p=TAKEN_P).astype(object)
+    description = np.where(
+        last,
+        np.where(per_pitch(in_play), "hit_into_play",
+                 np.where(per_pitch(OUTCOME_NAMES[outcome]) == "walk", "ball", "swinging_strike")),
+        taken,
+    ).astype(object)
+    batted = last & per_pitch(in_play)
+    runner = rng.random(n) < 0.28
+
+    pitches = {
+        "pa": pa,
+        "pitch_number": pitch_in_pa + 1,
+        "last": last,
+        "batted": batted,
+        "batter": per_pitch(batter),
+        "pitcher": per_pitch(pitcher),
+        "pitch_type": rng.choice(PITCH_TYPES, size=n, p=PITCH_TYPE_P).astype(object),
+        "event_type": np.where(last, per_pitch(OUTCOME_NAMES[outcome]), "").astype(object),
+        "description": description,
+        "wpa": np.where(last, per_pitch(wpa), np.nan),
+        "home_win_exp": per_pitch(home_win_exp),
+        "launch_speed": np.where(batted, np.round(per_pitch(launch_speed)), np.nan),
+        "launch_angle": np.where(batted, np.round(per_pitch(launch_angle)), np.nan),
+        "hit_distance_sc": np.where(batted, np.round(per_pitch(distance)), np.nan),
+        "hc_x": np.where(batted, np.round(per_pitch(hc_x), 2), np.nan),
+        "hc_y": np.where(batted, np.round(per_pitch(hc_y), 2), np.nan),
+        "estimated_ba": np.where(batted, np.round(per_pitch(xba)), np.nan),
+        "inning": per_pitch(inning),
+        "top": per_pitch(top),
+        "outs_when_up": per_pitch(outs_when_up),
+        "home_score": per_pitch(pre_home),
+        "away_score": per_pitch(pre_away),
+        "post_home_score": np.where(last, per_pitch(post_home), per_pitch(pre_home)),
+        "post_away_score": np.where(last, per_pitch(post_away), per_pitch(pre_away)),
+        "balls": np.minimum(pitch_in_pa // 2, 3),
+        "strikes": np.minimum(pitch_in_pa - np.minimum(pitch_in_pa // 2, 3), 2),
+        "on_1b": np.where(runner, rng.integers(0, len(BATTERS), n), -1),
+    }
+
+    boston_home = rng.random() < 0.5
+    opponent = TEAMS[pk % len(TEAMS)]
+    home, away = ("BOS", opponent) if boston_home else (opponent, "BOS")
+    season = 2015 + pk % 11
+    date = dt.date(season, 4, 1) + dt.timedelta(days=int(rng.integers(0, 180)))
+    game = {
+        "mlb_game_pk": pk,
+        "date": date,
+        "home_team": home,
+        "away_team": away,
+        "home_score": int(post_home[-1]),
+        "away_score": int(post_away[-1]),
+        "attended": bool(rng.random() < 0.97),
+        "source": "synthetic",
+        "venue_name": PARKS.get(home, f"{home} Park"),
+    }
+    return SyntheticGame(game, pitches)
+
+
+def synthetic_games(n_pitches: int, seed: int = 42, first_pk: int = FIRST_PK) -> Iterator[SyntheticGame]:
+    """Yield games totalling exactly ``n_pitches`` pitches (~290 per game)."""
+    rng = np.random.default_rng(seed)
+    remaining = n_pitches
+    pk = first_pk
+    while remaining > 0:
+        n = min(remaining, int(np.clip(rng.normal(292, 30), 200, 420)))
+        yield _build_game(rng, pk, n)
+        remaining -= n
+        pk += 1
+
+
+def _opt(value: float):
+    return None if math.isnan(value) else value
+
+
+def _int(value: float):
+    return None if math.isnan(value) else int(value)
+
+
+def event_rows(sg: SyntheticGame) -> Iterator[tuple]:
+    """The game's pitches as statcast_events rows, in ``EVENT_COLUMNS`` order."""
+    p = sg.pitches
+    g = sg.game
+    date = g["date"].isoformat()
+    batters = _BATTER_NAMES[p["batter"]]
+    pitchers = _PITCHER_NAMES[p["pitcher"]]
+    runners = np.where(p["on_1b"] >= 0, _BATTER_NAMES[np.maximum(p["on_1b"], 0)], None)
+    spray = np.round(np.degrees(np.arctan2(p["hc_x"] - 125.42, 198.27 - p["hc_y"])), 1)
+    columns = [
+        p["launch_speed"], p["launch_angle"], p["estimated_ba"], p["wpa"],
+        p["hit_distance_sc"], p["hc_x"], p["hc_y"], spray,
+    ]
+    ls, la, xba, wpa, dist, hc_x, hc_y, spray = (c.tolist() for c in columns)
+    for i in range(len(sg)):
+        batted = bool(p["batted"][i])
+        yield (
+            g["mlb_game_pk"], date, batters[i], pitchers[i], p["pitch_type"][i],
+            _int(ls[i]), _int(la[i]), _int(xba[i]),
+            p["description"][i], p["event_type"][i], _opt(wpa[i]),
+            _int(dist[i]), _opt(hc_x[i]), _opt(hc_y[i]),
+            _opt(spray[i]), f"{g['mlb_game_pk']:x}-{i:04x}" if batted else None, None,
+            int(p["inning"][i]), "Top" if p["top"][i] else "Bot", int(p["outs_when_up"][i]),
+            int(p["home_score"][i]), int(p["away_score"][i]),
+            int(p["post_home_score"][i]), int(p["post_away_score"][i]),
+            runners[i], None, None, int(p["balls"][i]), int(p["strikes"][i]),
+            float(p["home_win_exp"][i]), round(1 - float(p["home_win_exp"][i]), 4),
+        )
+
+
+def game_row(sg: SyntheticGame) -> tuple:
+    return tuple(sg.game[c] for c in GAME_COLUMNS)
+
+
+def statcast_frame(sg: SyntheticGame) -> pd.DataFrame:
+    """The game as Baseball Savant's per-pitch export (what ``statcast_single_game`` returns)."""
+    p = sg.pitches
+    g = sg.game
+    batters = np.array([f"{last}, {first}" for first, last in BATTERS], dtype=object)
+    return pd.DataFrame({
+        "pitch_type": p["pitch_type"],
+        "game_date": g["date"].isoformat(),
+        "player_name": batters[p["batter"]],
+        "pitcher": p["pitcher"] + PITCHER_ID_BASE,
+        "events": np.where(p["last"], p["event_type"], None),
+        "description": p["description"],
+        "launch_speed": p["launch_speed"],
+        "launch_angle": p["launch_angle"],
+        "hit_distance_sc": p["hit_distance_sc"],
+        "hc_x": p["hc_x"],
+        "hc_y": p["hc_y"],
+        "estimated_ba_using_speedangle": p["estimated_ba"] / 1000,
+        "game_pk": g["mlb_game_pk"],
+        "at_bat_number": p["pa"] + 1,
+        "pitch_number": p["pitch_number"],
+        "inning": p["inning"],
+        "inning_topbot": np.where(p["top"], "Top", "Bot"),
+        "outs_when_up": p["outs_when_up"],
+        "balls": p["balls"],
+        "strikes": p["strikes"],
+        "on_1b": np.where(p["on_1b"] >= 0, p["on_1b"] + 100_000, np.nan),
+        "home_score": p["home_score"],
+        "away_score": p["away_score"],
+        "post_home_score": p["post_home_score"],
+        "post_away_score": p["post_away_score"],
+        "home_win_exp": p["home_win_exp"],
+        "delta_home_win_exp": np.where(p["last"], p["wpa"], 0.0),
+        "play_id": [f"{g['mlb_game_pk']:08x}-0000-4000-8000-{i:012x}" for i in range(len(sg))],
+    })
+
+
+def statcast_csv(sg: SyntheticGame) -> str:
+    """``statcast_frame`` as the CSV text Savant serves, newest pitch first."""
+    return statcast_frame(sg).iloc[::-1].to_csv(index=False)
+
+
+def people_json(pitcher_id: int) -> dict:
+    """The StatsAPI ``/people/{id}`` payload for a synthetic pitcher."""
+    first, last = PITCHERS[pitcher_id - PITCHER_ID_BASE]
+    return {"people": [{"id": pitcher_id, "fullName": f"{first} {last}"}]}
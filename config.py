@@ -1,13 +1,13 @@
 """Centralized configuration for the baseball-game-log project.
 
-All modules should import DATABASE_URL, engine, and SessionLocal from here
-instead of constructing their own.
+All modules should get the database from here (``get_engine()``, ``get_session()``)
+instead of constructing their own.  Nothing is imported or connected until first
+use, so importing config stays cheap; ``engine`` and ``SessionLocal`` still resolve
+as module attributes for older callers.
 """
 
 import os
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -18,8 +18,70 @@ DATABASE_URL = os.getenv(
 if "+asyncpg" in DATABASE_URL:
     DATABASE_URL = DATABASE_URL.replace("+asyncpg", "+psycopg2")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine = None
+_sessionmaker = None
+_engine_hooks = []
+# Guards creation, so threads racing to first use share one engine and its hooks
+# run once; reentrant because get_sessionmaker creates the engine under it
+_lock = threading.RLock()
+
+
+def get_engine():
+    """The shared SQLAlchemy engine, created on first use."""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+
+                engine = create_engine(DATABASE_URL)
+                for hook in _engine_hooks:
+                    hook(engine)
+                _engine = engine
+    return _engine
+
+
+def on_engine_created(hook) -> None:
+    """Call ``hook(engine)`` once the shared engine exists (now, if it already does)."""
+    with _lock:
+        _engine_hooks.append(hook)
+        engine = _engine
+    if engine is not None:
+        hook(engine)
+
+
+def get_sessionmaker():
+    global _sessionmaker
+    if _sessionmaker is None:
+        with _lock:
+            if _sessionmaker is None:
+                from sqlalchemy.orm import sessionmaker
+
+                _sessionmaker = sessionmaker(autocommit=False, autoflush=False,
+                                             bind=get_engine())
+    return _sessionmaker
+
+
+def get_session():
+    """A new ORM session on the shared engine."""
+    return get_sessionmaker()()
+
+
+def __getattr__(name):
+    # Lazy module attributes (PEP 562): ``from config import engine`` keeps working
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# API response cache / compression (see api/cache.py). Nothing clears the cache when
+# ingest writes, so it is opt-in: a TTL of 0 (the default) disables caching.
+API_CACHE_TTL_SECONDS = float(os.getenv("API_CACHE_TTL_SECONDS", "0"))
+API_COMPRESS_MIN_BYTES = int(os.getenv("API_COMPRESS_MIN_BYTES", "1024"))
+
+# SQL statements slower than this are logged and counted (see api/metrics.py).
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
 
 
 # Barrel detection constants
@@ -35,3 +97,39 @@ def is_barrel(launch_angle: float | None, exit_velo: float | None) -> bool:
     return (BARREL_MIN_LAUNCH_ANGLE <= launch_angle <= BARREL_MAX_LAUNCH_ANGLE) and (
         exit_velo >= BARREL_MIN_EXIT_VELO
     )
+
+# Brotli level for the precompressed export artifacts (see scraper/artifacts.py).
+# 11 is smallest but slowest; artifacts are only recompressed when they change.
+EXPORT_BROTLI_QUALITY = int(os.getenv("EXPORT_BROTLI_QUALITY", "11"))
+
+# Parquet snapshot of the attended-events dataset (see scraper/snapshot.py).
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshot")
+
+# Upstream HTTP for ingest (see scraper/http_replay.py): "live", "record" responses
+# to the fixture directory, or "replay" them offline with injected latency.
+HTTP_MODE = os.getenv("GAMELOG_HTTP_MODE", "live")
+HTTP_FIXTURES_DIR = os.getenv("GAMELOG_HTTP_FIXTURES", "data/http_fixtures")
+HTTP_LATENCY_MS = float(os.getenv("GAMELOG_HTTP_LATENCY_MS", "0"))
+
+# JSON Lines log of per-game ingest stage timings and counters (see
+# scraper/instrumentation.py); set to an empty string to disable.
+INGEST_LOG = os.getenv("GAMELOG_INGEST_LOG", "data/logs/ingest.jsonl")
+
+# Opt-in profiling of entry points and the API (see scraper/profiling.py): any of
+# "cpu", "sample", "memory", comma-separated; files go to GAMELOG_PROFILE_DIR.
+PROFILE = os.getenv("GAMELOG_PROFILE", "")
+PROFILE_DIR = os.getenv("GAMELOG_PROFILE_DIR", "data/profiles")
+
+# Fingerprints of each gamelog task's last successful run (see scraper/taskgraph.py).
+TASK_STATE = os.getenv("GAMELOG_TASK_STATE", "data/tasks.json")
+
+# Backfill runner (see scraper/backfill.py): parallel workers, starting rate in
+# games per second (adapted between the min and max while running), attempts per
+# game before it is marked failed, and how long a "running" game may go without an
+# update before another run reclaims it.
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "2"))
+BACKFILL_RATE = float(os.getenv("BACKFILL_RATE", "0.5"))
+BACKFILL_MIN_RATE = float(os.getenv("BACKFILL_MIN_RATE", "0.05"))
+BACKFILL_MAX_RATE = float(os.getenv("BACKFILL_MAX_RATE", "4"))
+BACKFILL_MAX_ATTEMPTS = int(os.getenv("BACKFILL_MAX_ATTEMPTS", "3"))
+BACKFILL_STALE_MINUTES = float(os.getenv("BACKFILL_STALE_MINUTES", "15"))
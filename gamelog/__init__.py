@@ -0,0 +1 @@
+"""One command for the whole data pipeline: ``python -m gamelog`` (see __main__.py)."""
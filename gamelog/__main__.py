@@ -0,0 +1,76 @@
+"""Run the pipeline as a task graph in one process (see gamelog/pipeline.py).
+
+Usage:
+    python -m gamelog run [TASK ...] [--game PK ...] [--force [TASK ...]] [--jobs N]
+                          [--dry-run] [--out DIR] [--format {json,columnar}]
+    python -m gamelog add-game PK [--force]
+
+``run`` brings the named tasks (default: all of enrich, fetch, cleanup, validate,
+snapshot, export) and everything they require up to date.  Tasks whose inputs and
+outputs match their last successful run are skipped; the rest run on ``--jobs``
+threads as soon as their requirements are done.  ``--force`` reruns the named tasks (``fnmatch``
+patterns, e.g. ``fetch:*``; all when none are named) even if they are up to date,
+and ``--dry-run`` only reports what would run.
+
+``add-game PK`` is ``run --game PK``: it fetches that one game (``--force``
+refetches it) and then rebuilds only what the new events invalidate.
+
+Fingerprints are kept in ``GAMELOG_TASK_STATE``; deleting the file makes every
+task re-check its outputs (fetch keeps stored events, exports run in full).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from config import INGEST_LOG, TASK_STATE
+from gamelog.pipeline import EXPORT_DIR, EXPORT_FORMATS, Pipeline
+from scraper import profiling
+from scraper.taskgraph import BLOCKED, FAILED, run_graph, summarize
+
+
+@profiling.entry_point("gamelog")
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="gamelog", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Bring tasks and their requirements up to date")
+    run.add_argument("tasks", nargs="*", metavar="TASK", help="enrich, fetch, cleanup, validate, snapshot, export")
+    run.add_argument("--game", type=int, nargs="+", metavar="PK", help="Only fetch these games")
+    run.add_argument("--force", nargs="*", metavar="TASK", help="Rerun these tasks (all if none)")
+
+    add = commands.add_parser("add-game", help="Fetch one game and rebuild what it invalidates")
+    add.add_argument("game", type=int, metavar="PK")
+    add.add_argument("--force", action="store_true", help="Refetch the game's events")
+
+    for sub in (run, add):
+        sub.add_argument("--jobs", type=int, default=4, help="Tasks to run at once")
+        sub.add_argument("--dry-run", action="store_true", help="Report what would run")
+        sub.add_argument("--out", type=Path, default=EXPORT_DIR, help="Export directory")
+        sub.add_argument("--format", choices=EXPORT_FORMATS, default="json")
+        sub.add_argument("--state", default=TASK_STATE, help="Task fingerprint file")
+        sub.add_argument("--log", default=INGEST_LOG,
+                         help="JSON Lines file for per-game ingest timings ('' to disable)")
+    args = parser.parse_args(argv)
+
+    if args.command == "add-game":
+        game_pks, targets = [args.game], None
+        force = [f"fetch:{args.game}"] if args.force else []
+    else:
+        game_pks, targets = args.game, args.tasks or None
+        force = [] if args.force is None else args.force or ["*"]
+
+    pipeline = Pipeline(out_dir=args.out, format=args.format, game_pks=game_pks,
+                        ingest_log=args.log)
+    try:
+        results = run_graph(pipeline.tasks(), targets, state_path=args.state, force=force,
+                            jobs=args.jobs, dry_run=args.dry_run)
+    except ValueError as exc:
+        parser.error(str(exc))
+    pipeline.report()
+    print(summarize(results))
+    return 1 if any(r.status in (FAILED, BLOCKED) for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""The pipeline as a task graph (see scraper/taskgraph.py).
+
+    enrich ──> fetch ──> cleanup ──┬──> snapshot
+     (fetch:<gamePk>               ├──> export
+      per game)                    └──> validate
+
+- ``enrich`` fills in gamePks, scores and venues (scraper/enrich_games.py).  Input:
+  the games it would try to enrich; it reruns when that set changes.
+- ``fetch`` expands to one ``fetch:<gamePk>`` task per attended game, which stores
+  the game's Statcast events (``statcast_fetcher.ingest_game``).  Input: the game
+  row; output: whether the game has stored events.  A game whose row changed
+  since its last fetch is refetched, and one whose events are gone is fetched
+  again; events edited by anything else (cleanup, repair, backfill) are not a
+  reason to refetch.  A game Statcast has not published yet is retried on every
+  run.  Fetcher code is deliberately not an input: refetching every game is a
+  backfill, not a build step.
+- ``cleanup`` deletes corrupted duplicate events (scraper/cleanup.py).  Input: the
+  change log and its own code; it checks only the changed games when the change
+  log is all that moved.
+- ``validate`` checks the data validation rules (scraper/validation.py) and fails
+  on any violation.  Input: the change log and the rules; only the games changed
+  since its last clean run are checked.
+- ``snapshot`` (the derived Parquet dataset, scraper/snapshot.py) and ``export``
+  (every web/public artifact, scripts/export_pipeline.py) are independent of each
+  other.  Inputs: the change log, the attended games and their own code; outputs:
+  the snapshot directory and the artifacts listed in manifest.json.  When only the
+  change log moved they run incrementally, otherwise in full.
+
+Every action imports what it runs on first use, so building the graph is cheap.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Collection
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from config import INGEST_LOG, SNAPSHOT_DIR
+from scraper.taskgraph import Files, Query, Resource, Task, TaskRun, Value
+
+ROOT = Path(__file__).resolve().parent.parent
+# Defaults of scripts/export_pipeline.py, which is only imported when export runs
+EXPORT_DIR = Path("web/public")
+EXPORT_FORMATS = ("json", "columnar")
+
+CHANGE_LOG_SQL = "SELECT COALESCE(MAX(id), 0) FROM game_changes"
+ATTENDED_GAMES_SQL = "SELECT * FROM games WHERE attended ORDER BY id"
+# The rows enrich_games would try: missing a gamePk or score, and already played
+TO_ENRICH_SQL = """
+    SELECT id, date, home_team, away_team, home_team_id, away_team_id, mlb_game_pk
+    FROM games
+    WHERE (home_score IS NULL OR mlb_game_pk IS NULL) AND date <= CURRENT_DATE
+    ORDER BY id
+"""
+FETCHABLE_GAMES_SQL = """
+    SELECT mlb_game_pk FROM games
+    WHERE attended AND mlb_game_pk IS NOT NULL
+    ORDER BY date, mlb_game_pk
+"""
+GAME_SQL = """
+    SELECT date, home_team, away_team, attended FROM games
+    WHERE mlb_game_pk = :pk ORDER BY id
+"""
+# Only whether events are stored: other tasks and tools edit a game's events
+GAME_EVENTS_SQL = "SELECT EXISTS (SELECT 1 FROM statcast_events WHERE mlb_game_pk = :pk)"
+
+CLEANUP_CODE = ("scraper/cleanup.py",)
+VALIDATION_CODE = ("scraper/validation.py",)
+SNAPSHOT_CODE = ("scraper/snapshot.py",)
+EXPORT_CODE = (
+    "scripts/export_*.py",
+    "scraper/artifacts.py",
+    "scraper/columnar.py",
+    "scraper/heartbeat.py",
+    "scraper/snapshot.py",
+    "scraper/spray.py",
+    "config.py",
+)
+
+
+def code(*patterns: str) -> Files:
+    return Files("code", [ROOT / pattern for pattern in patterns], content=True)
+
+
+@dataclass
+class Artifacts(Resource):
+    """The exported artifacts listed in ``manifest.json``, by size and mtime."""
+
+    key: str
+    out_dir: Path
+
+    def fingerprint(self) -> str | None:
+        manifest = self.out_dir / "manifest.json"
+        if not manifest.exists():
+            return None
+        names = json.loads(manifest.read_text())["files"]
+        return Files(self.key, [manifest, *(self.out_dir / name for name in names)]).fingerprint()
+
+
+def only_new_changes(run: TaskRun) -> bool:
+    """Whether the change log is all that moved, so its consumers can run incrementally."""
+    return run.incremental and run.changed <= {"game_changes"}
+
+
+@dataclass
+class Pipeline:
+    """Options shared by the tasks, and the Statcast ingest the fetch tasks report to."""
+
+    out_dir: Path = EXPORT_DIR
+    snapshot_dir: Path = Path(SNAPSHOT_DIR)
+    format: str = "json"
+    # Games to fetch; None for every attended game
+    game_pks: Collection[int] | None = None
+    ingest_log: str | None = INGEST_LOG
+    ingest: Any = None
+
+    def tasks(self) -> list[Task]:
+        changes = Query("game_changes", CHANGE_LOG_SQL)
+        games = Query("attended_games", ATTENDED_GAMES_SQL)
+        return [
+            Task("enrich", self.enrich, inputs=(Query("games_to_enrich", TO_ENRICH_SQL),)),
+            Task("fetch", requires=("enrich",), expand=self.fetch_tasks),
+            Task(
+                "cleanup", self.cleanup, requires=("fetch",),
+                inputs=(changes, code(*CLEANUP_CODE)),
+            ),
+            Task(
+                "validate", self.validate, requires=("cleanup",),
+                inputs=(changes, code(*VALIDATION_CODE)),
+            ),
+            Task(
+                "snapshot", self.snapshot, requires=("cleanup",),
+                inputs=(changes, games, code(*SNAPSHOT_CODE)),
+                outputs=(Files("snapshot", [self.snapshot_dir]),),
+            ),
+            Task(
+                "export", self.export, requires=("cleanup",),
+                inputs=(changes, games, code(*EXPORT_CODE), Value("format", self.format)),
+                outputs=(Artifacts("artifacts", self.out_dir),),
+            ),
+        ]
+
+    def enrich(self, run: TaskRun) -> None:
+        from scraper.enrich_games import enrich_games
+
+        enrich_games()
+
+    def fetch_tasks(self) -> list[Task]:
+        from sqlalchemy import text
+
+        from config import get_engine
+        from scraper.instrumentation import IngestRun
+
+        with get_engine().connect() as conn:
+            pks = list(conn.execute(text(FETCHABLE_GAMES_SQL)).scalars())
+        if self.game_pks is not None:
+            unknown = set(self.game_pks) - set(pks)
+            if unknown:
+                raise ValueError(
+                    f"Not an attended game with a gamePk: {', '.join(map(str, sorted(unknown)))}"
+                )
+            pks = [pk for pk in pks if pk in self.game_pks]
+
+        self.ingest = IngestRun(self.ingest_log or None)
+        return [
+            Task(
+                f"fetch:{pk}", partial(self.fetch, pk),
+                inputs=(Query("game", GAME_SQL, {"pk": pk}),),
+                outputs=(Query("events", GAME_EVENTS_SQL, {"pk": pk}),),
+            )
+            for pk in pks
+        ]
+
+    def fetch(self, game_pk: int, run: TaskRun) -> bool:
+        from api.models import Game
+        from config import get_session
+        from scraper.statcast_fetcher import ingest_game
+
+        with get_session() as db:
+            game = db.query(Game).filter(Game.mlb_game_pk == game_pk).first()
+            # Refetch a game whose row changed since its last fetch; otherwise (no
+            # record of one, or its events went missing) stored events are kept
+            refetch = run.forced or (run.changed is not None and "game" in run.changed)
+            record = ingest_game(db, game, self.ingest, force=refetch)
+        if record.status == "failed":
+            raise RuntimeError(record.error)
+        return record.status != "unavailable"
+
+    def cleanup(self, run: TaskRun) -> None:
+        from scraper.cleanup import run_cleanup
+
+        print(f"🧹 {run_cleanup(incremental=only_new_changes(run)).summary()}")
+
+    def validate(self, run: TaskRun) -> None:
+        from scraper.validation import print_report, run_validation
+
+        report = run_validation(incremental=only_new_changes(run))
+        print_report(report)
+        if report.failures():
+            raise RuntimeError(report.summary())
+
+    def snapshot(self, run: TaskRun) -> None:
+        from config import get_engine
+        from scraper.snapshot import write_snapshot
+
+        write_snapshot(get_engine(), self.snapshot_dir, incremental=only_new_changes(run))
+
+    def export(self, run: TaskRun) -> None:
+        from scripts.export_pipeline import run_pipeline
+
+        run_pipeline(
+            self.out_dir.resolve(), incremental=only_new_changes(run), format=self.format
+        )
+
+    def report(self) -> None:
+        """Log and print the Statcast ingest summary, if any game was fetched."""
+        if self.ingest is not None and self.ingest.games:
+            self.ingest.finish()
+            print(self.ingest.summary_table())
@@ -0,0 +1,265 @@
+"""Atomic, content-hashed and precompressed publishing of exported artifacts.
+
+Exporters write their artifacts under fixed names (``barrel_map.json``,
+``heartbeat/<game_pk>.json``, ...) with ``write_bytes_atomic``: the bytes go to a
+temporary file in the same directory that is then renamed over the target, so a
+reader never sees a half-written file, and a file whose content did not change is
+not touched at all (its mtime stays put, so nothing downstream rebuilds).
+
+``publish`` then gives every artifact an immutable, content-addressed copy
+(``barrel_map.<hash>.json``) with precompressed ``.gz`` and ``.br`` siblings, and
+records the mapping in ``manifest.json``::
+
+    {
+        "version": 1,
+        "files": {
+            "barrel_map.json": {
+                "path": "barrel_map.3f9a0c1d2e4b.json",
+                "sha256": "3f9a0c1d2e4b...",
+                "size": 87115,
+                "encodings": ["br", "gzip"],
+                "previous": "barrel_map.77ab12cd34ef.json"
+            },
+            ...
+        }
+    }
+
+Hashed copies can be served with ``Cache-Control: immutable`` and a long max-age;
+only manifest.json (and the fixed names, kept for older clients) need short
+caching.  The previous generation of each artifact is kept so clients holding the
+old manifest can still fetch it; older ones are pruned.
+
+Used by scripts/export_pipeline.py; web/src/lib/artifacts.ts resolves names through
+the manifest.
+"""
+
+from __future__ import annotations
+
+import filecmp
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+from collections.abc import Iterable
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import EXPORT_BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz siblings are written without it
+    brotli = None
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_LENGTH = 12
+
+CHUNK_SIZE = 1 << 20
+
+
+class _GzipCompressor:
+    """Incremental gzip with a pinned mtime, so identical content compresses identically."""
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._gzip = gzip.GzipFile(fileobj=self._buffer, mode="wb", compresslevel=9, mtime=0)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def process(self, data: bytes) -> bytes:
+        self._gzip.write(data)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        self._gzip.close()
+        return self._drain()
+
+
+# (encoding, file suffix, incremental compressor factory)
+COMPRESSORS = [("gzip", ".gz", _GzipCompressor)]
+if brotli is not None:
+    COMPRESSORS.insert(
+        0, ("br", ".br", lambda: brotli.Compressor(quality=EXPORT_BROTLI_QUALITY))
+    )
+
+
+class _AtomicHandle:
+    def __init__(self, f):
+        self.write = f.write
+        self.changed = False
+
+
+@contextmanager
+def _atomic_file(path: Path):
+    """Yield a temporary binary file that replaces ``path`` when the block succeeds.
+
+    The replacement is skipped when ``path`` already holds identical bytes.  Sets
+    ``handle.changed`` on the yielded handle after the block.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            handle = _AtomicHandle(f)
+            yield handle
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists() and filecmp.cmp(tmp, path, shallow=False):
+            Path(tmp).unlink()
+            handle.changed = False
+            return
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+        handle.changed = True
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def write_bytes_atomic(path: Path, data: bytes) -> bool:
+    """Atomically replace ``path`` with ``data``; return False if it already held them."""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    with _atomic_file(path) as f:
+        f.write(data)
+    return f.changed
+
+
+def write_text_atomic(path: Path, text: str) -> bool:
+    return write_bytes_atomic(path, text.encode("utf-8"))
+
+
+def write_json_atomic(path: Path, data, **dump_kwargs) -> bool:
+    """``json.dump`` ``data`` to ``path`` atomically, skipping unchanged content."""
+    return write_text_atomic(path, json.dumps(data, **dump_kwargs))
+
+
+def write_json_array_atomic(path: Path, items: Iterable, indent: int | None = None,
+                            **dump_kwargs) -> tuple[bool, int]:
+    """Stream ``items`` to ``path`` as a JSON array; return (changed, item count).
+
+    Items are encoded one at a time, so memory stays bounded by the largest item
+    whatever the array length.  The bytes are exactly ``json.dumps(list(items),
+    indent=indent, **dump_kwargs)``.
+    """
+    if indent is None:
+        separator = dump_kwargs.get("separators", (", ", ": "))[0]
+        prefix, suffix = "", ""
+    else:
+        pad = " " * indent
+        separator, prefix, suffix = ",\n" + pad, "\n" + pad, "\n"
+        dump_kwargs["indent"] = indent
+    count = 0
+    with _atomic_file(path) as f:
+        f.write(b"[")
+        for item in items:
+            text = json.dumps(item, **dump_kwargs)
+            if indent is not None:
+                text = text.replace("\n", "\n" + pad)
+            f.write(((separator if count else prefix) + text).encode("utf-8"))
+            count += 1
+        f.write(((suffix if count else "") + "]").encode("utf-8"))
+    return f.changed, count
+
+
+def hashed_name(rel_path: str, digest: str) -> str:
+    """``heartbeat/index.json`` -> ``heartbeat/index.<hash>.json``."""
+    path = Path(rel_path)
+    return path.with_name(f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}").as_posix()
+
+
+def load_manifest(out_dir: Path) -> dict:
+    path = out_dir / MANIFEST_NAME
+    if not path.exists():
+        return {"version": MANIFEST_VERSION, "files": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _remove_generation(out_dir: Path, rel_path: str | None) -> None:
+    if not rel_path:
+        return
+    for suffix in ["", *(suffix for _, suffix, _ in COMPRESSORS)]:
+        (out_dir / f"{rel_path}{suffix}").unlink(missing_ok=True)
+
+
+def _read_chunks(path: Path):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def _publish_file(out_dir: Path, rel_path: str, entry: dict | None) -> dict:
+    source = out_dir / rel_path
+    sha256 = hashlib.sha256()
+    for chunk in _read_chunks(source):
+        sha256.update(chunk)
+    digest = sha256.hexdigest()
+    if entry is not None and entry["sha256"] == digest and (out_dir / entry["path"]).exists():
+        return entry
+
+    target = hashed_name(rel_path, digest)
+    # Content-addressed, so an existing copy is already correct
+    if not (out_dir / target).exists():
+        with _atomic_file(out_dir / target) as f:
+            for chunk in _read_chunks(source):
+                f.write(chunk)
+    for _, suffix, make_compressor in COMPRESSORS:
+        sibling = out_dir / f"{target}{suffix}"
+        if not sibling.exists():
+            compressor = make_compressor()
+            with _atomic_file(sibling) as f:
+                for chunk in _read_chunks(source):
+                    f.write(compressor.process(chunk))
+                f.write(compressor.finish())
+
+    previous = None
+    if entry is not None and entry["path"] != target:
+        # Keep one generation back for clients still holding the old manifest
+        if entry.get("previous") != target:
+            _remove_generation(out_dir, entry.get("previous"))
+        previous = entry["path"]
+    new_entry = {
+        "path": target,
+        "sha256": digest,
+        "size": source.stat().st_size,
+        "encodings": [encoding for encoding, _, _ in COMPRESSORS],
+    }
+    if previous:
+        new_entry["previous"] = previous
+    return new_entry
+
+
+def publish(out_dir: Path, paths: Iterable[Path]) -> dict:
+    """Publish hashed, precompressed copies of ``paths`` and update manifest.json.
+
+    Entries for files not in ``paths`` are kept (so partial exports keep the rest of
+    the manifest) unless their source file no longer exists.  Returns the manifest.
+    """
+    manifest = load_manifest(out_dir)
+    files: dict = manifest.setdefault("files", {})
+
+    for rel_path, entry in list(files.items()):
+        if not (out_dir / rel_path).exists():
+            _remove_generation(out_dir, entry.get("previous"))
+            _remove_generation(out_dir, entry["path"])
+            del files[rel_path]
+
+    for path in paths:
+        rel_path = path.relative_to(out_dir).as_posix()
+        files[rel_path] = _publish_file(out_dir, rel_path, files.get(rel_path))
+
+    manifest["version"] = MANIFEST_VERSION
+    manifest["files"] = dict(sorted(files.items()))
+    write_json_atomic(out_dir / MANIFEST_NAME, manifest, indent=2)
+    return manifest
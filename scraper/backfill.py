@@ -0,0 +1,273 @@
+"""Resumable, per-game backfill jobs.
+
+A backfill (e.g. re-fetching win probability) is a named ``job`` with one
+``backfill_jobs`` row per game that moves ``pending`` → ``running`` → ``done`` or
+``failed`` and keeps its attempt count and last error.  The table is the
+checkpoint: ``enqueue`` only adds games that have no row yet, so discovering again
+after an interruption never requeues finished work, and ``run_jobs`` only claims
+pending games.
+
+``run_jobs`` works through a job on a bounded pool of threads.  Each worker waits
+for the shared ``AdaptiveRateLimiter``, claims the next pending game with
+``FOR UPDATE SKIP LOCKED`` (so several runners can share a job) and calls the
+job's ``process(game_pk)``:
+
+- returning normally marks the game ``done`` and nudges the rate up;
+- raising ``JobError`` (the data is not there; retrying now won't help) marks it
+  ``failed`` straight away;
+- any other exception (upstream errors, timeouts) halves the rate and puts the
+  game back to ``pending`` until it has had ``max_attempts``.
+
+An interrupted run returns the games it claimed to ``pending``; games left
+``running`` by a runner that died are reclaimed once they have gone
+``BACKFILL_STALE_MINUTES`` without an update.
+
+Used by scripts/backfill_win_probability.py.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from sqlalchemy import text
+
+from config import (
+    BACKFILL_MAX_ATTEMPTS,
+    BACKFILL_MAX_RATE,
+    BACKFILL_MIN_RATE,
+    BACKFILL_RATE,
+    BACKFILL_STALE_MINUTES,
+    BACKFILL_WORKERS,
+    get_engine,
+)
+
+JOB_STATES = ("pending", "running", "done", "failed")
+
+ENQUEUE_SQL = text(
+    """
+    INSERT INTO backfill_jobs (job, mlb_game_pk)
+    SELECT :job, pk FROM unnest(CAST(:game_pks AS integer[])) AS pk
+    ON CONFLICT (job, mlb_game_pk) DO NOTHING
+    """
+)
+
+# Retries go behind games that have not been tried yet; newest games first
+CLAIM_SQL = text(
+    """
+    UPDATE backfill_jobs
+    SET state = 'running', attempts = attempts + 1, claimed_by = :runner, updated_at = now()
+    WHERE id = (
+        SELECT id FROM backfill_jobs
+        WHERE job = :job AND state = 'pending'
+        ORDER BY attempts, mlb_game_pk DESC
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, mlb_game_pk, attempts
+    """
+)
+
+FINISH_SQL = text(
+    """
+    UPDATE backfill_jobs
+    SET state = :state, last_error = :error, claimed_by = NULL, updated_at = now(),
+        finished_at = CASE WHEN :state = 'pending' THEN NULL ELSE now() END
+    WHERE id = :id
+    """
+)
+
+# An interrupted attempt does not count against the game
+RELEASE_SQL = text(
+    """
+    UPDATE backfill_jobs
+    SET state = 'pending', attempts = GREATEST(attempts - 1, 0), claimed_by = NULL,
+        updated_at = now()
+    WHERE job = :job AND state = 'running' AND claimed_by = :runner
+    """
+)
+
+RECLAIM_STALE_SQL = text(
+    """
+    UPDATE backfill_jobs
+    SET state = 'pending', claimed_by = NULL, updated_at = now()
+    WHERE job = :job AND state = 'running'
+      AND updated_at < now() - make_interval(secs => :seconds)
+    """
+)
+
+RETRY_FAILED_SQL = text(
+    """
+    UPDATE backfill_jobs
+    SET state = 'pending', attempts = 0, finished_at = NULL, updated_at = now()
+    WHERE job = :job AND state = 'failed'
+    """
+)
+
+STATUS_SQL = text("SELECT state, COUNT(*) FROM backfill_jobs WHERE job = :job GROUP BY state")
+
+FAILED_SQL = text(
+    """
+    SELECT mlb_game_pk, attempts, last_error FROM backfill_jobs
+    WHERE job = :job AND state = 'failed'
+    ORDER BY mlb_game_pk DESC
+    """
+)
+
+
+class JobError(Exception):
+    """A game cannot be backfilled now; it is marked failed without retrying."""
+
+
+def enqueue(conn, job: str, game_pks: Iterable[int]) -> int:
+    """Add pending rows for games that have none yet; return how many were added."""
+    return conn.execute(ENQUEUE_SQL, {"job": job, "game_pks": list(game_pks)}).rowcount
+
+
+def reclaim_stale(conn, job: str, minutes: float = BACKFILL_STALE_MINUTES) -> int:
+    """Return games stuck ``running`` (their runner died) to ``pending``."""
+    return conn.execute(RECLAIM_STALE_SQL, {"job": job, "seconds": minutes * 60}).rowcount
+
+
+def retry_failed(conn, job: str) -> int:
+    """Requeue every failed game with a fresh attempt budget."""
+    return conn.execute(RETRY_FAILED_SQL, {"job": job}).rowcount
+
+
+def job_status(conn, job: str) -> dict[str, int]:
+    """Games in each state."""
+    counts = dict.fromkeys(JOB_STATES, 0)
+    counts.update(conn.execute(STATUS_SQL, {"job": job}).all())
+    return counts
+
+
+def failed_games(conn, job: str) -> list[tuple[int, int, str | None]]:
+    """``(game_pk, attempts, last_error)`` for every failed game."""
+    return [tuple(row) for row in conn.execute(FAILED_SQL, {"job": job})]
+
+
+class AdaptiveRateLimiter:
+    """Spaces calls ``1 / rate`` seconds apart, across threads, adapting the rate.
+
+    Additive increase, multiplicative decrease: each ``success`` adds ``increase``
+    to the rate and each ``backoff`` halves it, within ``[min_rate, max_rate]``.
+    """
+
+    def __init__(
+        self,
+        rate: float = BACKFILL_RATE,
+        min_rate: float = BACKFILL_MIN_RATE,
+        max_rate: float = BACKFILL_MAX_RATE,
+        increase: float = 0.05,
+    ):
+        self.min_rate, self.max_rate, self.increase = min_rate, max_rate, increase
+        self.rate = min(max(rate, min_rate), max_rate)
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cancel: threading.Event | None = None) -> bool:
+        """Wait for the next slot; False if ``cancel`` was set while waiting."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + 1 / self.rate
+        delay = slot - now
+        if cancel is not None:
+            return not cancel.wait(delay)
+        time.sleep(delay)
+        return True
+
+    def success(self) -> None:
+        with self._lock:
+            self.rate = min(self.rate + self.increase, self.max_rate)
+
+    def backoff(self) -> None:
+        with self._lock:
+            self.rate = max(self.rate / 2, self.min_rate)
+            # Cool down before the next call, too
+            self._next = max(self._next, time.monotonic()) + 1 / self.rate
+
+
+def run_jobs(
+    job: str,
+    process: Callable[[int], object],
+    workers: int = BACKFILL_WORKERS,
+    limiter: AdaptiveRateLimiter | None = None,
+    max_attempts: int = BACKFILL_MAX_ATTEMPTS,
+    limit: int | None = None,
+    engine=None,
+) -> Counter:
+    """Process ``job``'s pending games until none are left (or ``limit`` were claimed).
+
+    Returns this run's outcomes: ``done``, ``failed`` and ``retried`` counts.
+    Ctrl-C stops claiming new games and waits for the ones in progress; a second
+    Ctrl-C abandons them, and they are returned to ``pending``.
+    """
+    engine = engine or get_engine()
+    limiter = limiter or AdaptiveRateLimiter()
+    runner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    stop = threading.Event()
+    outcomes: Counter = Counter()
+    lock = threading.Lock()
+    claimed = 0
+
+    def finish(row, state: str, error: str | None) -> None:
+        with engine.begin() as conn:
+            conn.execute(FINISH_SQL, {"id": row.id, "state": state, "error": error})
+        with lock:
+            outcomes["retried" if state == "pending" else state] += 1
+            total = outcomes["done"] + outcomes["failed"]
+        note = f" - {error}" if error else ""
+        print(f"[{total} finished] game {row.mlb_game_pk}: {state}, attempt {row.attempts} "
+              f"(rate {limiter.rate:.2f}/s){note}")
+
+    def worker() -> None:
+        nonlocal claimed
+        while not stop.is_set():
+            with lock:
+                if limit is not None and claimed >= limit:
+                    return
+                claimed += 1
+            if not limiter.acquire(stop):
+                return
+            with engine.begin() as conn:
+                row = conn.execute(CLAIM_SQL, {"job": job, "runner": runner}).first()
+            if row is None:
+                return
+            try:
+                process(row.mlb_game_pk)
+            except JobError as exc:
+                finish(row, "failed", str(exc))
+            except Exception as exc:
+                limiter.backoff()
+                error = f"{type(exc).__name__}: {exc}"
+                finish(row, "pending" if row.attempts < max_attempts else "failed", error)
+            else:
+                limiter.success()
+                finish(row, "done", None)
+
+    pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix=f"backfill-{job}")
+    futures = [pool.submit(worker) for _ in range(max(workers, 1))]
+    try:
+        try:
+            wait(futures)
+        except KeyboardInterrupt:
+            stop.set()
+            print("Interrupted - finishing the games in progress (Ctrl-C again to abandon them)")
+            wait(futures)
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        with engine.begin() as conn:
+            released = conn.execute(RELEASE_SQL, {"job": job, "runner": runner}).rowcount
+        if released:
+            print(f"Returned {released} unfinished game(s) to pending")
+    for future in futures:
+        future.result()
+    return outcomes
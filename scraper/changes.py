@@ -0,0 +1,107 @@
+"""Per-game change tracking for incremental exports.
+
+Ingestion appends a ``game_changes`` row whenever a game's data changes; each
+downstream consumer (e.g. the export pipeline) remembers the highest change id it
+has processed in ``consumer_checkpoints``.  Consumers only need to be idempotent per
+game - a change that is seen twice is simply re-applied.
+
+Ids are handed out when a change is written, not when it commits, so a change can
+become visible below an id a consumer has already read past.  Each change also
+stores the transaction that wrote it, and a checkpoint stores the oldest
+transaction still running when the log was read (the snapshot's xmin): changes
+from that transaction on are read again next time, whatever their id.
+
+Used by scraper/statcast_fetcher.py, scraper/enrich_games.py and
+scripts/export_pipeline.py.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from sqlalchemy import text
+
+RECORD_CHANGE_SQL = text(
+    "INSERT INTO game_changes (mlb_game_pk, change_type) VALUES (:pk, :change_type)"
+)
+
+# One statement, so the id and the xmin come from the same snapshot
+LOG_POSITION_SQL = text(
+    """
+    SELECT (SELECT COALESCE(MAX(id), 0) FROM game_changes),
+           pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+    """
+)
+
+CHECKPOINT_SQL = text(
+    "SELECT last_change_id, last_xmin FROM consumer_checkpoints WHERE consumer = :consumer"
+)
+
+PENDING_CHANGES_SQL = text(
+    """
+    SELECT DISTINCT mlb_game_pk
+    FROM game_changes
+    WHERE (id > :after OR xid >= CAST(:after_xmin AS bigint)) AND id <= :upto
+    """
+)
+
+ADVANCE_CHECKPOINT_SQL = text(
+    """
+    INSERT INTO consumer_checkpoints (consumer, last_change_id, last_xmin, updated_at)
+    VALUES (:consumer, :change_id, :xmin, now())
+    ON CONFLICT (consumer) DO UPDATE
+        SET last_change_id = GREATEST(consumer_checkpoints.last_change_id, EXCLUDED.last_change_id),
+            last_xmin = GREATEST(consumer_checkpoints.last_xmin, EXCLUDED.last_xmin),
+            updated_at = now()
+    """
+)
+
+
+class LogPosition(NamedTuple):
+    """How far the log has been read: the latest change id and the snapshot's xmin."""
+
+    change_id: int
+    xmin: int | None
+
+
+def record_game_change(conn, game_pk: int, change_type: str) -> None:
+    """Append a change for ``game_pk``; commits with the caller's transaction.
+
+    ``conn`` may be a Connection or a Session.
+    """
+    conn.execute(RECORD_CHANGE_SQL, {"pk": game_pk, "change_type": change_type})
+
+
+def log_position(conn) -> LogPosition:
+    """The position a consumer that reads every game now can checkpoint."""
+    return LogPosition(*conn.execute(LOG_POSITION_SQL).one())
+
+
+def get_checkpoint(conn, consumer: str) -> LogPosition | None:
+    """Return the consumer's checkpoint, or None if it never ran."""
+    row = conn.execute(CHECKPOINT_SQL, {"consumer": consumer}).one_or_none()
+    return None if row is None else LogPosition(*row)
+
+
+def pending_changes(conn, consumer: str) -> tuple[set[int] | None, LogPosition]:
+    """Return (game_pks changed since the consumer's checkpoint, current log position).
+
+    The game set is None when the consumer has no checkpoint yet and so must
+    process everything.  It may repeat games from the last read whose changes
+    were written by transactions that were still running then.
+    """
+    upto = log_position(conn)
+    after = get_checkpoint(conn, consumer)
+    if after is None:
+        return None, upto
+    rows = conn.execute(PENDING_CHANGES_SQL, {
+        "after": after.change_id, "after_xmin": after.xmin, "upto": upto.change_id,
+    })
+    return {pk for (pk,) in rows}, upto
+
+
+def advance_checkpoint(conn, consumer: str, position: LogPosition) -> None:
+    """Mark changes up to ``position`` as processed by ``consumer`` (never moves back)."""
+    conn.execute(ADVANCE_CHECKPOINT_SQL, {
+        "consumer": consumer, "change_id": position.change_id, "xmin": position.xmin,
+    })
@@ -0,0 +1,167 @@
+"""Removal of corrupted Statcast events.
+
+An old ingest bug copied one event's WPA, exit velocity and launch angle onto a
+batter's other events.  A group of more than two attended-game events of one
+batter sharing all three values across different outcomes
+(``raw_description``) is corrupted; the group's first event (lowest id) is kept
+and the rest are deleted.  Events with a WPA of exactly 0 are left out: ingest
+stores every pitch, and each pitch that does not end a plate appearance has
+WPA 0, so fouls with the same rounded EV/LA would otherwise look corrupted.
+
+Finding and deleting is one statement (``cleanup_sql``): the groups, the events to
+delete and the per-group report come from CTEs, so no ids travel to the client.
+A dry run runs the same statement with the ``DELETE`` left out.
+
+Incremental runs only look at the groups that contain an event of a game changed
+since the last run (the ``cleanup`` consumer of the change log, see
+scraper/changes.py), so their cost follows the new data rather than the table.
+``post_ingest`` is the incremental run ingest calls when it finishes;
+games that lost events are recorded in the change log, so exports follow.
+
+Used by scripts/cleanup_corrupted_data.py, scraper/statcast_fetcher.py and the
+gamelog ``cleanup`` task.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+
+from config import get_engine
+from scraper.changes import advance_checkpoint, pending_changes, record_game_change
+
+CONSUMER = "cleanup"
+
+# Incremental runs start from the (batter, WPA, EV, LA) keys of the changed games'
+# events and reach the rest of each group through the batter_name index
+_CHANGED_KEYS_CTE = """
+    changed_keys AS (
+        SELECT DISTINCT batter_name, wpa, launch_speed, launch_angle
+        FROM statcast_events
+        WHERE mlb_game_pk = ANY(CAST(:game_pks AS integer[]))
+    ),"""
+_CHANGED_KEYS_JOIN = """
+        JOIN changed_keys k
+          ON se.batter_name = k.batter_name AND se.wpa = k.wpa
+         AND se.launch_speed = k.launch_speed AND se.launch_angle = k.launch_angle"""
+
+_GROUPS_CTE = """
+    corrupted_groups AS (
+        SELECT se.batter_name, se.wpa, se.launch_speed, se.launch_angle,
+               COUNT(*) AS event_count,
+               COUNT(DISTINCT se.raw_description) AS outcomes,
+               MIN(se.id) AS kept_id
+        FROM statcast_events se{changed_keys_join}
+        WHERE se.wpa IS NOT NULL AND se.wpa <> 0
+          AND se.launch_speed IS NOT NULL
+          AND se.launch_angle IS NOT NULL
+          AND EXISTS (SELECT 1 FROM games g WHERE g.mlb_game_pk = se.mlb_game_pk AND g.attended)
+        GROUP BY se.batter_name, se.wpa, se.launch_speed, se.launch_angle
+        HAVING COUNT(DISTINCT se.raw_description) > 1 AND COUNT(*) > 2
+    ),
+    extra_events AS (
+        SELECT se.id, se.mlb_game_pk, cg.kept_id
+        FROM statcast_events se
+        JOIN corrupted_groups cg
+          ON se.batter_name IS NOT DISTINCT FROM cg.batter_name
+         AND se.wpa = cg.wpa
+         AND se.launch_speed = cg.launch_speed
+         AND se.launch_angle = cg.launch_angle
+        WHERE se.id <> cg.kept_id
+          AND EXISTS (SELECT 1 FROM games g WHERE g.mlb_game_pk = se.mlb_game_pk AND g.attended)
+    )"""
+
+_DELETE_CTE = """,
+    removed AS (
+        DELETE FROM statcast_events se
+        USING extra_events x
+        WHERE se.id = x.id
+        RETURNING se.id, x.mlb_game_pk, x.kept_id
+    )"""
+
+_REPORT = """
+    SELECT cg.batter_name, cg.wpa, cg.launch_speed, cg.launch_angle, cg.event_count,
+           cg.outcomes, COUNT(r.id) AS deleted,
+           COALESCE(array_agg(DISTINCT r.mlb_game_pk) FILTER (WHERE r.id IS NOT NULL),
+                    ARRAY[]::integer[]) AS game_pks
+    FROM corrupted_groups cg
+    LEFT JOIN {source} r ON r.kept_id = cg.kept_id
+    GROUP BY cg.batter_name, cg.wpa, cg.launch_speed, cg.launch_angle, cg.event_count,
+             cg.outcomes, cg.kept_id
+    ORDER BY cg.event_count DESC, cg.batter_name
+"""
+
+
+def cleanup_sql(incremental: bool, dry_run: bool):
+    """The find-and-delete statement; without the ``DELETE`` for a dry run."""
+    sql = "WITH"
+    if incremental:
+        sql += _CHANGED_KEYS_CTE
+    sql += _GROUPS_CTE.format(changed_keys_join=_CHANGED_KEYS_JOIN if incremental else "")
+    if dry_run:
+        return text(sql + _REPORT.format(source="extra_events"))
+    return text(sql + _DELETE_CTE + _REPORT.format(source="removed"))
+
+
+@dataclass
+class CleanupReport:
+    """The corrupted groups found and the events deleted (or, dry, to delete)."""
+
+    groups: list = field(default_factory=list)
+    # Games checked; None for every game
+    game_pks: set[int] | None = None
+    dry_run: bool = False
+
+    @property
+    def deleted(self) -> int:
+        return sum(group.deleted for group in self.groups)
+
+    @property
+    def affected_games(self) -> set[int]:
+        return {pk for group in self.groups for pk in group.game_pks}
+
+    def summary(self) -> str:
+        scope = "all games" if self.game_pks is None else f"{len(self.game_pks)} changed game(s)"
+        verb = "would delete" if self.dry_run else "deleted"
+        return (f"cleanup ({scope}): {len(self.groups)} corrupted group(s), "
+                f"{verb} {self.deleted} event(s) in {len(self.affected_games)} game(s)")
+
+
+def cleanup(conn, game_pks=None, dry_run: bool = False) -> CleanupReport:
+    """Delete the extra events of every corrupted group (touching ``game_pks``, if given).
+
+    Runs in the caller's transaction; games that lost events are recorded in the
+    change log.
+    """
+    report = CleanupReport(game_pks=None if game_pks is None else set(game_pks), dry_run=dry_run)
+    if game_pks is not None and not game_pks:
+        return report
+    params = {} if game_pks is None else {"game_pks": sorted(game_pks)}
+    report.groups = conn.execute(cleanup_sql(game_pks is not None, dry_run), params).all()
+    if not dry_run:
+        for game_pk in sorted(report.affected_games):
+            record_game_change(conn, game_pk, "cleanup")
+    return report
+
+
+def run_cleanup(incremental: bool = True, dry_run: bool = False, engine=None) -> CleanupReport:
+    """Clean up the games changed since the last run (or every game), and checkpoint.
+
+    Without a checkpoint an incremental run checks every game.  A dry run leaves
+    the checkpoint where it was.
+    """
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        changed, upto = pending_changes(conn, CONSUMER)
+        report = cleanup(conn, changed if incremental else None, dry_run=dry_run)
+        if not dry_run:
+            advance_checkpoint(conn, CONSUMER, upto)
+    return report
+
+
+def post_ingest(engine=None) -> CleanupReport:
+    """The hook ingest runs when it is done: an incremental cleanup, reported."""
+    report = run_cleanup(incremental=True, engine=engine)
+    print(f"🧹 {report.summary()}")
+    return report
@@ -0,0 +1,128 @@
+"""Columnar, dictionary-encoded JSON for large exported artifacts.
+
+An array of objects such as barrel_map.json repeats every key and most strings
+(team codes, dates, matchups, player names) on every row.  ``encode_columnar``
+turns it into one table::
+
+    {
+        "format": "columnar-dict",
+        "version": 1,
+        "length": 3,
+        "strings": ["BOS", "TOR", ...],           # shared dictionary
+        "columns": {"home_team": [1, 1, 0], "launch_speed": [85, 101.2, 97], ...},
+        "dict": ["home_team", ...],               # columns holding string codes
+        "nested": ["heartbeat_points"],           # columns holding sub-tables
+        "absent": {"prev_y": [0]}                 # rows that lacked the key
+    }
+
+String columns with repeated values hold integer codes into ``strings`` (``null``
+stays ``null``).  A column whose values are themselves arrays of objects (the
+heartbeat points of each game) holds nested tables sharing the same dictionary.
+``decode_columnar`` restores the original rows exactly; web/src/lib/columnar.ts is
+the matching reader for the frontend.
+
+Used by scripts/export_pipeline.py (``--format columnar``).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+FORMAT = "columnar-dict"
+VERSION = 1
+
+
+def is_columnar(data: Any) -> bool:
+    return isinstance(data, dict) and data.get("format") == FORMAT
+
+
+def _is_table_list(values: list) -> bool:
+    """True for a column of arrays of objects, e.g. per-game heartbeat points."""
+    present = [v for v in values if v is not None]
+    return bool(present) and all(
+        isinstance(v, list) and all(isinstance(item, dict) for item in v) for v in present
+    )
+
+
+def _is_repeated_strings(values: list) -> bool:
+    strings = [v for v in values if v is not None]
+    return (
+        bool(strings)
+        and all(isinstance(v, str) for v in strings)
+        and len(set(strings)) < len(strings)
+    )
+
+
+def _encode_table(rows: Sequence[Mapping], codes: dict[str, int]) -> dict:
+    names: list[str] = []
+    seen: set[str] = set()
+    for row in rows:
+        for name in row:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+
+    columns: dict[str, list] = {}
+    dict_columns: list[str] = []
+    nested: list[str] = []
+    absent: dict[str, list[int]] = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        missing = [i for i, row in enumerate(rows) if name not in row]
+        if missing:
+            absent[name] = missing
+        if _is_table_list(values):
+            values = [None if v is None else _encode_table(v, codes) for v in values]
+            nested.append(name)
+        elif _is_repeated_strings(values):
+            values = [None if v is None else codes.setdefault(v, len(codes)) for v in values]
+            dict_columns.append(name)
+        columns[name] = values
+
+    table: dict[str, Any] = {"length": len(rows), "columns": columns}
+    if dict_columns:
+        table["dict"] = dict_columns
+    if nested:
+        table["nested"] = nested
+    if absent:
+        table["absent"] = absent
+    return table
+
+
+def encode_columnar(rows: Sequence[Mapping]) -> dict:
+    """Encode an array of JSON objects as a dictionary-encoded columnar table."""
+    codes: dict[str, int] = {}
+    table = _encode_table(rows, codes)
+    # dicts keep insertion order, which is each code's value
+    return {"format": FORMAT, "version": VERSION, "length": table.pop("length"),
+            "strings": list(codes), **table}
+
+
+def _decode_table(table: Mapping, strings: list[str]) -> list[dict]:
+    length = table["length"]
+    columns = table["columns"]
+    dict_columns = set(table.get("dict", ()))
+    nested = set(table.get("nested", ()))
+    absent = {name: set(rows) for name, rows in table.get("absent", {}).items()}
+
+    rows: list[dict] = [{} for _ in range(length)]
+    for name, values in columns.items():
+        if name in dict_columns:
+            values = [None if v is None else strings[v] for v in values]
+        elif name in nested:
+            values = [None if v is None else _decode_table(v, strings) for v in values]
+        skip = absent.get(name, ())
+        for i, value in enumerate(values):
+            if i not in skip:
+                rows[i][name] = value
+    return rows
+
+
+def decode_columnar(data: Any) -> Any:
+    """Return the rows of a columnar table; any other JSON value is returned as is."""
+    if not is_columnar(data):
+        return data
+    if data.get("version") != VERSION:
+        raise ValueError(f"Unsupported {FORMAT} version: {data.get('version')!r}")
+    return _decode_table(data, data["strings"])
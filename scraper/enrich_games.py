@@ -9,7 +9,9 @@ from datetime import date
 import httpx
 
 from api.models import Game
-from config import SessionLocal
+from config import get_session
+from scraper import http_replay, profiling
+from scraper.changes import record_game_change
 from scraper.team_ids import TEAM_ID
 
 logging.basicConfig(level=logging.INFO)
@@ -47,7 +49,7 @@ def fetch_game_meta(game_date: date, home_id: int, away_id: int) -> dict | None:
     }
 
     try:
-        resp = httpx.get(SCHEDULE_URL, params=params, timeout=10)
+        resp = http_replay.get(SCHEDULE_URL, params=params, timeout=10)
         resp.raise_for_status()
         data = resp.json()
 
@@ -58,7 +60,7 @@ def fetch_game_meta(game_date: date, home_id: int, away_id: int) -> dict | None:
                 "sportId": 1,
                 "date": game_date.isoformat(),
             }
-            resp = httpx.get(SCHEDULE_URL, params=broad_params, timeout=10)
+            resp = http_replay.get(SCHEDULE_URL, params=broad_params, timeout=10)
             resp.raise_for_status()
             data = resp.json()
             items = data.get("dates", [{}])[0].get("games", []) if data.get("dates") else []
@@ -81,9 +83,10 @@ def fetch_game_meta(game_date: date, home_id: int, away_id: int) -> dict | None:
         return None
 
 
+@profiling.entry_point("enrich_games")
 def enrich_games() -> None:
     """Enrich games with MLB Stats API data."""
-    db = SessionLocal()
+    db = get_session()
     try:
         games: list[Game] = (
             db.query(Game)
@@ -121,6 +124,7 @@ def enrich_games() -> None:
             g.venue_id = meta["venue_id"]
             g.venue_name = meta["venue_name"]
             g.weather = meta["weather"]
+            record_game_change(db, g.mlb_game_pk, "enrich")
             
             logger.info(
                 f"✅ {g.date} {g.away_team}@{g.home_team} → pk {g.mlb_game_pk} "
@@ -0,0 +1,478 @@
+"""Shared heartbeat (win-probability timeline) and drama-score construction.
+
+Used by api/main.py (per-game heartbeat endpoints) and scripts/export_heartbeat_data.py.
+
+Scores and curves for many games are computed at once from flat NumPy arrays
+(``score_games``, ``curve_arrays``); ``calculate_drama_score`` is the per-game
+reference they reproduce exactly.
+
+``overview_heartbeat`` downsamples a curve for overview pages (Largest-Triangle-
+Three-Buckets plus every big WPA swing); the full curve stays in the per-game detail.
+
+NumPy is imported inside the functions that use it, so importing this module (as
+the API does at startup) stays cheap.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+from typing import TYPE_CHECKING
+
+from sqlalchemy import bindparam, text
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Events that carry a WPA value and a real play outcome, in true chronological order.
+# ``:game_pks`` is optional; pass ``None`` to load every attended game.
+HEARTBEAT_EVENTS_SQL = text(
+    """
+    SELECT
+        se.mlb_game_pk,
+        se.wpa,
+        se.home_win_exp,
+        se.away_win_exp,
+        se.batter_name,
+        se.pitcher_name,
+        se.event_type,
+        se.raw_description,
+        se.event_datetime,
+        se.inning,
+        se.inning_topbot,
+        se.outs_when_up,
+        se.home_score AS event_home_score,
+        se.away_score AS event_away_score,
+        se.post_home_score,
+        se.post_away_score,
+        se.balls,
+        se.strikes
+    FROM statcast_events se
+    JOIN games g ON g.mlb_game_pk = se.mlb_game_pk
+    WHERE g.attended = true
+        AND (CAST(:game_pks AS integer[]) IS NULL OR se.mlb_game_pk = ANY(:game_pks))
+        AND se.wpa IS NOT NULL
+        AND se.event_type NOT IN ('nan', '')
+        AND se.event_type IS NOT NULL
+    ORDER BY g.date, se.mlb_game_pk, se.inning,
+            CASE WHEN se.inning_topbot = 'Top' THEN 0 ELSE 1 END,
+            se.outs_when_up,
+            se.event_datetime,
+            se.id
+    """
+).bindparams(bindparam("game_pks", value=None))
+
+ATTENDED_GAMES_SQL = text(
+    """
+    SELECT mlb_game_pk, date, home_team, away_team, home_score, away_score
+    FROM games
+    WHERE attended = true
+        AND mlb_game_pk IS NOT NULL
+        AND (CAST(:game_pks AS integer[]) IS NULL OR mlb_game_pk = ANY(:game_pks))
+    ORDER BY date
+    """
+).bindparams(bindparam("game_pks", value=None))
+
+# Just enough of each event to score drama, for the summary index; in the same
+# order as HEARTBEAT_EVENTS_SQL, so the float sums match calculate_drama_score's.
+DRAMA_INPUTS_SQL = text(
+    """
+    SELECT se.mlb_game_pk, se.wpa
+    FROM statcast_events se
+    JOIN games g ON g.mlb_game_pk = se.mlb_game_pk
+    WHERE g.attended = true
+        AND se.wpa IS NOT NULL
+        AND se.home_win_exp IS NOT NULL
+        AND se.event_type NOT IN ('nan', '')
+        AND se.event_type IS NOT NULL
+    ORDER BY se.mlb_game_pk, se.inning,
+            CASE WHEN se.inning_topbot = 'Top' THEN 0 ELSE 1 END,
+            se.outs_when_up,
+            se.event_datetime,
+            se.id
+    """
+)
+
+
+def calculate_drama_score(wpa_events):
+    """Calculate a drama score for a game based on WPA volatility"""
+    if not wpa_events:
+        return 0
+
+    # Drama score components:
+    # 1. Total absolute WPA swing
+    total_swing = sum(abs(event['wpa']) for event in wpa_events)
+
+    # 2. Number of significant moments (|WPA| > 0.1)
+    significant_moments = len([e for e in wpa_events if abs(e['wpa']) > 0.1])
+
+    # 3. Volatility (standard deviation of WPA)
+    wpa_values = [event['wpa'] for event in wpa_events]
+    if len(wpa_values) > 1:
+        mean_wpa = sum(wpa_values) / len(wpa_values)
+        variance = sum((x - mean_wpa) ** 2 for x in wpa_values) / len(wpa_values)
+        volatility = variance ** 0.5
+    else:
+        volatility = 0
+
+    # Combine into drama score (0-100 scale)
+    drama_score = min(100, (total_swing * 10) + (significant_moments * 5) + (volatility * 20))
+    return round(drama_score, 1)
+
+
+def categorize_drama(drama_score):
+    """Categorize game drama level"""
+    if drama_score >= 70:
+        return {"level": "cardiac_arrest", "emoji": "🫀💥", "color": "#ef4444", "label": "Cardiac Arrest"}
+    elif drama_score >= 40:
+        return {"level": "elevated", "emoji": "📈💗", "color": "#f97316", "label": "Elevated Heartbeat"}
+    elif drama_score >= 20:
+        return {"level": "steady", "emoji": "💚📊", "color": "#22c55e", "label": "Steady Heartbeat"}
+    else:
+        return {"level": "flatline", "emoji": "😴📉", "color": "#6b7280", "label": "Flatline"}
+
+
+# One category dict per level, indexed by ``np.searchsorted(_DRAMA_THRESHOLDS, score)``
+_DRAMA_THRESHOLDS = (20, 40, 70)
+_DRAMA_CATEGORIES = tuple(categorize_drama(score) for score in (0, 20, 40, 70))
+
+
+def categorize_games(drama_scores: Sequence[float]) -> list[dict]:
+    """Vectorized ``categorize_drama`` for a sequence of scores."""
+    import numpy as np
+
+    levels = np.searchsorted(_DRAMA_THRESHOLDS, np.asarray(drama_scores, dtype=float), side="right")
+    return [dict(_DRAMA_CATEGORIES[level]) for level in levels.tolist()]
+
+
+def score_games(game_index: np.ndarray, wpa: np.ndarray, n_games: int) -> list[float]:
+    """Vectorized ``calculate_drama_score`` for ``n_games`` games at once.
+
+    ``game_index[i]`` is the game (``0..n_games-1``) of WPA event ``i``.  Per-game sums
+    accumulate in array order, so with each game's events in the order they would be
+    passed to ``calculate_drama_score`` the scores match it exactly.  A game without
+    events scores like a single 0.0 event, as flatline games do.
+    """
+    import numpy as np
+
+    game_index = np.asarray(game_index, dtype=np.intp)
+    wpa = np.asarray(wpa, dtype=float)
+    abs_wpa = np.abs(wpa)
+
+    counts = np.bincount(game_index, minlength=n_games)
+    total_swing = np.bincount(game_index, weights=abs_wpa, minlength=n_games)
+    significant = np.bincount(game_index, weights=abs_wpa > 0.1, minlength=n_games)
+
+    has_events = counts > 0
+    mean = np.divide(
+        np.bincount(game_index, weights=wpa, minlength=n_games), counts,
+        out=np.zeros(n_games), where=has_events,
+    )
+    squared = np.bincount(game_index, weights=(wpa - mean[game_index]) ** 2, minlength=n_games)
+    variance = np.divide(squared, counts, out=np.zeros(n_games), where=has_events)
+    # np.power rather than np.sqrt: the same libm pow() as Python's ``** 0.5``
+    volatility = np.where(counts > 1, np.power(variance, 0.5), 0.0)
+
+    raw = (total_swing * 10) + (significant * 5) + (volatility * 20)
+    # Python's round() (not np.round) and min(100, ...) keep the reference's output exactly
+    return [100 if score >= 100 else round(score, 1) for score in raw.tolist()]
+
+
+def curve_arrays(
+    game_index: np.ndarray, wpa: np.ndarray, home_win_exp: np.ndarray, n_games: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the (x, pre, post) curve coordinates of every event.
+
+    Probabilities are clamped to [0, 1]; ``x`` is the event's 1-based position in its
+    game divided by the game's event count.  Events must be grouped by game.
+    """
+    import numpy as np
+
+    game_index = np.asarray(game_index, dtype=np.intp)
+    counts = np.bincount(game_index, minlength=n_games)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    position = np.arange(1, len(game_index) + 1) - starts[game_index]
+    x = position / counts[game_index]
+    # "+ 0.0" turns a clamped -0.0 into 0.0, as max(0.0, ...) does
+    pre = np.clip(np.asarray(home_win_exp, dtype=float), 0.0, 1.0) + 0.0
+    post = np.clip(pre + np.asarray(wpa, dtype=float), 0.0, 1.0) + 0.0
+    return x, pre, post
+
+
+# Overview curves keep about this many points, plus every key moment
+OVERVIEW_POINTS = 40
+# A swing this big is always kept (the drama score's "significant" swing)
+KEY_MOMENT_WPA = 0.1
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], n_out: int) -> np.ndarray:
+    """Indices of the Largest-Triangle-Three-Buckets downsample of a curve to ``n_out`` points.
+
+    ``x`` must be ascending.  The first and last points are always kept; each bucket
+    in between contributes the point forming the largest triangle with the previous
+    pick and the next bucket's centroid.
+    """
+    import numpy as np
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets over the interior points, as integer edges so they tile exactly
+    edges = 1 + (np.arange(n_out - 1) * (n - 2)) // (n_out - 2)
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < n_out - 1:
+            cx, cy = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def overview_points(points: Sequence[Mapping], n_out: int = OVERVIEW_POINTS) -> list:
+    """Downsample heartbeat points for an overview, always keeping key WPA moments."""
+    if len(points) <= n_out:
+        return list(points)
+    import numpy as np
+
+    x = [p['x'] for p in points]
+    y = [p['y'] for p in points]
+    wpa = np.abs(np.fromiter((p['wpa'] for p in points), dtype=float, count=len(points)))
+    keep = np.union1d(lttb_indices(x, y, n_out), np.flatnonzero(wpa >= KEY_MOMENT_WPA))
+    return [points[i] for i in keep.tolist()]
+
+
+def overview_heartbeat(game: Mapping, n_out: int = OVERVIEW_POINTS) -> Mapping:
+    """``game`` with its curve downsampled by ``overview_points``.
+
+    ``detail_points`` records the full curve's length; a game that already has it
+    is returned unchanged, so downsampling an overview again is a no-op.
+    """
+    if 'detail_points' in game:
+        return game
+    points = game['heartbeat_points']
+    return {**game, 'heartbeat_points': overview_points(points, n_out), 'detail_points': len(points)}
+
+
+def _situation(row: Mapping) -> str:
+    """Return the tooltip situation line, e.g. ``"Bot 7, 2 outs, 3-2 count"``."""
+    context_parts = []
+    if row["inning"] and row["inning_topbot"]:
+        context_parts.append(f"{row['inning_topbot']} {row['inning']}")
+    if row["outs_when_up"] is not None:
+        outs_text = "out" if row["outs_when_up"] == 1 else "outs"
+        context_parts.append(f"{row['outs_when_up']} {outs_text}")
+    if row["balls"] is not None and row["strikes"] is not None:
+        context_parts.append(f"{row['balls']}-{row['strikes']} count")
+    return ", ".join(context_parts) if context_parts else "Unknown situation"
+
+
+def _leader(home: int, away: int, home_team: str, away_team: str) -> str:
+    if home > away:
+        return home_team
+    if away > home:
+        return away_team
+    return "TIE"
+
+
+def _score_context(row: Mapping, home_team: str, away_team: str) -> str:
+    """Return the tooltip score line - higher score first with the leading team."""
+    pre_home, pre_away = row["event_home_score"], row["event_away_score"]
+    if pre_home is None or pre_away is None:
+        return ""
+
+    pre = f"{max(pre_home, pre_away)}-{min(pre_home, pre_away)} "
+    pre += _leader(pre_home, pre_away, home_team, away_team)
+
+    post_home, post_away = row["post_home_score"], row["post_away_score"]
+    if post_home is None or post_away is None:
+        return f"Score: {pre}"
+
+    # Only show score change if it actually changed
+    if pre_home == post_home and pre_away == post_away:
+        return f"Score: {pre}"
+    post = f"{max(post_home, post_away)}-{min(post_home, post_away)} "
+    post += _leader(post_home, post_away, home_team, away_team)
+    return f"Score: {pre} → {post}"
+
+
+def event_from_row(row: Mapping, home_team: str, away_team: str) -> dict:
+    """Convert a ``HEARTBEAT_EVENTS_SQL`` row into a tooltip-ready WPA event."""
+    return {
+        'wpa': float(row["wpa"]),
+        'home_win_exp': float(row["home_win_exp"]) if row["home_win_exp"] is not None else None,
+        'away_win_exp': float(row["away_win_exp"]) if row["away_win_exp"] is not None else None,
+        'batter_name': row["batter_name"],
+        'pitcher_name': row["pitcher_name"],
+        'event_type': row["event_type"],
+        'description': row["raw_description"],
+        'timestamp': str(row["event_datetime"]) if row["event_datetime"] else None,
+        'situation': _situation(row),
+        'score_context': _score_context(row, home_team, away_team),
+        'inning': row["inning"],
+        'inning_topbot': row["inning_topbot"],
+        'outs': row["outs_when_up"],
+    }
+
+
+def build_game_heartbeat(game: Mapping, wpa_events: list[dict]) -> dict:
+    """Build the win-probability curve, drama score and result for one game.
+
+    ``game`` is an ``ATTENDED_GAMES_SQL`` row; ``wpa_events`` come from ``event_from_row``
+    in chronological order (empty for games without WPA data).
+    """
+    return build_game_heartbeats([game], [wpa_events])[0]
+
+
+def build_game_heartbeats(games: Sequence[Mapping], events_by_game: Sequence[list[dict]]) -> list[dict]:
+    """Build heartbeats for many games, scoring and curving all events at once."""
+    import numpy as np
+
+    valid_by_game = [
+        [e for e in events if e.get('home_win_exp') is not None] for events in events_by_game
+    ]
+    flat = [e for valid in valid_by_game for e in valid]
+    game_index = np.repeat(np.arange(len(games)), [len(valid) for valid in valid_by_game])
+    wpa = np.fromiter((float(e.get('wpa') or 0.0) for e in flat), dtype=float, count=len(flat))
+    home_win_exp = np.fromiter((e['home_win_exp'] for e in flat), dtype=float, count=len(flat))
+
+    drama_scores = score_games(game_index, wpa, len(games))
+    categories = categorize_games(drama_scores)
+    x, pre, post = (a.tolist() for a in curve_arrays(game_index, wpa, home_win_exp, len(games)))
+    deltas = wpa.tolist()
+
+    heartbeats = []
+    start = 0
+    for game, valid, drama_score, category in zip(games, valid_by_game, drama_scores, categories):
+        end = start + len(valid)
+        if valid:
+            heartbeat_points = [{
+                'x': 0,
+                'y': pre[start],
+                'wpa': 0.0,
+                'batter': 'Game Start',
+                'pitcher': '',
+                'event': 'game_start',
+                'description': 'First Pitch',
+                'situation': 'Top 1, 0 outs',
+                'score_context': 'Score: 0-0'
+            }]
+            heartbeat_points.extend(
+                {
+                    'x': x[i],
+                    'y': post[i],
+                    'prev_y': pre[i],
+                    'wpa': deltas[i],
+                    'batter': event['batter_name'],
+                    'pitcher': event['pitcher_name'],
+                    'event': event['event_type'],
+                    'description': event['description'],
+                    'situation': event['situation'],
+                    'score_context': event['score_context']
+                }
+                for i, event in zip(range(start, end), valid)
+            )
+        else:
+            # Flatline game - show at 50% (no data available)
+            heartbeat_points = [
+                {'x': 0, 'y': 0.5, 'wpa': 0.0, 'batter': 'No data', 'event': 'game_start', 'description': 'Game start'},
+                {'x': 1, 'y': 0.5, 'wpa': 0.0, 'batter': 'No data', 'event': 'game_end', 'description': 'Game end - no WPA data available'}
+            ]
+        start = end
+
+        summary = game_summary(game, drama_score, len(valid), category)
+        summary['heartbeat_points'] = heartbeat_points
+        heartbeats.append(summary)
+    return heartbeats
+
+
+def game_summary(
+    game: Mapping, drama_score: float, total_events: int, drama_category: dict | None = None
+) -> dict:
+    """Return the per-game header fields shared by the full heartbeat and the index."""
+    home_score = game["home_score"] or 0
+    away_score = game["away_score"] or 0
+
+    # Game result from the Red Sox perspective: away when BOS is the away team
+    if game["away_team"] == 'BOS':
+        won = away_score > home_score
+    else:
+        won = home_score > away_score
+
+    game_date = game["date"]
+    return {
+        'game_pk': game["mlb_game_pk"],
+        'date': game_date.isoformat() if hasattr(game_date, 'isoformat') else str(game_date),
+        'matchup': f"{game['away_team']} @ {game['home_team']}",
+        'home_team': game["home_team"],  # Include home team for win probability display
+        # Format score as higher-lower always
+        'score': f"{max(home_score, away_score)}-{min(home_score, away_score)}",
+        'result': 'W' if won else 'L',
+        'drama_score': drama_score,
+        'drama_category': drama_category or categorize_drama(drama_score),
+        'total_events': total_events,
+    }
+
+
+def build_heartbeats(games: Iterable[Mapping], event_rows: Iterable[Mapping]) -> list[dict]:
+    """Group event rows by game and build every heartbeat, most dramatic first."""
+    games = list(games)
+    position = {g["mlb_game_pk"]: i for i, g in enumerate(games)}
+    events_by_game: list[list[dict]] = [[] for _ in games]
+    for row in event_rows:
+        i = position.get(row["mlb_game_pk"])
+        if i is not None:
+            game = games[i]
+            events_by_game[i].append(event_from_row(row, game["home_team"], game["away_team"]))
+
+    heartbeats = build_game_heartbeats(games, events_by_game)
+    # Sort by drama score (most dramatic first)
+    heartbeats.sort(key=lambda x: x['drama_score'], reverse=True)
+    return heartbeats
+
+
+def load_heartbeats(conn, game_pks: list[int] | None = None) -> list[dict]:
+    """Load and build heartbeats for attended games (optionally only ``game_pks``)."""
+    games = conn.execute(ATTENDED_GAMES_SQL, {"game_pks": game_pks}).mappings().all()
+    events = conn.execute(HEARTBEAT_EVENTS_SQL, {"game_pks": game_pks}).mappings()
+    return build_heartbeats(games, events)
+
+
+def load_heartbeat_index(conn) -> list[dict]:
+    """Return per-game summaries (no curve points), most dramatic first.
+
+    Only ``(game_pk, wpa)`` is fetched per event, which is all the drama score needs.
+    """
+    import numpy as np
+
+    games = conn.execute(ATTENDED_GAMES_SQL, {"game_pks": None}).mappings().all()
+    position = {g["mlb_game_pk"]: i for i, g in enumerate(games)}
+    game_index, wpa = [], []
+    for pk, value in conn.execute(DRAMA_INPUTS_SQL):
+        i = position.get(pk)
+        if i is not None:
+            game_index.append(i)
+            wpa.append(float(value))
+
+    # Stable sort groups each game's events while keeping their fetched order
+    order = np.argsort(np.asarray(game_index, dtype=np.intp), kind="stable")
+    game_index = np.asarray(game_index, dtype=np.intp)[order]
+    wpa = np.asarray(wpa, dtype=float)[order]
+
+    drama_scores = score_games(game_index, wpa, len(games))
+    categories = categorize_games(drama_scores)
+    total_events = np.bincount(game_index, minlength=len(games)).tolist()
+
+    index = [
+        game_summary(g, score, events, category)
+        for g, score, events, category in zip(games, drama_scores, total_events, categories)
+    ]
+    index.sort(key=lambda x: x['drama_score'], reverse=True)
+    return index
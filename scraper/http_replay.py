@@ -0,0 +1,272 @@
+"""Record/replay of upstream HTTP (Baseball Savant, MLB StatsAPI) for offline ingest.
+
+Every ingest request goes through ``get`` (a shared ``httpx.Client``) whose
+``ReplayTransport`` runs in one of three modes, chosen with ``GAMELOG_HTTP_MODE``:
+
+- ``live`` (default): straight to the network.
+- ``record``: to the network, saving every response under ``GAMELOG_HTTP_FIXTURES``.
+- ``replay``: answered from the saved responses only, after ``GAMELOG_HTTP_LATENCY_MS``
+  of injected latency; a request that was never recorded raises ``FixtureMissing``.
+
+Fixtures are one JSON file per request, ``<host>/<path>-<hash>.json``, keyed by the
+method and the URL with its query parameters sorted.
+
+pybaseball fetches Statcast CSVs with ``requests`` rather than httpx, so
+``install_pybaseball`` points it at ``StandInServer``: a local HTTP server that
+answers ``/<upstream host>/<path>`` through the same transport.  Run one on its own
+with ``python -m scraper.http_replay --port 8765``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Self
+from urllib.parse import urlencode
+
+import httpx
+
+from config import HTTP_FIXTURES_DIR, HTTP_LATENCY_MS, HTTP_MODE
+
+MODES = ("live", "record", "replay")
+SAVANT_ROOT = "https://baseballsavant.mlb.com"
+# pybaseball's statcast_single_game request, relative to the Savant root
+SAVANT_SINGLE_GAME_CSV = "/statcast_search/csv?all=true&type=details&game_pk={game_pk}"
+# Response headers worth replaying; encodings/lengths describe the original wire bytes
+KEPT_HEADERS = ("content-type",)
+
+
+class FixtureMissing(httpx.TransportError):
+    """A replayed request has no recorded response."""
+
+
+def canonical_url(url: httpx.URL | str) -> str:
+    """The URL with its query parameters sorted, so equivalent requests share a fixture."""
+    url = httpx.URL(url)
+    return str(url.copy_with(query=urlencode(sorted(url.params.multi_items())).encode()))
+
+
+def savant_game_csv_url(game_pk: int) -> str:
+    """The per-pitch Statcast CSV of one game, as pybaseball requests it."""
+    return SAVANT_ROOT + SAVANT_SINGLE_GAME_CSV.format(game_pk=game_pk)
+
+
+class FixtureStore:
+    """Recorded responses on disk, one JSON file per (method, URL)."""
+
+    def __init__(self, root: Path | str = HTTP_FIXTURES_DIR):
+        self.root = Path(root)
+
+    def path(self, method: str, url: httpx.URL | str) -> Path:
+        canonical = canonical_url(url)
+        digest = hashlib.sha256(f"{method.upper()} {canonical}".encode()).hexdigest()[:12]
+        parsed = httpx.URL(canonical)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", parsed.path).strip("_")[:80] or "root"
+        return self.root / parsed.host / f"{slug}-{digest}.json"
+
+    def load(self, request: httpx.Request) -> httpx.Response | None:
+        path = self.path(request.method, request.url)
+        if not path.exists():
+            return None
+        with open(path) as f:
+            fixture = json.load(f)
+        if fixture["encoding"] == "base64":
+            content = base64.b64decode(fixture["body"])
+        else:
+            content = fixture["body"].encode("utf-8")
+        return httpx.Response(
+            fixture["status"], headers=fixture["headers"], content=content, request=request
+        )
+
+    def save(self, request: httpx.Request, status: int, headers: dict, content: bytes) -> Path:
+        try:
+            body, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode("ascii"), "base64"
+        fixture = {
+            "method": request.method,
+            "url": canonical_url(request.url),
+            "status": status,
+            "headers": headers,
+            "encoding": encoding,
+            "body": body,
+        }
+        path = self.path(request.method, request.url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(fixture, indent=2))
+        os.replace(tmp, path)
+        return path
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """An httpx transport that goes live, records, or replays (see the module docstring)."""
+
+    def __init__(
+        self,
+        mode: str = HTTP_MODE,
+        store: FixtureStore | None = None,
+        latency_ms: float = HTTP_LATENCY_MS,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown HTTP mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.store = store or FixtureStore()
+        self.latency = latency_ms / 1000
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.mode == "live":
+            return self.transport.handle_request(request)
+
+        if self.mode == "replay":
+            response = self.store.load(request)
+            if response is None:
+                raise FixtureMissing(
+                    f"No recorded response for {request.method} {request.url} "
+                    f"in {self.store.root}",
+                    request=request,
+                )
+            if self.latency:
+                time.sleep(self.latency)
+            return response
+
+        response = self.transport.handle_request(request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        headers = {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS}
+        self.store.save(request, response.status_code, headers, content)
+        return httpx.Response(
+            response.status_code, headers=headers, content=content, request=request
+        )
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+def client() -> httpx.Client:
+    """The shared ingest client, configured from the GAMELOG_HTTP_* settings."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(transport=ReplayTransport())
+        return _client
+
+
+def get(url: str, **kwargs) -> httpx.Response:
+    """``httpx.get`` through the shared record/replay client."""
+    return client().get(url, **kwargs)
+
+
+class StandInServer:
+    """A local HTTP server answering ``/<host>/<path>`` with ``https://<host>/<path>``.
+
+    Responses come through a ``ReplayTransport``, so clients that can't take an
+    httpx transport (pybaseball's ``requests`` calls) still record and replay.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport | None = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        upstream = httpx.Client(transport=transport or ReplayTransport())
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = f"https://{self.path.lstrip('/')}"
+                try:
+                    response = upstream.get(url, timeout=None)
+                    status, content = response.status_code, response.content
+                    content_type = response.headers.get("content-type", "text/plain")
+                except httpx.HTTPError as exc:
+                    status, content, content_type = 502, str(exc).encode(), "text/plain"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.upstream = upstream
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, origin: str) -> str:
+        """Stand-in root for an upstream origin, e.g. ``https://baseballsavant.mlb.com``."""
+        return f"{self.address}/{httpx.URL(origin).host}"
+
+    def start(self) -> Self:
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.upstream.close()
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+_stand_in: StandInServer | None = None
+
+
+def install_pybaseball(mode: str = HTTP_MODE) -> None:
+    """Route pybaseball's Savant requests through a stand-in server (record/replay only)."""
+    global _stand_in
+    if mode == "live":
+        return
+    with _client_lock:
+        if _stand_in is None:
+            from pybaseball.datasources import statcast
+
+            _stand_in = StandInServer(ReplayTransport(mode)).start()
+            statcast.ROOT_URL = _stand_in.url_for(SAVANT_ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve recorded upstream responses at http://HOST:PORT/<host>/<path>."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    args = parser.parse_args()
+    transport = ReplayTransport(args.mode)
+    server = StandInServer(transport, args.host, args.port)
+    print(f"Serving {args.mode}ed responses from {transport.store.root} "
+          f"at {server.address}/<host>/<path>")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Per-game, per-stage timing and counters for the Statcast ingest.
+
+``IngestRun`` collects one ``GameRecord`` per game.  While a game is being
+processed (``with run.game(g) as record``) the module-level ``stage`` and ``count``
+helpers attribute work to it, so deep call sites - the Savant/StatsAPI fetches,
+the player-name lookup - need no plumbing; outside a game they do nothing.
+
+Stage times are exclusive: a ``fetch:*`` stage nested inside ``transform`` is
+charged to the fetch, not to the transform, for both wall and CPU time.  CPU
+time is the calling thread's, so games ingested side by side (see gamelog/) are
+not charged for each other's work; ``counted_cache`` likewise counts the hits
+and misses of each call to the game that made it.
+
+Every finished game is appended to a JSON Lines log (``GAMELOG_INGEST_LOG``) as an
+``{"event": "game", ...}`` record, followed by one ``{"event": "run", ...}``
+summary; ``IngestRun.summary_table`` renders the end-of-run table.
+
+Used by scraper/statcast_fetcher.py and scraper/players.py.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+_current: ContextVar[GameRecord | None] = ContextVar("ingest_game", default=None)
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+    def add(self, other: StageStats) -> None:
+        self.calls += other.calls
+        self.errors += other.errors
+        self.seconds += other.seconds
+        self.cpu_seconds += other.cpu_seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+        }
+
+
+@dataclass
+class GameRecord:
+    game_pk: int
+    date: str | None = None
+    status: str = "started"
+    error: str | None = None
+    seconds: float = 0.0
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    # [wall start, cpu start, child wall, child cpu] per open stage
+    _stack: list[list[float]] = field(default_factory=list, repr=False)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as stage ``name``; an exception counts as an error and propagates."""
+        frame = [time.perf_counter(), time.thread_time(), 0.0, 0.0]
+        self._stack.append(frame)
+        stats = self.stages.setdefault(name, StageStats())
+        try:
+            yield
+        except BaseException:
+            stats.errors += 1
+            raise
+        finally:
+            self._stack.pop()
+            wall = time.perf_counter() - frame[0]
+            cpu = time.thread_time() - frame[1]
+            stats.calls += 1
+            stats.seconds += wall - frame[2]
+            stats.cpu_seconds += cpu - frame[3]
+            if self._stack:
+                self._stack[-1][2] += wall
+                self._stack[-1][3] += cpu
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self) -> dict:
+        return {
+            "game_pk": self.game_pk,
+            "date": self.date,
+            "status": self.status,
+            "error": self.error,
+            "seconds": round(self.seconds, 4),
+            "stages": {name: s.as_dict() for name, s in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+def stage(name: str):
+    """``GameRecord.stage`` on the game in progress, or a no-op outside one."""
+    record = _current.get()
+    return record.stage(name) if record is not None else nullcontext()
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to a counter on the game in progress, if any."""
+    record = _current.get()
+    if record is not None:
+        record.count(name, amount)
+
+
+def counted_cache(name: str, maxsize: int | None = 128):
+    """``functools.lru_cache`` that counts ``<name>_hits`` / ``<name>_misses`` per call."""
+
+    def decorate(fn):
+        missed = threading.local()
+
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(*args):
+            missed.value = True
+            return fn(*args)
+
+        @functools.wraps(fn)
+        def lookup(*args):
+            # lru_cache runs a miss in the calling thread, so the flag is this call's
+            missed.value = False
+            result = cached(*args)
+            count(f"{name}_misses" if missed.value else f"{name}_hits")
+            return result
+
+        lookup.cache_info = cached.cache_info
+        lookup.cache_clear = cached.cache_clear
+        return lookup
+
+    return decorate
+
+
+class IngestRun:
+    """Instrumentation for one ingest run: per-game records, a JSON log and a summary."""
+
+    def __init__(self, log_path: Path | str | None = None):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(UTC)
+        self._started = time.perf_counter()
+        self.log_path = Path(log_path) if log_path else None
+        self.games: list[GameRecord] = []
+        # Games may be ingested from several threads (see gamelog/)
+        self._lock = threading.Lock()
+        if self.log_path is not None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _write(self, event: str, payload: dict) -> None:
+        if self.log_path is None:
+            return
+        line = {"event": event, "run_id": self.run_id,
+                "ts": datetime.now(UTC).isoformat(timespec="milliseconds"), **payload}
+        with self._lock, open(self.log_path, "a") as f:
+            f.write(json.dumps(line) + "\n")
+
+    @contextmanager
+    def game(self, game_pk: int, date=None):
+        """Attribute stages and counters to ``game_pk`` until the block exits.
+
+        Set ``record.status`` inside the block; an exception marks the game failed.
+        """
+        record = GameRecord(game_pk, str(date) if date is not None else None)
+        token = _current.set(record)
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception as exc:
+            record.status, record.error = "failed", f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            record.seconds = time.perf_counter() - started
+            _current.reset(token)
+            with self._lock:
+                self.games.append(record)
+            self._write("game", record.as_dict())
+
+    def totals(self) -> tuple[dict[str, StageStats], dict[str, int], dict[str, int]]:
+        """Stage stats, counters and game statuses summed over the run."""
+        stages: dict[str, StageStats] = {}
+        counters: dict[str, int] = {}
+        statuses: dict[str, int] = {}
+        for record in self.games:
+            for name, stats in record.stages.items():
+                stages.setdefault(name, StageStats()).add(stats)
+            for name, value in record.counters.items():
+                counters[name] = counters.get(name, 0) + value
+            statuses[record.status] = statuses.get(record.status, 0) + 1
+        return stages, counters, statuses
+
+    def finish(self) -> dict:
+        """Log and return the run summary."""
+        stages, counters, statuses = self.totals()
+        summary = {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - self._started, 4),
+            "games": statuses,
+            "stages": {name: s.as_dict() for name, s in sorted(stages.items())},
+            "counters": dict(sorted(counters.items())),
+            "slowest_games": [
+                {"game_pk": r.game_pk, "seconds": round(r.seconds, 4),
+                 "stage": self._dominant_stage(r)}
+                for r in sorted(self.games, key=lambda r: r.seconds, reverse=True)[:5]
+            ],
+        }
+        self._write("run", summary)
+        return summary
+
+    @staticmethod
+    def _dominant_stage(record: GameRecord) -> str | None:
+        if not record.stages:
+            return None
+        return max(record.stages.items(), key=lambda item: item[1].seconds)[0]
+
+    def summary_table(self) -> str:
+        """Per-stage totals and per-game percentiles, then counters and the slowest games."""
+        stages, counters, statuses = self.totals()
+        outcome = ", ".join(f"{n} {s}" for s, n in sorted(statuses.items())) or "none"
+        lines = [
+            (f"Ingest run {self.run_id}: {len(self.games)} games ({outcome}) "
+             f"in {time.perf_counter() - self._started:.1f}s"),
+            (f"{'stage':<24} {'calls':>7} {'errors':>6} {'total s':>9} {'cpu s':>8} "
+             f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"),
+        ]
+        for name, total in sorted(stages.items(), key=lambda item: -item[1].seconds):
+            per_game = sorted(
+                r.stages[name].seconds * 1000 for r in self.games if name in r.stages
+            )
+            p95 = (statistics.quantiles(per_game, n=20, method="inclusive")[-1]
+                   if len(per_game) > 1 else per_game[0])
+            lines.append(
+                f"{name:<24} {total.calls:>7} {total.errors:>6} {total.seconds:>9.2f} "
+                f"{total.cpu_seconds:>8.2f} {statistics.median(per_game):>8.1f} "
+                f"{p95:>8.1f} {per_game[-1]:>8.1f}"
+            )
+        if counters:
+            lines.append("counters: " + ", ".join(f"{k}={v}" for k, v in sorted(counters.items())))
+        slowest = sorted(self.games, key=lambda r: r.seconds, reverse=True)[:5]
+        if slowest:
+            lines.append("slowest games: " + ", ".join(
+                f"{r.game_pk} {r.seconds:.2f}s ({self._dominant_stage(r) or '-'})"
+                for r in slowest
+            ))
+        return "\n".join(lines)
+
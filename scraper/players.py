@@ -5,26 +5,31 @@ Used by api/main.py, scraper/statcast_fetcher.py, and scripts/export_json.py.
 
 from __future__ import annotations
 
-import functools
 import logging
 
-import httpx
+from scraper import instrumentation
 
 logger = logging.getLogger(__name__)
 
 MLB_PEOPLE_URL = "https://statsapi.mlb.com/api/v1/people/{pid}"
 
 
-@functools.lru_cache(maxsize=2048)
+@instrumentation.counted_cache("name_cache", maxsize=2048)
 def lookup_player(pid: int) -> str:
     """Resolve an MLB player ID to their full name via the Stats API.
 
     Results are cached for the lifetime of the process.
     Returns the string player ID on failure so callers always get something displayable.
     """
+    # Deferred: only name resolution needs the HTTP stack
+    import httpx
+
+    from scraper import http_replay
+
     try:
-        resp = httpx.get(MLB_PEOPLE_URL.format(pid=pid), timeout=10)
-        resp.raise_for_status()
+        with instrumentation.stage("fetch:statsapi_people"):
+            resp = http_replay.get(MLB_PEOPLE_URL.format(pid=pid), timeout=10)
+            resp.raise_for_status()
         return resp.json()["people"][0]["fullName"]
     except (httpx.HTTPError, KeyError, IndexError) as exc:
         logger.warning("Could not resolve player ID %s: %s", pid, exc)
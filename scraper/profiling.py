@@ -0,0 +1,229 @@
+"""Opt-in profiling for the pipeline entry points and the API.
+
+Enabled per run with ``GAMELOG_PROFILE`` or, for the command-line entry points,
+``--profile``; both take a comma-separated list of modes:
+
+- ``cpu``: deterministic cProfile of the calling thread - ``.pstats`` (open with
+  ``python -m pstats`` or snakeviz) plus a ``.txt`` top-functions report.
+- ``sample``: a background thread samples every thread's stack each
+  ``SAMPLE_INTERVAL`` seconds into a ``.folded`` collapsed-stack file for
+  flamegraph.pl / speedscope / inferno.  Low overhead, and the only mode that sees
+  the API's threadpool (sync endpoints) as well as the event loop.
+- ``memory``: tracemalloc for the run - a ``.tracemalloc`` snapshot (load with
+  ``tracemalloc.Snapshot.load``), a ``.txt`` top-allocations report with the peak,
+  and a ``-memory.folded`` flamegraph of live bytes by allocating stack.
+
+Files are written to ``GAMELOG_PROFILE_DIR`` as ``<entry point>-<timestamp>-<pid>.*``.
+
+Entry points wrap their ``main`` with ``@entry_point("name")``, which takes
+``--profile MODES`` / ``--profile=MODES`` off ``sys.argv`` before the script parses
+its own arguments; the API profiles its whole lifespan with ``profile("api")``.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from config import PROFILE, PROFILE_DIR
+
+MODES = ("cpu", "sample", "memory")
+SAMPLE_INTERVAL = 0.005
+MEMORY_FRAMES = 25
+REPORT_LINES = 40
+
+# Only the outermost session profiles; nested entry points run unprofiled
+_active = threading.Lock()
+
+
+def parse_modes(value: str | None) -> tuple[str, ...]:
+    """``"cpu,memory"`` -> ``("cpu", "memory")``; raises ValueError on unknown modes."""
+    modes = tuple(dict.fromkeys(m.strip() for m in (value or "").split(",") if m.strip()))
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        raise ValueError(
+            f"Unknown profile mode(s) {', '.join(unknown)}; expected {', '.join(MODES)}"
+        )
+    return modes
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    for root in sys.path:
+        if root and filename.startswith(root.rstrip(os.sep) + os.sep):
+            filename = filename[len(root.rstrip(os.sep)) + 1:]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """Periodically records every other thread's stack as collapsed-stack counts."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path: Path) -> None:
+        with open(path, "w") as f:
+            f.writelines(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+
+def _write_cpu(profiler: cProfile.Profile, base: Path) -> list[Path]:
+    stats_path = base.with_suffix(".pstats")
+    profiler.dump_stats(stats_path)
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report).strip_dirs()
+    stats.sort_stats("cumulative").print_stats(REPORT_LINES)
+    stats.sort_stats("tottime").print_stats(REPORT_LINES)
+    report_path = base.with_name(f"{base.name}-cpu.txt")
+    report_path.write_text(report.getvalue())
+    return [stats_path, report_path]
+
+
+def _write_memory(snapshot: tracemalloc.Snapshot, peak: int, base: Path) -> list[Path]:
+    snapshot = snapshot.filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+    )
+    snapshot_path = base.with_suffix(".tracemalloc")
+    snapshot.dump(str(snapshot_path))
+
+    by_line = snapshot.statistics("lineno")
+    total = sum(stat.size for stat in by_line)
+    lines = [f"peak traced: {peak / 2**20:.1f} MiB, live at exit: {total / 2**20:.1f} MiB", ""]
+    lines += [str(stat) for stat in by_line[:REPORT_LINES]]
+    report_path = base.with_name(f"{base.name}-memory.txt")
+    report_path.write_text("\n".join(lines) + "\n")
+
+    folded_path = base.with_name(f"{base.name}-memory.folded")
+    with open(folded_path, "w") as f:
+        for stat in snapshot.statistics("traceback"):
+            stack = ";".join(
+                f"{frame.filename}:{frame.lineno}".replace(";", ":")
+                for frame in reversed(stat.traceback)
+            )
+            f.write(f"{stack} {stat.size}\n")
+    return [snapshot_path, report_path, folded_path]
+
+
+@contextmanager
+def profile(name: str, modes: str | tuple[str, ...] | None = None,
+            out_dir: Path | str | None = None):
+    """Profile the block in ``modes`` (default ``GAMELOG_PROFILE``); no-op when empty.
+
+    Yields the list of files written, filled in when the block exits.
+    """
+    if not isinstance(modes, tuple):
+        modes = parse_modes(PROFILE if modes is None else modes)
+    written: list[Path] = []
+    if not modes or not _active.acquire(blocking=False):
+        yield written
+        return
+
+    try:
+        out = Path(out_dir or PROFILE_DIR)
+        out.mkdir(parents=True, exist_ok=True)
+        base = out / f"{name}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+
+        profiler = cProfile.Profile() if "cpu" in modes else None
+        sampler = StackSampler() if "sample" in modes else None
+        if "memory" in modes and not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_FRAMES)
+        if sampler:
+            sampler.start()
+        started = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield written
+        finally:
+            if profiler:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+            if sampler:
+                sampler.stop()
+            # Snapshot before writing anything, so the reports don't show up in it
+            if "memory" in modes:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            if sampler:
+                folded = base.with_suffix(".folded")
+                sampler.write(folded)
+                written.append(folded)
+            if profiler:
+                written.extend(_write_cpu(profiler, base))
+            if "memory" in modes:
+                written.extend(_write_memory(snapshot, peak, base))
+            print(f"Profiled {name} ({', '.join(modes)}) for {elapsed:.2f}s:", file=sys.stderr)
+            for path in written:
+                print(f"  {path}", file=sys.stderr)
+    finally:
+        _active.release()
+
+
+def take_profile_flag(argv: list[str]) -> str | None:
+    """Remove ``--profile MODES`` / ``--profile=MODES`` from ``argv``; return MODES."""
+    for i, arg in enumerate(argv[1:], start=1):
+        if arg == "--profile" and i + 1 < len(argv):
+            value = argv[i + 1]
+            del argv[i:i + 2]
+            return value
+        if arg.startswith("--profile="):
+            del argv[i]
+            return arg.split("=", 1)[1]
+    return None
+
+
+def entry_point(name: str):
+    """Decorate a script's main: profile it per ``--profile`` or ``GAMELOG_PROFILE``."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            flag = take_profile_flag(sys.argv)
+            try:
+                modes = parse_modes(flag if flag is not None else PROFILE)
+            except ValueError as exc:
+                sys.exit(f"{name}: {exc}")
+            with profile(name, modes):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
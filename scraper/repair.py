@@ -0,0 +1,257 @@
+"""Column-level repair of ``statcast_events``.
+
+Refetching a game to fill one missing column rewrites every one of its events.
+A repair instead patches just the missing values, in place:
+
+1. ``missing_columns`` finds, in one scan of the table, how many rows of each game
+   have each requested column NULL.
+2. ``load_payload`` gets the game's per-pitch Savant CSV - from the recorded HTTP
+   fixtures (scraper/http_replay.py) when the game's payload is cached, otherwise
+   through ``http_replay.get`` when fetching is allowed.
+3. ``patch_game`` derives the columns with the ingest code's own transforms
+   (``statcast_row_values``) and applies them with one bulk
+   ``UPDATE ... FROM (VALUES ...)`` per batch, matched on the pitch identity
+   ``(mlb_game_pk, at_bat_number, pitch_number)``.  Only rows with a requested
+   column NULL that the payload can fill are written; values already stored are
+   never overwritten.
+
+Rows stored before the pitch identity was kept have no ``at_bat_number``; they are
+matched on ``clip_uuid`` (Savant's ``play_id``) instead and get their identity
+filled in by the same update.
+
+A patched game is recorded in the change log, so incremental exports pick it up.
+Repairs are idempotent: a rerun rediscovers only what is still missing.
+
+    python -m scraper.repair [COLUMN ...] [--all] [--game PK ...] [--cache-only] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+from dataclasses import dataclass
+
+import httpx
+from sqlalchemy import text
+
+from api.models import StatcastEvent
+from config import get_engine
+from scraper import http_replay, profiling
+from scraper.changes import record_game_change
+from scraper.statcast_fetcher import statcast_row_values
+
+IDENTITY_COLUMNS = ("at_bat_number", "pitch_number")
+WIN_PROBABILITY_COLUMNS = ("home_win_exp", "away_win_exp", "wpa")
+# Every column statcast_row_values derives, other than the identity itself
+REPAIRABLE_COLUMNS = tuple(
+    column for column in statcast_row_values({}) if column not in IDENTITY_COLUMNS
+)
+# Rows per UPDATE statement
+PATCH_BATCH_ROWS = 500
+
+
+class RepairError(Exception):
+    """A game's payload could not be loaded."""
+
+
+@dataclass
+class GameRepair:
+    """One game's repair: what was missing, and how many rows were patched."""
+
+    game_pk: int
+    events: int
+    missing: dict[str, int]
+    source: str | None = None
+    rows_patched: int = 0
+
+    def describe(self) -> str:
+        missing = ", ".join(f"{column} {n}" for column, n in self.missing.items())
+        source = f" from {self.source}" if self.source else ""
+        return (f"game {self.game_pk}: {self.rows_patched} of {self.events} rows "
+                f"patched{source} (NULL: {missing})")
+
+
+def check_columns(columns) -> tuple[str, ...]:
+    unknown = sorted(set(columns) - set(REPAIRABLE_COLUMNS))
+    if unknown:
+        raise ValueError(
+            f"Not repairable: {', '.join(unknown)}; expected some of {', '.join(REPAIRABLE_COLUMNS)}"
+        )
+    return tuple(columns)
+
+
+def missing_columns(conn, columns, game_pks=None) -> list[GameRepair]:
+    """The games with any of ``columns`` NULL, newest first, from one scan.
+
+    ``game_pks`` limits the scan to those games.
+    """
+    columns = check_columns(columns)
+    counts = ", ".join(f"COUNT(*) FILTER (WHERE {c} IS NULL) AS {c}" for c in columns)
+    any_null = " OR ".join(f"{c} IS NULL" for c in columns)
+    rows = conn.execute(
+        text(
+            f"""
+            SELECT mlb_game_pk, COUNT(*) AS events, {counts}
+            FROM statcast_events
+            WHERE CAST(:game_pks AS integer[]) IS NULL
+               OR mlb_game_pk = ANY(CAST(:game_pks AS integer[]))
+            GROUP BY mlb_game_pk
+            HAVING COUNT(*) FILTER (WHERE {any_null}) > 0
+            ORDER BY mlb_game_pk DESC
+            """
+        ),
+        {"game_pks": None if game_pks is None else list(game_pks)},
+    ).mappings()
+    return [
+        GameRepair(
+            row["mlb_game_pk"],
+            row["events"],
+            {c: row[c] for c in columns if row[c]},
+        )
+        for row in rows
+    ]
+
+
+def load_payload(game_pk: int, fetch: bool = True,
+                 store: http_replay.FixtureStore | None = None) -> tuple[str, str]:
+    """``(csv_text, source)`` of a game's Savant CSV; ``source`` is "cache" or "fetch"."""
+    url = http_replay.savant_game_csv_url(game_pk)
+    cached = (store or http_replay.FixtureStore()).load(httpx.Request("GET", url))
+    if cached is not None and cached.status_code == 200:
+        return cached.text, "cache"
+    if not fetch:
+        raise RepairError("payload is not cached")
+    response = http_replay.get(url, timeout=60)
+    response.raise_for_status()
+    return response.text, "fetch"
+
+
+def source_rows(csv_text: str) -> list[dict]:
+    """Each pitch of a Savant CSV as ``statcast_row_values`` plus its ``play_id``."""
+    import pandas as pd
+
+    if not csv_text.strip():
+        return []
+    try:
+        df = pd.read_csv(io.StringIO(csv_text))
+    except pd.errors.ParserError as exc:
+        raise RepairError(f"unreadable Statcast CSV: {exc}") from exc
+    if "at_bat_number" not in df.columns:
+        return []
+    rows = []
+    for _, row in df.iterrows():
+        values = statcast_row_values(row)
+        play_id = row.get("play_id")
+        values["play_id"] = play_id if isinstance(play_id, str) else None
+        rows.append(values)
+    return rows
+
+
+def _patch_sql(conn, columns: tuple[str, ...], n_rows: int):
+    table = StatcastEvent.__table__
+    keys = ("at_bat_number", "pitch_number", "play_id", *columns)
+    types = {
+        key: "varchar" if key == "play_id" else table.c[key].type.compile(dialect=conn.dialect)
+        for key in keys
+    }
+    values = ",\n".join(
+        "(" + ", ".join(f"CAST(:{key}_{i} AS {types[key]})" for key in keys) + ")"
+        for i in range(n_rows)
+    )
+    assignments = ",\n".join(
+        f"{c} = COALESCE(e.{c}, v.{c})" for c in (*columns, *IDENTITY_COLUMNS)
+    )
+    fillable = " OR ".join(f"(e.{c} IS NULL AND v.{c} IS NOT NULL)" for c in columns)
+    return text(
+        f"""
+        UPDATE statcast_events AS e
+        SET {assignments}
+        FROM (VALUES {values}) AS v({", ".join(keys)})
+        WHERE e.mlb_game_pk = :game_pk
+          AND ((e.at_bat_number = v.at_bat_number AND e.pitch_number = v.pitch_number)
+               OR (e.at_bat_number IS NULL AND e.clip_uuid = v.play_id))
+          AND ({fillable})
+        """
+    )
+
+
+def patch_game(conn, game_pk: int, columns, rows: list[dict]) -> int:
+    """Fill ``columns`` where NULL from the payload ``rows``; return the rows patched."""
+    columns = check_columns(columns)
+    rows = [
+        row for row in rows
+        if row["at_bat_number"] is not None and row["pitch_number"] is not None
+        and any(row[c] is not None for c in columns)
+    ]
+    patched = 0
+    for start in range(0, len(rows), PATCH_BATCH_ROWS):
+        batch = rows[start:start + PATCH_BATCH_ROWS]
+        params = {"game_pk": game_pk}
+        for i, row in enumerate(batch):
+            for key in ("at_bat_number", "pitch_number", "play_id", *columns):
+                params[f"{key}_{i}"] = row[key]
+        patched += conn.execute(_patch_sql(conn, columns, len(batch)), params).rowcount
+    return patched
+
+
+def repair_game(game: GameRepair, fetch: bool = True, dry_run: bool = False,
+                engine=None, store: http_replay.FixtureStore | None = None) -> GameRepair:
+    """Load ``game``'s payload and patch its missing columns (rolled back if ``dry_run``)."""
+    engine = engine or get_engine()
+    csv_text, game.source = load_payload(game.game_pk, fetch=fetch, store=store)
+    rows = source_rows(csv_text)
+    with engine.connect() as conn, conn.begin() as transaction:
+        game.rows_patched = patch_game(conn, game.game_pk, tuple(game.missing), rows)
+        if dry_run:
+            transaction.rollback()
+        elif game.rows_patched:
+            record_game_change(conn, game.game_pk, "statcast_repair")
+    return game
+
+
+def repair(columns=WIN_PROBABILITY_COLUMNS, game_pks=None, fetch: bool = True,
+           dry_run: bool = False, engine=None) -> list[GameRepair]:
+    """Discover and repair every game missing any of ``columns``."""
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        games = missing_columns(conn, columns, game_pks)
+    repaired = []
+    for game in games:
+        try:
+            repaired.append(repair_game(game, fetch=fetch, dry_run=dry_run, engine=engine))
+        except (RepairError, httpx.HTTPError) as exc:
+            print(f"⚠️ game {game.game_pk}: {exc}")
+            continue
+        print(repaired[-1].describe())
+    return repaired
+
+
+@profiling.entry_point("repair")
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fill NULL statcast_events columns from the Savant payload, in place."
+    )
+    parser.add_argument("columns", nargs="*", metavar="COLUMN",
+                        help=f"Columns to repair (default: {' '.join(WIN_PROBABILITY_COLUMNS)})")
+    parser.add_argument("--all", action="store_true", help="Repair every repairable column")
+    parser.add_argument("--game", type=int, nargs="+", metavar="PK", help="Only these games")
+    parser.add_argument("--cache-only", action="store_true",
+                        help="Only use cached payloads; never fetch")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would be patched without writing")
+    args = parser.parse_args(argv)
+
+    columns = REPAIRABLE_COLUMNS if args.all else tuple(args.columns) or WIN_PROBABILITY_COLUMNS
+    try:
+        check_columns(columns)
+    except ValueError as exc:
+        parser.error(str(exc))
+    repaired = repair(columns, args.game, fetch=not args.cache_only, dry_run=args.dry_run)
+    rows = sum(game.rows_patched for game in repaired)
+    events = sum(game.events for game in repaired)
+    verb = "Would patch" if args.dry_run else "Patched"
+    print(f"{verb} {rows} of {events} rows in {len(repaired)} game(s)")
+
+
+if __name__ == "__main__":
+    main()
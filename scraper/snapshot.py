@@ -0,0 +1,404 @@
+"""Parquet snapshot of the attended-events dataset.
+
+Every offline consumer (the exporters, integrity checks, ad-hoc analysis) reads the
+same ``statcast_events JOIN games WHERE attended`` rows.  ``write_snapshot`` stores
+that join, exactly as the export scan returns it, under ``SNAPSHOT_DIR``::
+
+    games.parquet                       attended games (ATTENDED_GAMES_SQL)
+    events/season=2024/part-0.parquet   ATTENDED_EVENTS_SQL rows, one file per season
+    snapshot.json                       change id the snapshot is current to, counts
+
+Each season file keeps the scan order (newest game first, chronological within a
+game), so reading the seasons newest first reproduces the database scan.  With
+``incremental`` only the seasons of games recorded in ``game_changes`` since the
+last snapshot are rewritten (see scraper/changes.py).  Files are replaced
+atomically, one at a time.
+
+``DatabaseSource`` and ``SnapshotSource`` serve the dataset to the export pipeline
+(``scripts/export_pipeline.py --snapshot``) from either place, so an export can run
+on any machine with just the snapshot directory.
+
+    python -m scraper.snapshot [--out DIR] [--incremental]
+
+pyarrow is only needed to write or read snapshots.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+
+from sqlalchemy import bindparam, text
+
+from config import SNAPSHOT_DIR
+from scraper.changes import advance_checkpoint, log_position, pending_changes
+
+# pyarrow is optional and slow to import; _require_pyarrow loads it on first use
+pa = pc = pq = None
+
+# consumer_checkpoints row tracking which game changes the snapshot includes
+SNAPSHOT_CONSUMER = "parquet_snapshot"
+SNAPSHOT_VERSION = 2
+CHUNK_SIZE = 10_000
+
+ATTENDED_GAMES_SQL = text(
+    """
+    SELECT mlb_game_pk, date, home_team, away_team, home_score, away_score,
+           venue_name, attended
+    FROM games
+    WHERE attended IS TRUE
+    ORDER BY date DESC, mlb_game_pk, id
+    """
+)
+
+# The one scan every event-based export stage is fed from: newest game first (the
+# same order as ATTENDED_GAMES_SQL) and, within a game, the heartbeat's chronological
+# order.  ``:game_pks`` restricts the scan to some games; pass None for all of them.
+ATTENDED_EVENTS_SQL = text(
+    """
+    SELECT
+        se.id,
+        se.mlb_game_pk,
+        se.wpa,
+        se.home_win_exp,
+        se.away_win_exp,
+        se.batter_name,
+        se.pitcher_name,
+        se.event_type,
+        se.raw_description,
+        se.event_datetime,
+        se.inning,
+        se.inning_topbot,
+        se.outs_when_up,
+        se.home_score AS event_home_score,
+        se.away_score AS event_away_score,
+        se.post_home_score,
+        se.post_away_score,
+        se.balls,
+        se.strikes,
+        se.launch_speed,
+        se.launch_angle,
+        se.hit_distance_sc,
+        se.hc_x,
+        se.hc_y,
+        se.spray_angle,
+        se.clip_uuid,
+        se.video_url,
+        -- Running WPA within the game, for the sparkline
+        SUM(se.wpa) OVER (
+            PARTITION BY se.mlb_game_pk ORDER BY se.event_datetime, se.id
+        ) AS cum_wpa,
+        g.date,
+        g.home_team,
+        g.away_team,
+        g.home_score,
+        g.away_score
+    FROM statcast_events se
+    JOIN games g ON g.mlb_game_pk = se.mlb_game_pk
+    WHERE g.attended IS TRUE
+        AND (CAST(:game_pks AS integer[]) IS NULL OR se.mlb_game_pk = ANY(:game_pks))
+    ORDER BY g.date DESC, se.mlb_game_pk, se.inning,
+            CASE WHEN se.inning_topbot = 'Top' THEN 0 ELSE 1 END,
+            se.outs_when_up,
+            se.event_datetime,
+            se.id
+    """
+).bindparams(bindparam("game_pks", value=None))
+
+CHANGED_SEASONS_SQL = text(
+    """
+    SELECT DISTINCT EXTRACT(YEAR FROM date)::int
+    FROM games
+    WHERE mlb_game_pk = ANY(:game_pks)
+    """
+)
+
+
+def _schemas():
+    games = pa.schema([
+        ("mlb_game_pk", pa.int32()),
+        ("date", pa.date32()),
+        ("home_team", pa.string()),
+        ("away_team", pa.string()),
+        ("home_score", pa.int32()),
+        ("away_score", pa.int32()),
+        ("venue_name", pa.string()),
+        ("attended", pa.bool_()),
+    ])
+    events = pa.schema([
+        ("id", pa.int32()),
+        ("mlb_game_pk", pa.int32()),
+        ("wpa", pa.float64()),
+        ("home_win_exp", pa.float64()),
+        ("away_win_exp", pa.float64()),
+        ("batter_name", pa.string()),
+        ("pitcher_name", pa.string()),
+        ("event_type", pa.string()),
+        ("raw_description", pa.string()),
+        ("event_datetime", pa.string()),
+        ("inning", pa.int32()),
+        ("inning_topbot", pa.string()),
+        ("outs_when_up", pa.int32()),
+        ("event_home_score", pa.int32()),
+        ("event_away_score", pa.int32()),
+        ("post_home_score", pa.int32()),
+        ("post_away_score", pa.int32()),
+        ("balls", pa.int32()),
+        ("strikes", pa.int32()),
+        ("launch_speed", pa.int32()),
+        ("launch_angle", pa.int32()),
+        ("hit_distance_sc", pa.int32()),
+        ("hc_x", pa.float64()),
+        ("hc_y", pa.float64()),
+        ("spray_angle", pa.float64()),
+        ("clip_uuid", pa.string()),
+        ("video_url", pa.string()),
+        ("cum_wpa", pa.float64()),
+        ("date", pa.date32()),
+        ("home_team", pa.string()),
+        ("away_team", pa.string()),
+        ("home_score", pa.int32()),
+        ("away_score", pa.int32()),
+    ])
+    return games, events
+
+
+def _require_pyarrow() -> None:
+    global pa, pc, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet snapshots need pyarrow (pip install pyarrow)") from None
+
+
+def _season_path(root: Path, season: int) -> Path:
+    return root / "events" / f"season={season}" / "part-0.parquet"
+
+
+def _partition_seasons(root: Path) -> set[int]:
+    return {int(p.name.split("=", 1)[1]) for p in root.glob("events/season=*")}
+
+
+def _replace(tmp: Path, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, path)
+
+
+class DatabaseSource:
+    """The attended-events dataset, read from Postgres."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def games(self) -> list[Mapping]:
+        with self.engine.connect() as conn:
+            return list(conn.execute(ATTENDED_GAMES_SQL).mappings().all())
+
+    def events(
+        self, game_pks: Sequence[int] | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[Sequence[Mapping]]:
+        """Yield ``ATTENDED_EVENTS_SQL`` rows in chunks, from a server-side cursor."""
+        with self.engine.connect() as conn:
+            result = conn.execute(
+                ATTENDED_EVENTS_SQL,
+                {"game_pks": None if game_pks is None else list(game_pks)},
+                execution_options={"stream_results": True, "yield_per": chunk_size},
+            )
+            yield from result.mappings().partitions(chunk_size)
+
+    def __str__(self):
+        return "database"
+
+
+class SnapshotSource:
+    """The attended-events dataset, read from a snapshot written by ``write_snapshot``."""
+
+    def __init__(self, root: Path | str = SNAPSHOT_DIR):
+        _require_pyarrow()
+        self.root = Path(root)
+        if not (self.root / "games.parquet").exists():
+            raise FileNotFoundError(f"No Parquet snapshot in {self.root}")
+        version = self.metadata().get("version")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Snapshot in {self.root} has version {version}, expected {SNAPSHOT_VERSION}; "
+                "rewrite it with python -m scraper.snapshot"
+            )
+
+    def metadata(self) -> dict:
+        with open(self.root / "snapshot.json") as f:
+            return json.load(f)
+
+    def seasons(self) -> list[int]:
+        """Seasons with events, newest first."""
+        seasons = _partition_seasons(self.root)
+        return sorted((s for s in seasons if _season_path(self.root, s).exists()), reverse=True)
+
+    def games(self) -> list[Mapping]:
+        return pq.read_table(self.root / "games.parquet").to_pylist()
+
+    def events(
+        self, game_pks: Sequence[int] | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[Sequence[Mapping]]:
+        """Yield event rows in chunks, in the database scan's order."""
+        for batch in self.event_batches(game_pks, chunk_size=chunk_size):
+            yield batch.to_pylist()
+
+    def event_batches(
+        self,
+        game_pks: Sequence[int] | None = None,
+        columns: Sequence[str] | None = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> Iterator[pa.RecordBatch]:
+        """Yield the events as Arrow record batches (only ``columns``, if given)."""
+        wanted = None if game_pks is None else pa.array(sorted(game_pks), pa.int32())
+        read = None if columns is None else sorted({*columns, "mlb_game_pk"})
+        for season in self.seasons():
+            parquet = pq.ParquetFile(_season_path(self.root, season))
+            for batch in parquet.iter_batches(batch_size=chunk_size, columns=read):
+                if wanted is not None:
+                    batch = batch.filter(pc.is_in(batch["mlb_game_pk"], value_set=wanted))
+                if batch.num_rows:
+                    yield batch
+
+    def __str__(self):
+        return f"snapshot {self.root}"
+
+
+def _write_seasons(
+    root: Path, rows: Iterator[Sequence[Mapping]], schema, seasons: set[int] | None
+) -> dict[int, int]:
+    """Write each season's rows to its partition file; return row counts by season.
+
+    Rows arrive season by season (newest first), so one writer is open at a time.
+    """
+    counts: dict[int, int] = {}
+    writer = tmp = season = None
+
+    def close():
+        if writer is not None:
+            writer.close()
+            _replace(tmp, _season_path(root, season))
+
+    try:
+        for chunk in rows:
+            start = 0
+            while start < len(chunk):
+                row_season = chunk[start]["date"].year
+                end = start
+                while end < len(chunk) and chunk[end]["date"].year == row_season:
+                    end += 1
+                if row_season != season:
+                    close()
+                    season = row_season
+                    tmp = root / f".season={season}.parquet.tmp"
+                    writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+                    counts[season] = 0
+                table = pa.Table.from_pylist([dict(r) for r in chunk[start:end]], schema=schema)
+                writer.write_table(table)
+                counts[season] += end - start
+                start = end
+        close()
+        writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+            tmp.unlink(missing_ok=True)
+
+    # Seasons that were rebuilt but no longer have any events
+    for stale in (seasons or set()) - counts.keys():
+        shutil.rmtree(_season_path(root, stale).parent, ignore_errors=True)
+    return counts
+
+
+def write_snapshot(engine, root: Path | str = SNAPSHOT_DIR, incremental: bool = False) -> dict:
+    """Write (or incrementally refresh) the snapshot under ``root``; return its metadata."""
+    _require_pyarrow()
+    root = Path(root)
+    games_schema, events_schema = _schemas()
+    started = time.perf_counter()
+    previous = {}
+    if (root / "snapshot.json").exists():
+        with open(root / "snapshot.json") as f:
+            previous = json.load(f)
+
+    with engine.connect() as conn:
+        seasons = None
+        # A snapshot in an older layout is rewritten in full
+        if incremental and previous.get("version") == SNAPSHOT_VERSION:
+            changed_pks, upto = pending_changes(conn, SNAPSHOT_CONSUMER)
+            if changed_pks is not None and not changed_pks:
+                print("Snapshot is up to date")
+                return previous
+            if changed_pks is not None:
+                seasons = set(
+                    conn.execute(CHANGED_SEASONS_SQL, {"game_pks": sorted(changed_pks)}).scalars()
+                )
+        else:
+            upto = log_position(conn)
+        games = conn.execute(ATTENDED_GAMES_SQL).mappings().all()
+
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / ".games.parquet.tmp"
+    pq.write_table(
+        pa.Table.from_pylist([dict(g) for g in games], schema=games_schema), tmp,
+        compression="zstd",
+    )
+    _replace(tmp, root / "games.parquet")
+
+    if seasons is None:
+        game_pks = None
+        rebuilt = _partition_seasons(root)
+        counts = {}
+    else:
+        game_pks = [g["mlb_game_pk"] for g in games if g["date"].year in seasons]
+        rebuilt = seasons
+        counts = {int(s): n for s, n in previous.get("events", {}).items() if int(s) not in seasons}
+    source = DatabaseSource(engine)
+    rows = source.events(game_pks) if game_pks is None or game_pks else iter(())
+    counts.update(_write_seasons(root, rows, events_schema, rebuilt))
+
+    metadata = {
+        "version": SNAPSHOT_VERSION,
+        "change_id": upto.change_id,
+        "written_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "games": len(games),
+        "events": {str(s): counts[s] for s in sorted(counts, reverse=True)},
+    }
+    tmp = root / ".snapshot.json.tmp"
+    tmp.write_text(json.dumps(metadata, indent=2))
+    _replace(tmp, root / "snapshot.json")
+
+    with engine.begin() as conn:
+        advance_checkpoint(conn, SNAPSHOT_CONSUMER, upto)
+
+    scope = "all seasons" if seasons is None else f"season(s) {sorted(seasons)}"
+    print(f"Snapshot of {len(games)} games / {sum(counts.values()):,} events "
+          f"({scope} rewritten) → {root} in {time.perf_counter() - started:.2f}s")
+    return metadata
+
+
+def main():
+    from config import get_engine
+
+    parser = argparse.ArgumentParser(description="Write the attended-events Parquet snapshot.")
+    parser.add_argument("--out", type=Path, default=Path(SNAPSHOT_DIR))
+    parser.add_argument(
+        "--incremental", action="store_true", help="Only rewrite seasons with game changes"
+    )
+    args = parser.parse_args()
+    write_snapshot(get_engine(), args.out, incremental=args.incremental)
+
+
+if __name__ == "__main__":
+    main()
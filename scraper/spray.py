@@ -0,0 +1,63 @@
+"""Batted-ball spray angles and field coordinates from Statcast hit coordinates.
+
+Statcast's ``hc_x``/``hc_y`` place a batted ball on a 250x250 pixel grid with home
+plate at about (125.42, 198.27) and y increasing toward home.  The spray angle is
+measured from straight-away center field in degrees, positive toward right field.
+
+Used by scraper/statcast_fetcher.py (``spray_angle``, stored at ingest) and
+scripts/export_spray_chart.py (``field_coords``, for a whole batch of balls at once).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+HOME_PLATE_X, HOME_PLATE_Y = 125.42, 198.27
+# Rough feet per pixel, for balls with coordinates but no Statcast distance
+FEET_PER_PIXEL = 2.5
+# Foul lines are 45 degrees either side of center
+FOUL_LINE = math.pi / 4
+
+# Weyl-sequence multipliers for the deterministic angle of balls without coordinates
+_PHI = (math.sqrt(5) - 1) / 2
+_SQRT2 = math.sqrt(2) - 1
+
+
+def spray_angle(hc_x: float | None, hc_y: float | None) -> float | None:
+    """Spray angle in degrees (positive toward right field), or None without coordinates."""
+    if hc_x is None or hc_y is None or math.isnan(hc_x) or math.isnan(hc_y):
+        return None
+    return round(math.degrees(math.atan2(hc_x - HOME_PLATE_X, HOME_PLATE_Y - hc_y)), 1)
+
+
+def field_coords(
+    hc_x, hc_y, distance, event_ids
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Field x/y (feet, home plate at the origin, center field along +y) for many balls.
+
+    Inputs are equal-length sequences with None/NaN for missing values.  The distance
+    is the Statcast one when present, else estimated from the pixel distance.  Balls
+    without hit coordinates get an angle derived from their event id - spread over
+    fair territory, centered on straight-away, and the same on every run.  Returns
+    ``(x, y, distance, estimated)``; x/y/distance are NaN where no distance is known.
+    """
+    import numpy as np
+
+    hc_x = np.asarray(hc_x, dtype=float)
+    hc_y = np.asarray(hc_y, dtype=float)
+    distance = np.asarray(distance, dtype=float)
+    event_ids = np.asarray(event_ids, dtype=float)
+
+    dx = hc_x - HOME_PLATE_X
+    dy = HOME_PLATE_Y - hc_y
+    estimated = np.isnan(dx) | np.isnan(dy)
+    # Triangular spread of two low-discrepancy sequences: mostly up the middle
+    spread = np.mod(event_ids * _PHI, 1.0) + np.mod(event_ids * _SQRT2, 1.0) - 1.0
+    angle = np.where(estimated, spread * FOUL_LINE, np.arctan2(dx, dy))
+
+    distance = np.where(distance > 0, distance, np.hypot(dx, dy) * FEET_PER_PIXEL)
+    return distance * np.sin(angle), distance * np.cos(angle), distance, estimated
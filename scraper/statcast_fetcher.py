@@ -1,18 +1,30 @@
 #!/usr/bin/env python3
-"""Fetch Statcast events for attended games and store in DB."""
+"""Fetch Statcast events for attended games and store in DB.
+
+pandas and pybaseball are imported by ``fetch_statcast_for_game``, the only code
+that needs them, so the CLI starts quickly when there is nothing to fetch.
+"""
+
+from __future__ import annotations
 
 import math
 import time
-from typing import List
+from typing import TYPE_CHECKING, List
 
 import httpx
-import pandas as pd
-from pybaseball import statcast_single_game as sc_game
 
 from api.models import Game, StatcastEvent
-from config import SessionLocal
+from config import INGEST_LOG, get_session
+from scraper import http_replay, instrumentation, profiling
+from scraper.changes import record_game_change
+from scraper.cleanup import post_ingest as post_ingest_cleanup
 from scraper.players import lookup_player as lookup_player_name
 from scraper.players import normalize_player_name
+from scraper.spray import spray_angle
+from scraper.validation import post_ingest as post_ingest_validation
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Cache Savant game-feed per game_pk to avoid refetching
 _gf_cache: dict[int, dict[str, str]] = {}
@@ -62,6 +74,66 @@ def safe_int(val):
         return None
 
 
+def safe_float(val, ndigits: int = 2):
+    try:
+        if val is None or (isinstance(val, float) and math.isnan(val)):
+            return None
+        return round(float(val), ndigits)
+    except (ValueError, TypeError):
+        return None
+
+
+def get_hit_coordinates(row) -> tuple[float | None, float | None, float | None]:
+    """(hc_x, hc_y, spray angle) of a Statcast row; all None for balls not in play."""
+    hc_x = safe_float(row.get("hc_x"))
+    hc_y = safe_float(row.get("hc_y"))
+    return hc_x, hc_y, spray_angle(hc_x, hc_y)
+
+
+def _text(val) -> str | None:
+    return None if val is None or (isinstance(val, float) and math.isnan(val)) else str(val)
+
+
+def statcast_row_values(row) -> dict:
+    """The per-pitch columns of a Statcast row, as stored on ``statcast_events``.
+
+    Measurements, game context, win probability and the pitch identity
+    (``at_bat_number``, ``pitch_number``); shared by ingest and column repair
+    (scraper/repair.py), so both store the same values.
+    """
+    hc_x, hc_y, spray = get_hit_coordinates(row)
+    # Objective team-based WPA: delta_home_win_exp, positive = helped the home team
+    wpa = safe_float(row.get("delta_home_win_exp"), 6)
+    home_win_exp = safe_float(row.get("home_win_exp"), 4)
+    return {
+        "at_bat_number": safe_int(row.get("at_bat_number")),
+        "pitch_number": safe_int(row.get("pitch_number")),
+        "launch_speed": safe_int(row.get("launch_speed")),
+        "launch_angle": safe_int(row.get("launch_angle")),
+        "estimated_ba": safe_int(row.get("estimated_ba_using_speedangle")),
+        "wpa": wpa,
+        "hit_distance_sc": safe_int(row.get("hit_distance_sc")),
+        "hc_x": hc_x,
+        "hc_y": hc_y,
+        "spray_angle": spray,
+        "inning": safe_int(row.get("inning")),
+        "inning_topbot": _text(row.get("inning_topbot")),
+        "outs_when_up": safe_int(row.get("outs_when_up")),
+        "home_score": safe_int(row.get("home_score")),
+        "away_score": safe_int(row.get("away_score")),
+        "post_home_score": safe_int(row.get("post_home_score")),
+        "post_away_score": safe_int(row.get("post_away_score")),
+        "on_1b": _text(row.get("on_1b")),
+        "on_2b": _text(row.get("on_2b")),
+        "on_3b": _text(row.get("on_3b")),
+        "balls": safe_int(row.get("balls")),
+        "strikes": safe_int(row.get("strikes")),
+        "home_win_exp": home_win_exp,
+        "away_win_exp": None if home_win_exp is None
+        else round(1.0 - float(row.get("home_win_exp")), 4),
+    }
+
+
 
 def get_gf_lookup(pk: int) -> dict[str, str]:
     """Return {sv_id: play_id} mapping for a game_pk using Baseball Savant gf feed.
@@ -79,16 +151,19 @@ def get_gf_lookup(pk: int) -> dict[str, str]:
     ``sv_id`` is present – callers fall back to StatsAPI ``playId`` when Savant cannot map.
     """
 
+    instrumentation.count("gf_lookups")
     if pk in _gf_cache:
+        instrumentation.count("gf_cache_hits")
         return _gf_cache[pk]
 
     url = f"https://baseballsavant.mlb.com/gf?game_pk={pk}"
     tries = 0
     while tries < 3:
         try:
-            resp = httpx.get(url, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
+            with instrumentation.stage("fetch:savant_gf"):
+                resp = http_replay.get(url, timeout=15)
+                resp.raise_for_status()
+                data = resp.json()
 
             lookup: dict[str, str] = {}
 
@@ -123,8 +198,9 @@ def get_clip_from_statsapi(game_pk: int, play_id: str) -> str | None:
     """Return the MP4 URL for a given playId from the StatsAPI content endpoint."""
     url = f"https://statsapi.mlb.com/api/v1/game/{game_pk}/content"
     try:
-        r = httpx.get(url, timeout=10)
-        r.raise_for_status()
+        with instrumentation.stage("fetch:statsapi_content"):
+            r = http_replay.get(url, timeout=10)
+            r.raise_for_status()
         # Note: 'highlights' -> 'highlights' is correct, not a typo.
         for item in r.json().get("highlights", {}).get("highlights", {}).get("items", []):
             if item.get("playId") == play_id:
@@ -144,8 +220,9 @@ def get_clip_from_statsapi(game_pk: int, play_id: str) -> str | None:
 def fetch_playbyplay_json(pk: int):
     url = f"https://statsapi.mlb.com/api/v1.1/game/{pk}/feed/live"
     try:
-        resp = httpx.get(url, timeout=20)
-        resp.raise_for_status()
+        with instrumentation.stage("fetch:statsapi_feed"):
+            resp = http_replay.get(url, timeout=20)
+            resp.raise_for_status()
         return resp.json()
     except Exception as e:
         print(f"playByPlay fetch failed for {pk}: {e}")
@@ -168,10 +245,16 @@ def fetch_statcast_for_game(g: Game) -> List[StatcastEvent]:
 
     if not g.mlb_game_pk:
         return []
+    import pandas as pd
+    from pybaseball import statcast_single_game as sc_game
+
+    # pybaseball's requests go through the record/replay stand-in when enabled
+    http_replay.install_pybaseball()
 
     # -------- 1) Use pybaseball as primary source (per user guidance) ---------
     try:
-        df: pd.DataFrame | None = sc_game(g.mlb_game_pk)
+        with instrumentation.stage("fetch:savant_statcast"):
+            df: pd.DataFrame | None = sc_game(g.mlb_game_pk)
         if df is not None and not df.empty:
             df = sort_statcast_dataframe(df)
             print(f"✅ pybaseball: Found {len(df)} Statcast events for game {g.mlb_game_pk}")
@@ -186,37 +269,6 @@ def fetch_statcast_for_game(g: Game) -> List[StatcastEvent]:
                 if not batter or batter == 'nan':
                     continue
                     
-                # Get WPA data - use objective team-based WPA (delta_home_win_exp)
-                d_home = row.get("delta_home_win_exp")
-                wpa_val = None
-                if d_home is not None and pd.notna(d_home):
-                    # Use the raw delta_home_win_exp value as WPA
-                    # Positive = helped home team, Negative = helped away team
-                    wpa_val = round(float(d_home), 6)
-                
-                # Get absolute win probability values
-                home_win_exp_val = None
-                away_win_exp_val = None
-                home_wp = row.get("home_win_exp")
-                if home_wp is not None and pd.notna(home_wp):
-                    home_win_exp_val = round(float(home_wp), 4)
-                    away_win_exp_val = round(1.0 - float(home_wp), 4)
-                
-                # Get exit velocity, launch angle, and distance
-                launch_speed = row.get("launch_speed")
-                launch_angle = row.get("launch_angle")
-                hit_distance = row.get("hit_distance_sc")
-                
-                ev_val = None
-                la_val = None
-                distance_val = None
-                if launch_speed is not None and pd.notna(launch_speed):
-                    ev_val = round(float(launch_speed))
-                if launch_angle is not None and pd.notna(launch_angle):
-                    la_val = round(float(launch_angle))
-                if hit_distance is not None and pd.notna(hit_distance):
-                    distance_val = round(float(hit_distance))
-
                 # Get clip UUID for video
                 clip_uuid = None
                 play_id = row.get("play_id") or row.get("play_guid")
@@ -228,24 +280,6 @@ def fetch_statcast_for_game(g: Game) -> List[StatcastEvent]:
                     lookup = get_gf_lookup(g.mlb_game_pk)
                     clip_uuid = lookup.get(str(sv_id))
 
-                # Get context fields for enhanced tooltips
-                inning_val = safe_int(row.get("inning"))
-                inning_topbot_val = str(row.get("inning_topbot", "")) if pd.notna(row.get("inning_topbot")) else None
-                outs_val = safe_int(row.get("outs_when_up"))
-                home_score_val = safe_int(row.get("home_score"))
-                away_score_val = safe_int(row.get("away_score"))
-                post_home_score_val = safe_int(row.get("post_home_score"))
-                post_away_score_val = safe_int(row.get("post_away_score"))
-                
-                # Baserunners (clean up NaN values)
-                on_1b_val = str(row.get("on_1b", "")) if pd.notna(row.get("on_1b")) else None
-                on_2b_val = str(row.get("on_2b", "")) if pd.notna(row.get("on_2b")) else None
-                on_3b_val = str(row.get("on_3b", "")) if pd.notna(row.get("on_3b")) else None
-                
-                # Count
-                balls_val = safe_int(row.get("balls"))
-                strikes_val = safe_int(row.get("strikes"))
-
                 # Resolve pitcher name from ID
                 pitcher_id = row.get("pitcher")
                 pitcher_name = lookup_player_name(pitcher_id) if pitcher_id and pd.notna(pitcher_id) else ""
@@ -257,30 +291,10 @@ def fetch_statcast_for_game(g: Game) -> List[StatcastEvent]:
                         batter_name=batter,
                         pitcher_name=pitcher_name,
                         pitch_type=str(row.get("pitch_type", "")),
-                        launch_speed=ev_val,
-                        launch_angle=la_val,
-                        estimated_ba=safe_int(row.get("estimated_ba_using_speedangle")),
                         raw_description=str(row.get("description", "")),
                         event_type=str(row.get("events", "")),
-                        wpa=wpa_val,
-                        hit_distance_sc=distance_val,
                         clip_uuid=clip_uuid,
-                        # Context fields
-                        inning=inning_val,
-                        inning_topbot=inning_topbot_val,
-                        outs_when_up=outs_val,
-                        home_score=home_score_val,
-                        away_score=away_score_val,
-                        post_home_score=post_home_score_val,
-                        post_away_score=post_away_score_val,
-                        on_1b=on_1b_val,
-                        on_2b=on_2b_val,
-                        on_3b=on_3b_val,
-                        balls=balls_val,
-                        strikes=strikes_val,
-                        # Win probability fields
-                        home_win_exp=home_win_exp_val,
-                        away_win_exp=away_win_exp_val,
+                        **statcast_row_values(row),
                     )
                 )
             
@@ -294,7 +308,8 @@ def fetch_statcast_for_game(g: Game) -> List[StatcastEvent]:
 
     # -------- 2) pybaseball fallback (if StatsAPI completely fails) ---------
     try:
-        df: pd.DataFrame | None = sc_game(g.mlb_game_pk)
+        with instrumentation.stage("fetch:savant_statcast"):
+            df: pd.DataFrame | None = sc_game(g.mlb_game_pk)
     except Exception as e:
         print(f"pybaseball error pk {g.mlb_game_pk}: {e}")
         df = None
@@ -357,6 +372,7 @@ def fetch_statcast_for_game(g: Game) -> List[StatcastEvent]:
         hit_distance = row.get("hit_distance_sc")
         if hit_distance is not None and pd.notna(hit_distance):
             distance_val = safe_int(hit_distance)
+        hc_x_val, hc_y_val, spray_angle_val = get_hit_coordinates(row)
 
         # Get context fields for enhanced tooltips (fallback section)
         inning_val = safe_int(row.get("inning"))
@@ -394,6 +410,9 @@ def fetch_statcast_for_game(g: Game) -> List[StatcastEvent]:
                 event_type=str(row.get("events", "")),
                 wpa=wpa_val,
                 hit_distance_sc=distance_val,
+                hc_x=hc_x_val,
+                hc_y=hc_y_val,
+                spray_angle=spray_angle_val,
                 clip_uuid=clip_uuid,
                 video_url=video_url,
                 # Context fields
@@ -412,20 +431,80 @@ def fetch_statcast_for_game(g: Game) -> List[StatcastEvent]:
                 # Win probability fields
                 home_win_exp=home_win_exp_val,
                 away_win_exp=away_win_exp_val,
+                at_bat_number=safe_int(at_bat_number),
+                pitch_number=safe_int(row.get("pitch_number")),
             )
         )
 
     return events
 
 
+def ingest_game(
+    db, g: Game, ingest: instrumentation.IngestRun, force: bool = False
+) -> instrumentation.GameRecord:
+    """Fetch and store one game's events; return its ingest record.
+
+    ``record.status`` is ``skipped`` (events already stored and not ``force``),
+    ``unavailable``, ``inserted`` or ``failed`` (with ``record.error``); a failure
+    is rolled back and reported, not raised.  With ``force`` the stored events are
+    replaced in the same transaction as the new ones are written, so a failed or
+    interrupted fetch leaves them in place.
+    """
+    with ingest.game(g.mlb_game_pk, g.date) as record:
+        if not force:
+            exists = db.query(StatcastEvent).filter(StatcastEvent.mlb_game_pk == g.mlb_game_pk).first()
+            if exists:
+                print(f"Game {g.mlb_game_pk} already has data. Skipping. Use --force to re-process.")
+                record.status = "skipped"
+                return record
+
+        try:
+            # Upstream fetches inside are charged to their own fetch:* stages
+            with record.stage("transform"):
+                events = fetch_statcast_for_game(g)
+            record.count("events_parsed", len(events))
+            if not events:
+                print(f"⚠️  {g.date} {g.away_team}@{g.home_team} (pk={g.mlb_game_pk}) → Statcast not available; skipping")
+                record.status = "unavailable"
+                return record
+
+            if force:
+                with record.stage("db_delete"):
+                    deleted_count = db.query(StatcastEvent).filter(StatcastEvent.mlb_game_pk == g.mlb_game_pk).delete()
+                    if deleted_count > 0:
+                        print(f"Game {g.mlb_game_pk}: --force provided, replacing {deleted_count} old events.")
+                        record_game_change(db, g.mlb_game_pk, "statcast_deleted")
+                record.count("rows_deleted", deleted_count)
+
+            with record.stage("db_write"):
+                db.add_all(events)
+                record_game_change(db, g.mlb_game_pk, "statcast")
+                db.commit()
+            record.count("rows_written", len(events))
+            record.status = "inserted"
+            print(f"{g.date} {g.away_team}@{g.home_team} → inserted {len(events)} events")
+
+        except Exception as e:
+            print(f"❌ Game {g.mlb_game_pk} ({g.date}) failed: {e}")
+            record.status, record.error = "failed", f"{type(e).__name__}: {e}"
+            db.rollback()
+        return record
+
+
+@profiling.entry_point("statcast_fetcher")
 def run():
     import argparse
     parser = argparse.ArgumentParser(description="Fetch Statcast data for attended games.")
     parser.add_argument("--game", type=int, help="Fetch data for a single gamePk.")
     parser.add_argument("--force", action="store_true", help="Force re-fetch of data even if it exists.")
+    parser.add_argument("--log", default=INGEST_LOG,
+                        help="JSON Lines file for per-game stage timings ('' to disable).")
+    parser.add_argument("--no-cleanup", action="store_true",
+                        help="Skip the corrupted-data cleanup of the fetched games.")
     args = parser.parse_args()
 
-    db = SessionLocal()
+    ingest = instrumentation.IngestRun(args.log or None)
+    db = get_session()
     try:
         games_query = db.query(Game).filter(Game.attended.is_(True), Game.mlb_game_pk.isnot(None))
         if args.game:
@@ -433,45 +512,26 @@ def run():
         
         games_to_process = games_query.order_by(Game.date).all()
         
-        total_inserted = 0
         failed_games = []
-
         for g in games_to_process:
-            if not args.force:
-                exists = db.query(StatcastEvent).filter(StatcastEvent.mlb_game_pk == g.mlb_game_pk).first()
-                if exists:
-                    print(f"Game {g.mlb_game_pk} already has data. Skipping. Use --force to re-process.")
-                    continue
-            
-            if args.force:
-                deleted_count = db.query(StatcastEvent).filter(StatcastEvent.mlb_game_pk == g.mlb_game_pk).delete()
-                if deleted_count > 0:
-                    print(f"Game {g.mlb_game_pk}: --force provided, deleted {deleted_count} old events.")
-                db.commit()
-
-            try:
-                events = fetch_statcast_for_game(g)
-                if not events:
-                    print(f"⚠️  {g.date} {g.away_team}@{g.home_team} (pk={g.mlb_game_pk}) → Statcast not available; skipping")
-                    continue
-
-                db.add_all(events)
-                db.commit()
-                total_inserted += len(events)
-                print(f"{g.date} {g.away_team}@{g.home_team} → inserted {len(events)} events")
-
-            except Exception as e:
-                print(f"❌ Game {g.mlb_game_pk} ({g.date}) failed: {e}")
+            if ingest_game(db, g, ingest, force=args.force).status == "failed":
                 failed_games.append(g.mlb_game_pk)
-                db.rollback()
 
     finally:
         db.close()
+        ingest.finish()
 
+    total_inserted = ingest.totals()[1].get("rows_written", 0)
     print(f"✅ Done. Inserted {total_inserted} total statcast events.")
+    if total_inserted:
+        if not args.no_cleanup:
+            post_ingest_cleanup()
+        post_ingest_validation()
     if failed_games:
         print(f"⚠ Failed games: {failed_games}")
-
+    print(ingest.summary_table())
+    if ingest.log_path:
+        print(f"Stage timings logged to {ingest.log_path}")
 
 if __name__ == "__main__":
     run() 
@@ -0,0 +1,372 @@
+"""Fingerprinted task graph: run only the steps whose inputs or outputs changed.
+
+A ``Task`` names the work it does (``action``), the tasks it runs after
+(``requires``) and the resources it reads (``inputs``) and writes (``outputs``).
+Every resource has a fingerprint - a query's result hash, a file's size and mtime
+or content hash - and when a task succeeds the fingerprints are stored in a JSON
+state file.  On the next run a task whose inputs and outputs still match what was
+stored is skipped as up to date; otherwise it runs, and its action is told which
+resource keys changed (``TaskRun.changed``, None when there is no usable record),
+so it can do incremental work.
+
+Fingerprints are taken after the task runs: a task that consumes its own inputs
+(enrichment fills in the rows it selects) is up to date with the state it left.
+An action returns False when its work is not finished (e.g. data not published
+upstream yet); nothing is recorded and the task runs again next time.
+
+A task with ``expand`` is a group: once its requirements are done, ``expand()``
+returns the child tasks (one per game, say) that run in its place, and the group
+is done when they are.
+
+``run_graph`` runs the selected tasks in one process on a thread pool; a task
+starts as soon as its requirements are done.  A failed task blocks everything
+downstream of it, but independent tasks still run.
+
+Used by gamelog/.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from collections.abc import Callable, Collection, Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+STATE_VERSION = 1
+FINGERPRINT_LENGTH = 16
+
+# Task outcomes; downstream tasks run after any of OK_STATUSES
+UP_TO_DATE = "up-to-date"
+RAN = "ran"
+INCOMPLETE = "incomplete"
+FAILED = "failed"
+BLOCKED = "blocked"
+STALE = "stale"  # dry runs: would run
+OK_STATUSES = (UP_TO_DATE, RAN, INCOMPLETE, STALE)
+
+
+def digest(value: Any) -> str:
+    """Short stable hash of a JSON-serialisable value."""
+    payload = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+class Resource:
+    """Something a task reads or writes; ``fingerprint`` is None when it is absent."""
+
+    key: str
+
+    def fingerprint(self) -> str | None:
+        raise NotImplementedError
+
+
+@dataclass
+class Value(Resource):
+    """A parameter of the task (output format, target directory, ...)."""
+
+    key: str
+    value: Any
+
+    def fingerprint(self) -> str | None:
+        return digest(self.value)
+
+
+@dataclass
+class Files(Resource):
+    """Files, directories (recursively) and glob patterns.
+
+    Fingerprinted by size and mtime, or by content with ``content=True`` - the
+    better choice for source files, whose mtimes change on every checkout.
+    """
+
+    key: str
+    paths: Sequence[Path | str]
+    content: bool = False
+
+    def _files(self) -> list[Path]:
+        found: set[Path] = set()
+        for pattern in self.paths:
+            for match in glob.glob(str(pattern)):
+                path = Path(match)
+                if path.is_dir():
+                    found.update(p for p in path.rglob("*") if p.is_file())
+                elif path.is_file():
+                    found.add(path)
+        return sorted(found)
+
+    def fingerprint(self) -> str | None:
+        entries = []
+        for path in self._files():
+            if self.content:
+                entries.append((str(path), hashlib.sha256(path.read_bytes()).hexdigest()))
+            else:
+                stat = path.stat()
+                entries.append((str(path), stat.st_size, stat.st_mtime_ns))
+        return digest(entries) if entries else None
+
+
+@dataclass
+class Query(Resource):
+    """The result of a read-only SQL query on the shared engine."""
+
+    key: str
+    sql: str
+    params: dict[str, Any] = field(default_factory=dict)
+
+    def fingerprint(self) -> str | None:
+        from sqlalchemy import text
+
+        from config import get_engine
+
+        with get_engine().connect() as conn:
+            rows = conn.execute(text(self.sql), self.params).all()
+        return digest([list(row) for row in rows])
+
+
+@dataclass
+class TaskRun:
+    """What an action is told about why it runs.
+
+    ``changed`` holds the input/output keys whose fingerprints differ from the last
+    successful run, or is None when there is no record of one.  ``forced`` tasks
+    run whether or not anything changed.
+    """
+
+    name: str
+    changed: set[str] | None
+    forced: bool = False
+
+    @property
+    def incremental(self) -> bool:
+        """Whether only the keys in ``changed`` need redoing, given a previous run."""
+        return self.changed is not None and not self.forced
+
+
+@dataclass
+class Task:
+    name: str
+    action: Callable[[TaskRun], bool | None] | None = None
+    requires: tuple[str, ...] = ()
+    inputs: tuple[Resource, ...] = ()
+    outputs: tuple[Resource, ...] = ()
+    expand: Callable[[], Iterable[Task]] | None = None
+
+
+@dataclass
+class TaskResult:
+    name: str
+    status: str
+    seconds: float = 0.0
+    changed: list[str] | None = None
+    error: str | None = None
+    # Groups: how many of their children ran
+    note: str | None = None
+
+    def describe(self) -> str:
+        line = f"{self.status:<10} {self.name}"
+        if self.note:
+            return f"{line} - {self.note}"
+        if self.status in (RAN, INCOMPLETE, FAILED):
+            line += f" ({self.seconds:.2f}s)"
+        if self.status in (RAN, INCOMPLETE, STALE):
+            line += (" - no previous run" if self.changed is None
+                     else f" - changed: {', '.join(self.changed)}")
+        if self.error:
+            line += f" - {self.error}"
+        return line
+
+
+class TaskState:
+    """Fingerprints of each task's last successful run, kept in a JSON file."""
+
+    def __init__(self, path: Path | str | None):
+        self.path = Path(path) if path else None
+        self.tasks: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION:
+                self.tasks = data["tasks"]
+
+    def get(self, name: str) -> dict | None:
+        with self._lock:
+            return self.tasks.get(name)
+
+    def record(self, name: str, fingerprints: dict[str, str | None], seconds: float) -> None:
+        """Store a successful run and rewrite the file, so an interrupted run keeps it."""
+        entry = {
+            "fingerprints": fingerprints,
+            "ran_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "seconds": round(seconds, 3),
+        }
+        with self._lock:
+            self.tasks[name] = entry
+            if self.path is None:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            tmp.write_text(json.dumps({"version": STATE_VERSION, "tasks": self.tasks}, indent=1))
+            os.replace(tmp, self.path)
+
+
+def fingerprints(task: Task) -> dict[str, str | None]:
+    return {res.key: res.fingerprint() for res in (*task.inputs, *task.outputs)}
+
+
+def changed_keys(task: Task, state: TaskState, current: dict[str, str | None]) -> set[str] | None:
+    """Keys whose fingerprints moved since the last recorded run (None: no record)."""
+    entry = state.get(task.name)
+    if entry is None:
+        return None
+    recorded = entry["fingerprints"]
+    return {key for key in current.keys() | recorded.keys() if current.get(key) != recorded.get(key)}
+
+
+def select(tasks: Iterable[Task], targets: Iterable[str] | None) -> dict[str, Task]:
+    """``targets`` plus everything they require, in definition order (all when None)."""
+    by_name = {task.name: task for task in tasks}
+    if targets is None:
+        return by_name
+    unknown = set(targets) - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown task(s): {', '.join(sorted(unknown))}")
+    needed: set[str] = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(by_name[name].requires)
+    missing = {dep for name in needed for dep in by_name[name].requires} - set(by_name)
+    if missing:
+        raise ValueError(f"Unknown requirement(s): {', '.join(sorted(missing))}")
+    return {name: task for name, task in by_name.items() if name in needed}
+
+
+def execute(task: Task, state: TaskState, forced: bool, dry_run: bool = False) -> TaskResult:
+    """Skip ``task`` if it is up to date, else run it and record its fingerprints."""
+    started = time.perf_counter()
+    try:
+        before = fingerprints(task)
+        changed = changed_keys(task, state, before)
+        if changed == set() and not forced:
+            return TaskResult(task.name, UP_TO_DATE)
+        changed_list = sorted(changed) if changed is not None else None
+        if dry_run:
+            return TaskResult(task.name, STALE, changed=changed_list)
+
+        complete = task.action(TaskRun(task.name, changed, forced)) if task.action else None
+        seconds = time.perf_counter() - started
+        if complete is False:
+            return TaskResult(task.name, INCOMPLETE, seconds, changed_list)
+        state.record(task.name, fingerprints(task), seconds)
+        return TaskResult(task.name, RAN, seconds, changed_list)
+    except Exception as exc:
+        traceback.print_exc()
+        return TaskResult(
+            task.name, FAILED, time.perf_counter() - started, error=f"{type(exc).__name__}: {exc}"
+        )
+
+
+def run_graph(
+    tasks: Iterable[Task],
+    targets: Iterable[str] | None = None,
+    state_path: Path | str | None = None,
+    force: Collection[str] = (),
+    jobs: int = 4,
+    dry_run: bool = False,
+    log: Callable[[str], None] | None = print,
+) -> list[TaskResult]:
+    """Run ``targets`` (default: every task) and whatever they require.
+
+    ``force`` holds task-name patterns (``fnmatch``, e.g. ``"fetch:*"``) to run even
+    when up to date.  ``dry_run`` reports what would run without running it; tasks
+    downstream of a stale one are judged on today's fingerprints, which the
+    upstream run may still change.  Returns one result per task, children of
+    groups included, in completion order.
+    """
+    state = TaskState(state_path)
+    pending = dict(select(tasks, targets))
+    done: dict[str, str] = {}
+    children: dict[str, list[str]] = {}
+    parents: dict[str, str] = {}
+    results: list[TaskResult] = []
+
+    def finish(result: TaskResult) -> None:
+        done[result.name] = result.status
+        results.append(result)
+        if log is not None and (result.status != UP_TO_DATE or dry_run):
+            log(result.describe())
+
+    def is_forced(name: str) -> bool:
+        # Forcing a group forces its children
+        names = (name, parents[name]) if name in parents else (name,)
+        return any(fnmatch.fnmatchcase(n, pattern) for n in names for pattern in force)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        running: dict[Any, str] = {}
+        while pending or running or children:
+            progressed = False
+            for name, members in list(children.items()):
+                statuses = [done.get(member) for member in members]
+                if None not in statuses:
+                    ok = all(status in OK_STATUSES for status in statuses)
+                    ran = sum(status != UP_TO_DATE for status in statuses)
+                    status = (STALE if dry_run else RAN) if ran else UP_TO_DATE
+                    finish(TaskResult(name, status if ok else BLOCKED,
+                                      note=f"{ran} of {len(statuses)} task(s) not up to date"))
+                    del children[name]
+                    progressed = True
+
+            for name, task in list(pending.items()):
+                statuses = [done.get(dep) for dep in task.requires]
+                if any(s is not None and s not in OK_STATUSES for s in statuses):
+                    del pending[name]
+                    blocker = next(d for d, s in zip(task.requires, statuses, strict=True)
+                                   if s is not None and s not in OK_STATUSES)
+                    finish(TaskResult(name, BLOCKED, error=f"{blocker} did not succeed"))
+                    progressed = True
+                elif None not in statuses:
+                    del pending[name]
+                    progressed = True
+                    if task.expand is None:
+                        running[pool.submit(execute, task, state, is_forced(name), dry_run)] = name
+                        continue
+                    try:
+                        members = list(task.expand())
+                    except Exception as exc:
+                        traceback.print_exc()
+                        finish(TaskResult(name, FAILED, error=f"{type(exc).__name__}: {exc}"))
+                        continue
+                    for member in members:
+                        pending[member.name] = member
+                        parents[member.name] = name
+                    children[name] = [member.name for member in members]
+
+            if progressed:
+                continue
+            if not running:
+                raise ValueError(f"Dependency cycle between tasks: {', '.join(sorted(pending))}")
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                del running[future]
+                finish(future.result())
+    return results
+
+
+def summarize(results: Sequence[TaskResult]) -> str:
+    counts: dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return f"{len(results)} task(s): " + ", ".join(f"{n} {s}" for s, n in sorted(counts.items()))
@@ -0,0 +1,312 @@
+"""Data validation rules, checked in one pass per table.
+
+Each ``Rule`` is a condition that flags a bad row of ``statcast_events`` or
+``games``.  ``validate`` evaluates every rule of a table in a single scan: one
+``COUNT(*) FILTER (WHERE ...)`` and one ``array_agg(id) FILTER (WHERE ...)``
+(the first ``samples`` violating ids) per rule, so adding a rule adds no scan.
+``game_pks`` scopes both scans to some games; the rules a game scope cannot
+express (an attended game without a gamePk belongs to no game) are checked over
+the whole table in one more scan.
+
+``validate_snapshot`` checks the event rules that have an Arrow form against a
+Parquet snapshot (scraper/snapshot.py) instead, vectorised over its record
+batches, so validation can run without the database.  A snapshot holds attended
+games only, so the rules about unattended and unknown games are left out.
+
+``run_validation`` with ``incremental`` checks only the games changed since the
+last clean run (the ``validation`` consumer of the change log); the checkpoint
+only moves when nothing was found, so bad games are rechecked until fixed.
+``post_ingest`` is the incremental run ingest calls when it finishes.
+
+    python -m scraper.validation [--game PK ...] [--incremental] [--snapshot DIR] [--samples N]
+
+Used by the data integrity tests, scraper/statcast_fetcher.py and the gamelog
+``validate`` task.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+
+from config import get_engine
+from scraper import profiling
+from scraper.changes import advance_checkpoint, pending_changes
+
+CONSUMER = "validation"
+SAMPLE_IDS = 5
+
+
+@dataclass(frozen=True)
+class Rule:
+    """``condition`` is true for a violating row (SQL over the table's scan).
+
+    ``arrow(batch, pc)`` is the same check as a boolean mask over a snapshot
+    record batch (nulls count as passing); None when the snapshot can't answer it.
+    ``scoped`` is False for a rule whose rows have no gamePk to scope by.
+    """
+
+    name: str
+    table: str
+    condition: str
+    description: str
+    arrow: Callable | None = None
+    scoped: bool = True
+
+
+def _outside(pc, values, low, high):
+    return pc.invert(pc.and_(pc.greater_equal(values, low), pc.less_equal(values, high)))
+
+
+RULES = (
+    Rule(
+        "wpa_in_range", "statcast_events",
+        "se.wpa IS NOT NULL AND se.wpa NOT BETWEEN -1 AND 1",
+        "WPA outside [-1, 1]",
+        lambda b, pc: _outside(pc, b["wpa"], -1.0, 1.0),
+    ),
+    Rule(
+        "batter_name_present", "statcast_events",
+        "se.batter_name IS NULL OR se.batter_name = ''",
+        "blank or missing batter_name",
+        lambda b, pc: pc.or_kleene(pc.is_null(b["batter_name"]), pc.equal(b["batter_name"], "")),
+    ),
+    Rule(
+        "launch_speed_in_range", "statcast_events",
+        "se.launch_speed IS NOT NULL AND se.launch_speed NOT BETWEEN 0 AND 130",
+        "launch_speed outside 0-130 mph",
+        lambda b, pc: _outside(pc, b["launch_speed"], 0, 130),
+    ),
+    Rule(
+        "launch_angle_in_range", "statcast_events",
+        "se.launch_angle IS NOT NULL AND se.launch_angle NOT BETWEEN -90 AND 90",
+        "launch_angle outside -90 to 90 degrees",
+        lambda b, pc: _outside(pc, b["launch_angle"], -90, 90),
+    ),
+    Rule(
+        "events_only_attended", "statcast_events",
+        "g.mlb_game_pk IS NOT NULL AND NOT g.attended",
+        "event of a game that was not attended",
+    ),
+    Rule(
+        "events_reference_games", "statcast_events",
+        "g.mlb_game_pk IS NULL",
+        "event whose mlb_game_pk matches no game",
+    ),
+    Rule(
+        "attended_games_have_pk", "games",
+        "g.attended IS TRUE AND g.date <= CURRENT_DATE AND g.mlb_game_pk IS NULL",
+        "attended game without an mlb_game_pk",
+        scoped=False,
+    ),
+    Rule(
+        "game_pk_unique", "games",
+        "g.mlb_game_pk IS NOT NULL AND g.pk_rows > 1",
+        "mlb_game_pk shared by several games",
+    ),
+    Rule(
+        "past_attended_games_have_scores", "games",
+        "g.attended IS TRUE AND g.date < CURRENT_DATE "
+        "AND (g.home_score IS NULL OR g.away_score IS NULL)",
+        "past attended game without a score",
+    ),
+)
+
+# Each table's scan; every rule condition reads from it
+SCANS = {
+    "statcast_events": """
+        FROM statcast_events se
+        LEFT JOIN (
+            SELECT mlb_game_pk, bool_or(attended IS TRUE) AS attended
+            FROM games WHERE mlb_game_pk IS NOT NULL
+            GROUP BY mlb_game_pk
+        ) g ON g.mlb_game_pk = se.mlb_game_pk
+        WHERE CAST(:game_pks AS integer[]) IS NULL
+           OR se.mlb_game_pk = ANY(CAST(:game_pks AS integer[]))
+    """,
+    "games": """
+        FROM (
+            SELECT games.*, COUNT(*) OVER (PARTITION BY mlb_game_pk) AS pk_rows
+            FROM games
+            WHERE CAST(:game_pks AS integer[]) IS NULL
+               OR mlb_game_pk = ANY(CAST(:game_pks AS integer[]))
+        ) g
+    """,
+}
+ID_COLUMNS = {"statcast_events": "se.id", "games": "g.id"}
+
+
+@dataclass
+class RuleResult:
+    rule: Rule
+    violations: int
+    sample_ids: list[int]
+
+
+@dataclass
+class ValidationReport:
+    """Violations per rule, and the rows each table scan covered."""
+
+    source: str
+    results: dict[str, RuleResult] = field(default_factory=dict)
+    scanned: dict[str, int] = field(default_factory=dict)
+    # Games checked; None for every game
+    game_pks: set[int] | None = None
+    # Rules checked over every game although ``game_pks`` is set
+    unscoped: list[str] = field(default_factory=list)
+
+    def violations(self, rule: str) -> int:
+        return self.results[rule].violations
+
+    def failures(self) -> list[RuleResult]:
+        return [result for result in self.results.values() if result.violations]
+
+    def describe(self, rule: str) -> str:
+        result = self.results[rule]
+        ids = ", ".join(map(str, result.sample_ids))
+        sample = f" (e.g. {result.rule.table} id {ids})" if ids else ""
+        return f"{rule}: {result.violations} x {result.rule.description}{sample}"
+
+    def summary(self) -> str:
+        scope = "all games" if self.game_pks is None else f"{len(self.game_pks)} game(s)"
+        scanned = ", ".join(f"{n} {table}" for table, n in self.scanned.items())
+        failed = self.failures()
+        if self.unscoped:
+            scanned += f"; {', '.join(self.unscoped)} over all games"
+        verdict = f"{len(failed)} of {len(self.results)} rule(s) failed" if failed else (
+            f"all {len(self.results)} rules passed")
+        return f"validation of {scope} in {self.source} ({scanned}): {verdict}"
+
+
+def table_sql(table: str, rules: Sequence[Rule], samples: int = SAMPLE_IDS):
+    """The single scan of ``table`` that evaluates every one of ``rules``."""
+    id_column = ID_COLUMNS[table]
+    columns = ["COUNT(*) AS scanned"]
+    for rule in rules:
+        columns.append(f"COUNT(*) FILTER (WHERE {rule.condition}) AS {rule.name}")
+        columns.append(
+            f"(array_agg({id_column} ORDER BY {id_column}) FILTER (WHERE {rule.condition}))"
+            f"[1:{samples}] AS {rule.name}__ids"
+        )
+    return text("SELECT " + ",\n       ".join(columns) + SCANS[table])
+
+
+def validate(conn, game_pks=None, rules: Sequence[Rule] = RULES,
+             samples: int = SAMPLE_IDS) -> ValidationReport:
+    """Check ``rules`` against the database, one scan per table.
+
+    With ``game_pks``, the unscoped rules of a table get one more, unscoped scan.
+    """
+    report = ValidationReport(
+        "database", game_pks=None if game_pks is None else set(game_pks)
+    )
+    params = {"game_pks": None if game_pks is None else sorted(game_pks)}
+    for table in SCANS:
+        table_rules = [rule for rule in rules if rule.table == table]
+        unscoped = [] if game_pks is None else [rule for rule in table_rules if not rule.scoped]
+        scoped = [rule for rule in table_rules if rule not in unscoped]
+        if scoped:
+            row = conn.execute(table_sql(table, scoped, samples), params).mappings().one()
+            report.scanned[table] = row["scanned"]
+            _add_results(report, scoped, row)
+        if unscoped:
+            row = conn.execute(table_sql(table, unscoped, samples),
+                               {"game_pks": None}).mappings().one()
+            report.unscoped += [rule.name for rule in unscoped]
+            _add_results(report, unscoped, row)
+    return report
+
+
+def _add_results(report: ValidationReport, rules: Sequence[Rule], row) -> None:
+    for rule in rules:
+        report.results[rule.name] = RuleResult(
+            rule, row[rule.name], list(row[f"{rule.name}__ids"] or [])
+        )
+
+
+def validate_snapshot(source, game_pks=None, rules: Sequence[Rule] = RULES,
+                      samples: int = SAMPLE_IDS) -> ValidationReport:
+    """Check the event rules with an Arrow form against a ``SnapshotSource``."""
+    import pyarrow.compute as pc
+
+    rules = [rule for rule in rules if rule.table == "statcast_events" and rule.arrow]
+    report = ValidationReport(str(source), game_pks=None if game_pks is None else set(game_pks))
+    results = {rule.name: RuleResult(rule, 0, []) for rule in rules}
+    scanned = 0
+    columns = ["id", "wpa", "batter_name", "launch_speed", "launch_angle"]
+    for batch in source.event_batches(game_pks, columns=columns):
+        scanned += batch.num_rows
+        for rule in rules:
+            mask = pc.fill_null(rule.arrow(batch, pc), False)
+            result = results[rule.name]
+            result.violations += pc.sum(mask).as_py() or 0
+            if len(result.sample_ids) < samples:
+                ids = pc.filter(batch["id"], mask).to_pylist()
+                result.sample_ids = sorted(result.sample_ids + ids)[:samples]
+    report.scanned["statcast_events"] = scanned
+    report.results = results
+    return report
+
+
+def run_validation(incremental: bool = True, engine=None) -> ValidationReport:
+    """Validate the games changed since the last clean run (or every game).
+
+    Without a checkpoint an incremental run checks every game.
+    """
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        changed, upto = pending_changes(conn, CONSUMER)
+        report = validate(conn, changed if incremental else None)
+        if not report.failures():
+            advance_checkpoint(conn, CONSUMER, upto)
+    return report
+
+
+def print_report(report: ValidationReport) -> None:
+    print(f"🔎 {report.summary()}")
+    for result in report.failures():
+        print(f"  ❌ {report.describe(result.rule.name)}")
+
+
+def post_ingest(engine=None) -> ValidationReport:
+    """The hook ingest runs when it is done: an incremental validation, reported."""
+    report = run_validation(incremental=True, engine=engine)
+    print_report(report)
+    return report
+
+
+@profiling.entry_point("validation")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the data validation rules in one pass.")
+    parser.add_argument("--game", type=int, nargs="+", metavar="PK", help="Only these games")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only games changed since the last clean run")
+    parser.add_argument("--snapshot", metavar="DIR",
+                        help="Check a Parquet snapshot instead of the database")
+    parser.add_argument("--samples", type=int, default=SAMPLE_IDS,
+                        help="Violating ids to show per rule")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        from scraper.snapshot import SnapshotSource
+
+        try:
+            source = SnapshotSource(args.snapshot)
+        except (FileNotFoundError, ValueError) as exc:
+            parser.error(str(exc))
+        report = validate_snapshot(source, args.game, samples=args.samples)
+    elif args.incremental:
+        report = run_validation(incremental=True)
+    else:
+        with get_engine().connect() as conn:
+            report = validate(conn, args.game, samples=args.samples)
+    print_report(report)
+    sys.exit(1 if report.failures() else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,167 +5,307 @@ Usage:
     python scripts/export_json.py <output_dir>
 
 The script expects DATABASE_URL env var pointing to the same DB used by the ingester.
+The datasets are stages of the unified export pipeline (scripts/export_pipeline.py);
+this script runs just these stages.
+
+pandas is imported by the DataFrame-producing stages when they run, not with the
+module: the pipeline imports every stage, and most runs never need it.
 """
+from __future__ import annotations
+
+import heapq
+import json
 import sys
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
 from sqlalchemy import text
 
-from config import engine, is_barrel
+from config import get_engine, is_barrel
+from scraper import profiling
+from scraper.artifacts import write_text_atomic
 from scraper.players import resolve_pitcher_display
+from scripts.export_pipeline import (
+    GameStage,
+    Stage,
+    merge_top,
+    replace_games,
+    run_pipeline,
+    write_rows,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+JSON_STAGES = ("games", "longest_homers", "wpa_leaders", "wpa_sparkline", "barrel_map")
+
 
 def dump(df: pd.DataFrame, out_path: Path):
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_json(out_path, orient="records", date_format="iso")
-    print(f"Wrote {len(df):,} rows → {out_path.relative_to(Path.cwd())}")
+    write_text_atomic(out_path, df.to_json(orient="records", date_format="iso"))
+    print(f"Wrote {len(df):,} rows → {_shown(out_path)}")
 
 
-def export_all(out_dir: Path):
-    # Games table (basic fields for listing)
-    games_sql = text(
-        """
-        SELECT mlb_game_pk       AS game_pk,
-               date,
-               home_team,
-               away_team,
-               home_score,
-               away_score,
-               attended
-        FROM games
-        WHERE attended IS TRUE
-        ORDER BY date DESC;
-        """
-    )
-    games = pd.read_sql(games_sql, engine)
-    # Transform score format to always show high-low score
-    # Note: We keep the original home/away team and score fields for context
-    # The display logic in frontend will use max/min for score display
-    dump(games, out_dir / "games.json")
-
-    # Longest home runs (top 100 by distance)
-    longest_hr_sql = text(
-        """
-        SELECT se.mlb_game_pk AS game_pk,
-               se.batter_name,
-               se.pitcher_name,
-               se.hit_distance_sc AS distance,
-               se.launch_speed,
-               se.launch_angle,
-               g.date,
-               g.home_team,
-               g.away_team
-        FROM statcast_events se
-        JOIN games g ON g.mlb_game_pk = se.mlb_game_pk
-        WHERE g.attended IS TRUE
-          AND se.event_type = 'home_run'
-          AND se.hit_distance_sc IS NOT NULL
-        ORDER BY se.hit_distance_sc DESC
-        LIMIT 100;
-        """
-    )
-    longest_hrs = pd.read_sql(longest_hr_sql, engine)
-    
-    # Resolve pitcher IDs to names
-    print("Resolving pitcher names...")
-    longest_hrs['pitcher_name'] = longest_hrs['pitcher_name'].apply(resolve_pitcher_display)
-    
-    dump(longest_hrs, out_dir / "longest_homers.json")
-
-    # Lifetime WPA leaders (top 25)
-    wpa_sql = text(
+def _shown(out_path: Path) -> Path:
+    return out_path.relative_to(Path.cwd()) if out_path.is_relative_to(Path.cwd()) else out_path
+
+
+def categorize_outcome(event_type):
+    if not event_type:
+        return "hit"
+    event_type = event_type.lower()
+    if event_type == "home_run":
+        return "home_run"
+    elif any(word in event_type for word in ["out", "error", "fielders_choice"]):
+        return "out"
+    elif event_type in ["single", "double", "triple"]:
+        return "hit"
+    else:
+        return "hit"
+
+
+def iso_datetime(value) -> str:
+    """Format a date as ``dump`` does (pandas ISO datetime with milliseconds)."""
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="milliseconds")
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).isoformat(timespec="milliseconds")
+    import pandas as pd
+
+    return pd.Timestamp(value).isoformat(timespec="milliseconds")
+
+
+def frame_records(df: pd.DataFrame) -> list[dict]:
+    """Return ``df`` as the records ``dump`` would write (ISO date strings etc.)."""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+class _FrameStage(Stage):
+    """Stage whose result is a DataFrame dumped to ``<out_dir>/<name>.json``."""
+
+    @property
+    def output(self):
+        return f"{self.name}.json"
+
+    def write(self, result: pd.DataFrame, ctx) -> None:
+        dump(result, ctx.out_dir / self.output)
+
+
+class _GameRowsStage(GameStage):
+    """Per-game stage streamed to ``<out_dir>/<name>.json`` in ``dump``'s compact layout."""
+
+    @property
+    def output(self):
+        return f"{self.name}.json"
+
+    def merge(self, existing, partial, ctx):
+        return replace_games(existing, partial, ctx)
+
+    def write(self, result, ctx) -> None:
+        out_path = ctx.out_dir / self.output
+        count = write_rows(result, out_path, ctx, separators=(",", ":"))
+        print(f"Wrote {count:,} rows → {_shown(out_path)}")
+
+
+class GamesStage(_FrameStage):
+    """Games table (basic fields for listing)."""
+
+    name = "games"
+    uses_events = False
+
+    def finish(self, ctx):
+        import pandas as pd
+
+        # The frontend display logic uses max/min for the score, so the original
+        # home/away team and score fields are kept for context.
+        return pd.DataFrame(
+            [
+                {
+                    "game_pk": g["mlb_game_pk"],
+                    "date": g["date"],
+                    "home_team": g["home_team"],
+                    "away_team": g["away_team"],
+                    "home_score": g["home_score"],
+                    "away_score": g["away_score"],
+                    "attended": g["attended"],
+                }
+                for g in ctx.games
+            ]
+        )
+
+
+class LongestHomersStage(_FrameStage):
+    """Longest home runs (top 100 by distance)."""
+
+    name = "longest_homers"
+    limit = 100
+
+    def __init__(self):
+        self.top = []
+        self.seen = 0
+
+    def feed(self, rows):
+        # Only the running top-N is kept.  Rows arrive newest game first, so the
+        # arrival sequence breaks distance ties towards the newer game, as in merge_top.
+        candidates = []
+        for r in rows:
+            if r["event_type"] == "home_run" and r["hit_distance_sc"] is not None:
+                candidates.append((-r["hit_distance_sc"], self.seen, r))
+                self.seen += 1
+        self.top = heapq.nsmallest(self.limit, self.top + candidates, key=lambda c: c[:2])
+
+    def finish(self, ctx):
+        import pandas as pd
+
+        print("Resolving pitcher names...")
+        return pd.DataFrame(
+            [
+                {
+                    "game_pk": r["mlb_game_pk"],
+                    "batter_name": r["batter_name"],
+                    "pitcher_name": resolve_pitcher_display(r["pitcher_name"]),
+                    "distance": r["hit_distance_sc"],
+                    "launch_speed": r["launch_speed"],
+                    "launch_angle": r["launch_angle"],
+                    "date": r["date"],
+                    "home_team": r["home_team"],
+                    "away_team": r["away_team"],
+                }
+                for _, _, r in self.top
+            ]
+        )
+
+    def merge(self, existing, partial, ctx):
+        import pandas as pd
+
+        merged = merge_top(
+            existing, frame_records(partial), ctx, self.limit, lambda r: -r["distance"]
+        )
+        return None if merged is None else pd.DataFrame(merged)
+
+
+class WpaLeadersStage(_FrameStage):
+    """Lifetime WPA leaders (top 25)."""
+
+    name = "wpa_leaders"
+    limit = 25
+
+    # Lifetime totals span every game, so incremental exports let the database
+    # re-aggregate instead of scanning all events.  Both paths add exact decimals
+    # (each WPA as numeric, i.e. to 15 significant digits), round half away from
+    # zero and break ties by code point, so they agree whatever the row order.
+    LIFETIME_WPA_SQL = text(
         """
         SELECT batter_name,
-               ROUND(SUM(wpa)::numeric, 3) AS lifetime_wpa
+               ROUND(SUM(wpa::numeric), 3)::float AS lifetime_wpa
         FROM statcast_events se
         JOIN games g USING (mlb_game_pk)
         WHERE g.attended IS TRUE
           AND wpa IS NOT NULL
         GROUP BY batter_name
-        ORDER BY lifetime_wpa DESC
-        LIMIT 25;
-        """
-    )
-    wpa = pd.read_sql(wpa_sql, engine)
-    dump(wpa, out_dir / "wpa_leaders.json")
-
-    # WPA sparkline per game (cumulative over plays)
-    spark_data = []
-    with engine.connect() as conn:
-        game_pks = [row[0] for row in conn.execute(text("SELECT mlb_game_pk FROM games WHERE attended IS TRUE"))]
-        for pk in game_pks:
-            df = pd.read_sql(
-                text(
-                    """
-                    SELECT event_datetime, wpa
-                    FROM statcast_events
-                    WHERE mlb_game_pk = :pk AND wpa IS NOT NULL
-                    ORDER BY event_datetime
-                    """
-                ),
-                conn,
-                params={"pk": pk},
-            )
-            if df.empty:
-                continue
-            df["cum"] = df["wpa"].cumsum().round(3)
-            spark_data.append({"game_pk": pk, "series": df["cum"].tolist()})
-
-    dump(pd.DataFrame(spark_data), out_dir / "wpa_sparkline.json")
-
-    # Barrel map data (exit velocity vs launch angle)
-    barrel_sql = text(
-        """
-        SELECT se.launch_speed,
-               se.launch_angle,
-               se.batter_name,
-               se.pitcher_name,
-               se.event_type,
-               se.raw_description,
-               g.date,
-               g.home_team,
-               g.away_team
-        FROM statcast_events se
-        JOIN games g ON g.mlb_game_pk = se.mlb_game_pk
-        WHERE g.attended IS TRUE
-          AND se.launch_speed IS NOT NULL
-          AND se.launch_angle IS NOT NULL
-        ORDER BY g.date DESC, se.event_datetime;
+        ORDER BY lifetime_wpa DESC, batter_name COLLATE "C" NULLS FIRST
+        LIMIT :limit;
         """
     )
-    barrel_data = pd.read_sql(barrel_sql, engine)
-    
-    # Resolve pitcher IDs to names
-    print("Resolving pitcher names in barrel map data...")
-    barrel_data['pitcher_name'] = barrel_data['pitcher_name'].apply(resolve_pitcher_display)
-    
-    # Add outcome categorization
-    def categorize_outcome(event_type):
-        if not event_type:
-            return "hit"
-        event_type = event_type.lower()
-        if event_type == "home_run":
-            return "home_run"
-        elif any(word in event_type for word in ["out", "error", "fielders_choice"]):
-            return "out"
-        elif event_type in ["single", "double", "triple"]:
-            return "hit"
-        else:
-            return "hit"
-    
-    def _is_barrel_row(row):
-        return is_barrel(row["launch_angle"], row["launch_speed"])
-    
-    barrel_data['outcome'] = barrel_data['event_type'].apply(categorize_outcome)
-    barrel_data['is_barrel'] = barrel_data.apply(_is_barrel_row, axis=1)
-    barrel_data['matchup'] = barrel_data['away_team'] + ' @ ' + barrel_data['home_team']
-    barrel_data['description'] = barrel_data['event_type'].fillna(barrel_data['raw_description'])
-    
-    dump(barrel_data, out_dir / "barrel_map.json")
 
+    def __init__(self):
+        self.totals = defaultdict(Decimal)
 
-if __name__ == "__main__":
+    def feed(self, rows):
+        for r in rows:
+            if r["wpa"] is not None:
+                # float8 -> numeric in Postgres keeps 15 significant digits
+                self.totals[r["batter_name"]] += Decimal(format(r["wpa"], ".15g"))
+
+    def scope(self, ctx):
+        return set() if ctx.incremental else None
+
+    def finish(self, ctx):
+        import pandas as pd
+
+        leaders = sorted(
+            (
+                (batter, float(total.quantize(Decimal("0.001"), rounding=ROUND_HALF_UP)))
+                for batter, total in self.totals.items()
+            ),
+            key=lambda item: (-item[1], item[0] is not None, item[0] or ""),
+        )[: self.limit]
+        return pd.DataFrame(leaders, columns=["batter_name", "lifetime_wpa"])
+
+    def merge(self, existing, partial, ctx):
+        import pandas as pd
+
+        with get_engine().connect() as conn:
+            rows = conn.execute(self.LIFETIME_WPA_SQL, {"limit": self.limit}).fetchall()
+        return pd.DataFrame([tuple(r) for r in rows], columns=["batter_name", "lifetime_wpa"])
+
+
+class WpaSparklineStage(_GameRowsStage):
+    """WPA sparkline per game (cumulative over plays).
+
+    The running total comes from the scan's ``cum_wpa`` window column, so this stage
+    only picks out the points.
+    """
+
+    name = "wpa_sparkline"
+
+    def keep(self, row):
+        return row["wpa"] is not None
+
+    def build_games(self, games):
+        import numpy as np
+
+        for pk, rows in games:
+            points = sorted(rows, key=lambda r: (r["event_datetime"], r["id"]))
+            # NumPy rounding (what pandas' Series.round does), as the sparkline has
+            # always been rounded; "+ 0.0" writes -0.0 as 0.0, as pandas' JSON writer did
+            series = np.round(np.array([r["cum_wpa"] for r in points], dtype=float), 3) + 0.0
+            yield {"game_pk": pk, "series": series.tolist()}
+
+
+class BarrelMapStage(_GameRowsStage):
+    """Barrel map data (exit velocity vs launch angle)."""
+
+    name = "barrel_map"
+
+    def keep(self, row):
+        return row["launch_speed"] is not None and row["launch_angle"] is not None
+
+    def build_games(self, games):
+        for pk, rows in games:
+            # Chronological within a game
+            for r in sorted(rows, key=lambda r: (r["event_datetime"], r["id"])):
+                yield {
+                    "launch_speed": r["launch_speed"],
+                    "launch_angle": r["launch_angle"],
+                    "batter_name": r["batter_name"],
+                    "pitcher_name": resolve_pitcher_display(r["pitcher_name"]),
+                    "event_type": r["event_type"],
+                    "raw_description": r["raw_description"],
+                    "date": iso_datetime(r["date"]),
+                    "home_team": r["home_team"],
+                    "away_team": r["away_team"],
+                    "outcome": categorize_outcome(r["event_type"]),
+                    "is_barrel": is_barrel(r["launch_angle"], r["launch_speed"]),
+                    "matchup": f"{r['away_team']} @ {r['home_team']}",
+                    "description": r["event_type"] if r["event_type"] is not None else r["raw_description"],
+                    "game_pk": pk,
+                }
+
+
+def export_all(out_dir: Path):
+    run_pipeline(out_dir, only=JSON_STAGES)
+
+
+@profiling.entry_point("export_json")
+def main():
     if len(sys.argv) != 2:
-        print("Usage: export_json.py <output_dir>")
+        print("Usage: export_json.py <output_dir> [--profile MODES]")
         sys.exit(1)
-    export_all(Path(sys.argv[1]).resolve()) 
\ No newline at end of file
+    export_all(Path(sys.argv[1]).resolve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""Single-pass export of every web/public artifact.
+
+Usage:
+    python scripts/export_pipeline.py [output_dir] [--only STAGE ...] [--incremental]
+                                      [--format {json,columnar}] [--snapshot DIR]
+
+Every artifact (games.json, heartbeat_data.json, drama_index.json, ...) is a
+``Stage`` defined next to the script that used to produce it.  The pipeline loads
+the attended games once, scans the attended ``statcast_events JOIN games`` rows once,
+feeds each chunk of rows to every stage, and then finishes the stages in dependency
+order - stages whose dependencies are satisfied run in parallel.
+
+``--only`` restricts the run to the named stages; their dependencies are still
+computed (e.g. ``season_stats`` needs the ``heartbeat`` drama scores) but are only
+written when requested too.
+
+``--incremental`` only scans the games recorded in ``game_changes`` since the last
+export (see scraper/changes.py).  Each stage rebuilds the pieces those games affect
+and merges them into its existing artifact; a stage that cannot merge exactly (no
+existing artifact, or a changed game sat inside a top-N list) falls back to a full
+rebuild of just that stage.
+
+The scan runs on a server-side cursor and the per-game artifacts (barrel map,
+spray chart, sparkline, heartbeat) are built one batch of games at a time and
+spooled to disk, then streamed out with an incremental JSON writer - so a full
+export's memory is bounded by a batch of games, not by the number of events.
+Incremental merges and ``--format columnar`` still hold one artifact in memory.
+
+``--snapshot DIR`` reads the games and events from a Parquet snapshot written by
+``python -m scraper.snapshot`` instead of Postgres, so the export needs no database.
+
+``--format columnar`` writes the large row-array artifacts (barrel_map.json,
+spray_chart.json, heartbeat_data.json and the heartbeat shards) as dictionary-encoded
+columnar tables (see scraper/columnar.py) instead of arrays of objects.  The web
+components read either form.
+
+Artifacts are written atomically and left untouched when their content is
+unchanged.  After the stages finish, every written artifact is published as a
+content-hashed copy with ``.gz``/``.br`` siblings and listed in ``manifest.json``
+(see scraper/artifacts.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any
+
+from config import get_engine
+from scraper import profiling
+from scraper.artifacts import publish, write_json_array_atomic, write_json_atomic
+from scraper.changes import advance_checkpoint, log_position, pending_changes
+from scraper.columnar import decode_columnar, encode_columnar
+from scraper.snapshot import DatabaseSource, SnapshotSource
+
+DEFAULT_OUT_DIR = Path("web/public")
+SCAN_CHUNK_SIZE = 10_000
+# Per-game stages build output for a batch of complete games once it holds this many rows
+GAME_BATCH_ROWS = 10_000
+# consumer_checkpoints row tracking which game changes have been exported
+EXPORT_CONSUMER = "export_pipeline"
+ARTIFACT_FORMATS = ("json", "columnar")
+
+@dataclass
+class ExportContext:
+    """Shared inputs and finished stage results, keyed by stage name.
+
+    ``changed_pks`` is None for a full export, or the games being rebuilt by an
+    incremental one.  ``format`` is one of ``ARTIFACT_FORMATS``.
+    """
+
+    games: list[Mapping]
+    out_dir: Path
+    changed_pks: set[int] | None = None
+    format: str = "json"
+    # Where the attended games and events are read from (DatabaseSource/SnapshotSource)
+    source: Any = field(default_factory=lambda: DatabaseSource(get_engine()))
+    results: dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # Position of each attended game in newest-first order, for ordering merges
+        self.game_rank = {g["mlb_game_pk"]: i for i, g in enumerate(self.games)}
+
+    @property
+    def incremental(self) -> bool:
+        return self.changed_pks is not None
+
+    @property
+    def columnar(self) -> bool:
+        return self.format == "columnar"
+
+
+class Stage:
+    """One exported artifact.
+
+    Subclasses set ``name`` and ``output`` (and ``requires`` for stages that consume
+    another stage's result), collect what they need in ``feed`` and build their
+    result in ``finish``.  ``write`` persists the result under ``ctx.out_dir``.
+
+    For incremental exports a stage is fed only the rows of the games in ``scope``
+    and ``merge`` combines its partial result with the existing artifact.
+    """
+
+    name: str = ""
+    output: str = ""
+    requires: tuple[str, ...] = ()
+    # Stages that only need the games table skip the event scan entirely.
+    uses_events: bool = True
+
+    def feed(self, rows: Sequence[Mapping]) -> None:
+        """Consume one chunk of attended-event rows (``scraper.snapshot.ATTENDED_EVENTS_SQL``)."""
+
+    def finish(self, ctx: ExportContext) -> Any:
+        raise NotImplementedError
+
+    def write(self, result: Any, ctx: ExportContext) -> None:
+        raise NotImplementedError
+
+    def artifacts(self, result: Any, ctx: ExportContext) -> list[Path]:
+        """Files ``write`` produced for ``result``, to publish in the manifest."""
+        return [ctx.out_dir / self.output]
+
+    def scope(self, ctx: ExportContext) -> set[int] | None:
+        """Games whose rows this stage needs (None = all attended games)."""
+        return ctx.changed_pks
+
+    def load(self, out_dir: Path) -> Any:
+        """Return the previously exported artifact, or None if there is none.
+
+        Columnar artifacts are decoded back to rows, so merges work on either format.
+        """
+        path = out_dir / self.output
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return decode_columnar(json.load(f))
+
+    def merge(self, existing: Any, partial: Any, ctx: ExportContext) -> Any:
+        """Merge the result for ``ctx.changed_pks`` into ``existing``.
+
+        Returns None when an exact merge is impossible; the stage is then rebuilt
+        from a full scan.
+        """
+        return None
+
+
+class Spool(Sequence):
+    """Disk-backed, append-only list of JSON records.
+
+    Memory holds one file offset per record; records are read back on access.
+    ``reordered`` returns a view over the same file in another order.
+    """
+
+    def __init__(self, _file=None, _offsets=None, _lock=None):
+        self._file = _file if _file is not None else tempfile.TemporaryFile()  # noqa: SIM115
+        self._offsets: list[int] = _offsets if _offsets is not None else []
+        self._lock = _lock if _lock is not None else threading.Lock()
+
+    def append(self, record) -> None:
+        line = json.dumps(record).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.seek(0, 2)
+            self._offsets.append(self._file.tell())
+            self._file.write(line)
+
+    def extend(self, records: Iterable) -> None:
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        with self._lock:
+            self._file.seek(self._offsets[index])
+            return json.loads(self._file.readline())
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def reordered(self, order: Iterable[int]) -> Spool:
+        """View of the records at positions ``order`` (e.g. a sort permutation)."""
+        return Spool(self._file, [self._offsets[i] for i in order], self._lock)
+
+
+class GameStage(Stage):
+    """Stage whose artifact is built per game, in scan (newest game first) order.
+
+    The scan is grouped by game, so a game's rows are complete once the next game's
+    begin.  Complete games are handed to ``build_games`` in batches of about
+    ``GAME_BATCH_ROWS`` rows and the output records go straight to a ``Spool``;
+    ``finish`` returns that spool.
+    """
+
+    def __init__(self):
+        self.spool = Spool()
+        self._batch: list[tuple[int, list]] = []
+        self._batch_rows = 0
+
+    def keep(self, row: Mapping) -> bool:
+        """Whether ``build_games`` needs this scan row."""
+        return True
+
+    def build_games(self, games: list[tuple[int, list]]) -> Iterable[dict]:
+        """Output records for complete ``(game_pk, rows)`` games, in order."""
+        raise NotImplementedError
+
+    def feed(self, rows):
+        for row in rows:
+            pk = row["mlb_game_pk"]
+            if not self._batch or self._batch[-1][0] != pk:
+                if self._batch_rows >= GAME_BATCH_ROWS:
+                    self._flush()
+                self._batch.append((pk, []))
+            if self.keep(row):
+                self._batch[-1][1].append(row)
+                self._batch_rows += 1
+
+    def _flush(self) -> None:
+        games = [(pk, rows) for pk, rows in self._batch if rows]
+        if games:
+            self.spool.extend(self.build_games(games))
+        self._batch, self._batch_rows = [], 0
+
+    def finish(self, ctx):
+        self._flush()
+        return self.spool
+
+
+def write_rows(rows: Iterable[Mapping], path: Path, ctx: ExportContext, **dump_kwargs) -> int:
+    """Write a row-array artifact in ``ctx.format``; return the row count.
+
+    Plain JSON is streamed row by row; the columnar encoding needs every row at once.
+    """
+    if ctx.columnar:
+        rows = list(rows)
+        write_columnar(rows, path)
+        return len(rows)
+    return write_json_array_atomic(path, rows, **dump_kwargs)[1]
+
+
+def write_columnar(rows: Sequence[Mapping], path: Path) -> None:
+    """Write ``rows`` as a compact columnar-dict table (see scraper/columnar.py)."""
+    write_json_atomic(path, encode_columnar(rows), separators=(",", ":"))
+
+
+def replace_games(
+    existing: list[dict], partial: list[dict], ctx: ExportContext, key: str = "game_pk"
+) -> list[dict]:
+    """Swap the changed games' rows in a per-game artifact, keeping newest-first order.
+
+    Rows of games that are no longer attended are dropped.  The sort is stable, so
+    rows within a game keep their existing order.
+    """
+    kept = [
+        row for row in existing
+        if row[key] not in ctx.changed_pks and row[key] in ctx.game_rank
+    ]
+    return sorted([*kept, *partial], key=lambda row: ctx.game_rank[row[key]])
+
+
+def merge_top(
+    existing: list[dict],
+    partial: list[dict],
+    ctx: ExportContext,
+    limit: int,
+    sort_key,
+    key: str = "game_pk",
+) -> list[dict] | None:
+    """Merge a top-``limit`` artifact, or return None if that cannot be done exactly.
+
+    Exact only if no changed game had a row in a full list: otherwise the rows
+    ranked just below the cut-off, which were never exported, might belong in it.
+    Ties are broken newest game first, as in a full export.
+    """
+    if len(existing) >= limit and any(row[key] in ctx.changed_pks for row in existing):
+        return None
+    kept = [row for row in existing if row[key] not in ctx.changed_pks]
+    merged = sorted(kept + partial, key=lambda row: (sort_key(row), ctx.game_rank.get(row[key], -1)))
+    return merged[:limit]
+
+
+def default_stages() -> list[Stage]:
+    """Return a fresh instance of every export stage."""
+    from scripts.export_heartbeat_data import HeartbeatStage
+    from scripts.export_json import (
+        BarrelMapStage,
+        GamesStage,
+        LongestHomersStage,
+        WpaLeadersStage,
+        WpaSparklineStage,
+    )
+    from scripts.export_season_stats import SeasonStatsStage
+    from scripts.export_spray_chart import SprayChartStage
+    from scripts.export_wpa_drama import DramaIndexStage
+
+    return [
+        GamesStage(),
+        LongestHomersStage(),
+        WpaLeadersStage(),
+        WpaSparklineStage(),
+        BarrelMapStage(),
+        HeartbeatStage(),
+        DramaIndexStage(),
+        SeasonStatsStage(),
+        SprayChartStage(),
+    ]
+
+
+def select_stages(stages: Iterable[Stage], only: Iterable[str] | None) -> tuple[list[Stage], set[str]]:
+    """Return (stages to run, names to write) for ``only`` plus its dependencies."""
+    by_name = {stage.name: stage for stage in stages}
+    wanted = set(by_name) if only is None else set(only)
+    unknown = wanted - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown export stage(s): {', '.join(sorted(unknown))}")
+
+    needed: set[str] = set()
+    pending = list(wanted)
+    while pending:
+        name = pending.pop()
+        if name in needed:
+            continue
+        needed.add(name)
+        pending.extend(by_name[name].requires)
+    return [stage for stage in by_name.values() if stage.name in needed], wanted
+
+
+def dependency_levels(stages: Sequence[Stage]) -> list[list[Stage]]:
+    """Group stages into levels; every stage's dependencies are in earlier levels."""
+    remaining = {stage.name: stage for stage in stages}
+    done: set[str] = set()
+    levels = []
+    while remaining:
+        ready = [s for s in remaining.values() if all(dep in done for dep in s.requires)]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {', '.join(sorted(remaining))}")
+        levels.append(ready)
+        for stage in ready:
+            done.add(stage.name)
+            del remaining[stage.name]
+    return levels
+
+
+def scan_events(
+    stages: Sequence[Stage], ctx: ExportContext, chunk_size: int = SCAN_CHUNK_SIZE
+) -> int:
+    """Feed the attended-events scan to every stage in chunks; return the row count.
+
+    Each stage only sees the rows of the games in its ``scope``; the scan itself
+    covers the union of those games.
+    """
+    scopes = {stage.name: stage.scope(ctx) for stage in stages if stage.uses_events}
+    if not scopes:
+        return 0
+    game_pks = None
+    if all(scope is not None for scope in scopes.values()):
+        game_pks = sorted(set().union(*scopes.values()))
+        if not game_pks:
+            return 0
+    consumers = [stage for stage in stages if stage.name in scopes]
+
+    total = 0
+    for chunk in ctx.source.events(game_pks, chunk_size):
+        total += len(chunk)
+        for stage in consumers:
+            scope = scopes[stage.name]
+            if scope is None:
+                stage.feed(chunk)
+            else:
+                rows = [row for row in chunk if row["mlb_game_pk"] in scope]
+                if rows:
+                    stage.feed(rows)
+    return total
+
+
+def rebuild_stage(stage: Stage, ctx: ExportContext) -> tuple[Any, ExportContext]:
+    """Recompute one stage from a full scan, for when an incremental merge can't."""
+    fresh = type(stage)()
+    full_ctx = replace(ctx, changed_pks=None, results=ctx.results)
+    scan_events([fresh], full_ctx)
+    return fresh.finish(full_ctx), full_ctx
+
+
+def run_pipeline(
+    out_dir: Path = DEFAULT_OUT_DIR,
+    only: Iterable[str] | None = None,
+    stages: Iterable[Stage] | None = None,
+    max_workers: int = 4,
+    incremental: bool = False,
+    format: str = "json",
+    snapshot: Path | None = None,
+) -> dict[str, Any]:
+    """Run the export and return every computed stage result by name.
+
+    The export checkpoint is advanced only when every stage ran, so a partial
+    (``only``) export never hides changes from the next incremental one.  With
+    ``snapshot`` the data is read from that Parquet snapshot and the database is
+    not used at all (so neither incremental exports nor the checkpoint apply).
+    """
+    if format not in ARTIFACT_FORMATS:
+        raise ValueError(f"Unknown artifact format: {format}")
+    if snapshot is not None and incremental:
+        raise ValueError("Incremental exports need the database's change log, not a snapshot")
+    selected, to_write = select_stages(stages if stages is not None else default_stages(), only)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    changed_pks = upto = None
+    if snapshot is not None:
+        source = SnapshotSource(snapshot)
+    else:
+        source = DatabaseSource(get_engine())
+        with get_engine().connect() as conn:
+            if incremental:
+                changed_pks, upto = pending_changes(conn, EXPORT_CONSUMER)
+                if changed_pks is None:
+                    print("No export checkpoint yet - running a full export")
+                elif not changed_pks:
+                    print("No game changes since the last export")
+                    return {}
+                else:
+                    print(f"Incremental export of {len(changed_pks)} changed game(s)")
+            else:
+                upto = log_position(conn)
+
+    games = source.games()
+    ctx = ExportContext(
+        games=games, out_dir=out_dir, changed_pks=changed_pks, format=format, source=source
+    )
+    scanned = scan_events(selected, ctx)
+    print(f"Scanned {len(games)} attended games / {scanned:,} events from {source} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+    def finish(stage: Stage) -> tuple[str, Any]:
+        result = stage.finish(ctx)
+        write_ctx = ctx
+        if ctx.incremental and stage.uses_events:
+            existing = stage.load(out_dir)
+            merged = stage.merge(existing, result, ctx) if existing is not None else None
+            if merged is None:
+                print(f"{stage.name}: cannot merge incrementally, rebuilding from a full scan")
+                result, write_ctx = rebuild_stage(stage, ctx)
+            else:
+                result = merged
+        if stage.name in to_write:
+            stage.write(result, write_ctx)
+        return stage.name, result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for level in dependency_levels(selected):
+            # Results of a level are published only after the whole level finishes,
+            # so stages never observe a sibling's partial state.
+            ctx.results.update(pool.map(finish, level))
+
+    published = [
+        path
+        for stage in selected
+        if stage.name in to_write
+        for path in stage.artifacts(ctx.results[stage.name], ctx)
+    ]
+    manifest = publish(out_dir, published)
+    print(f"Published {len(published)} artifact(s); manifest lists {len(manifest['files'])}")
+
+    if only is None and upto is not None:
+        with get_engine().begin() as conn:
+            advance_checkpoint(conn, EXPORT_CONSUMER, upto)
+
+    print(f"Export finished in {time.perf_counter() - started:.2f}s")
+    return ctx.results
+
+
+@profiling.entry_point("export_pipeline")
+def main():
+    parser = argparse.ArgumentParser(description="Export all web/public JSON artifacts in one pass.")
+    parser.add_argument("out_dir", nargs="?", type=Path, default=DEFAULT_OUT_DIR)
+    parser.add_argument("--only", nargs="+", metavar="STAGE", help="Only export these stages")
+    parser.add_argument(
+        "--incremental", action="store_true", help="Only rebuild games changed since the last export"
+    )
+    parser.add_argument(
+        "--format",
+        choices=ARTIFACT_FORMATS,
+        default="json",
+        help="Write the large row-array artifacts as arrays of objects or columnar tables",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        metavar="DIR",
+        help="Read from this Parquet snapshot (python -m scraper.snapshot) instead of the database",
+    )
+    args = parser.parse_args()
+    if args.snapshot is not None and args.incremental:
+        parser.error("--incremental needs the database; it cannot be combined with --snapshot")
+    run_pipeline(
+        args.out_dir.resolve(),
+        only=args.only,
+        incremental=args.incremental,
+        format=args.format,
+        snapshot=args.snapshot,
+    )
+
+
+if __name__ == "__main__":
+    main()
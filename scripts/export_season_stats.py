@@ -8,96 +8,118 @@ Outputs web/public/season_stats.json with a list of season objects, each contain
 - venue breakdown
 - top WPA moment
 - barrel count
+
+Season stats are a stage of the unified export pipeline (scripts/export_pipeline.py)
+and take drama scores from the heartbeat stage's result.
 """
 
-import json
 from collections import defaultdict
 
-from sqlalchemy import text
-
-from config import engine
-
-
-def main():
-    print("Exporting season stats...")
-
-    with engine.connect() as conn:
-        # --- Games + W/L ---
-        games_rows = conn.execute(text("""
-            SELECT mlb_game_pk, date, home_team, away_team,
-                   home_score, away_score, venue_name,
-                   EXTRACT(YEAR FROM date)::int AS season
-            FROM games
-            WHERE attended = true
-            ORDER BY date
-        """)).fetchall()
-
-        # --- HRs ---
-        hr_rows = conn.execute(text("""
-            SELECT se.hit_distance_sc, se.launch_speed, se.launch_angle,
-                   se.batter_name, se.pitcher_name,
-                   g.date, g.home_team, g.away_team, g.mlb_game_pk,
-                   EXTRACT(YEAR FROM g.date)::int AS season
-            FROM statcast_events se
-            JOIN games g ON se.mlb_game_pk = g.mlb_game_pk
-            WHERE g.attended = true AND se.event_type = 'home_run'
-            ORDER BY se.hit_distance_sc DESC
-        """)).fetchall()
-
-        # --- Barrels ---
-        barrel_rows = conn.execute(text("""
-            SELECT EXTRACT(YEAR FROM g.date)::int AS season, COUNT(*) AS barrel_count
-            FROM statcast_events se
-            JOIN games g ON se.mlb_game_pk = g.mlb_game_pk
-            WHERE g.attended = true
-              AND se.launch_speed >= 98
-              AND se.launch_angle BETWEEN 8 AND 50
-            GROUP BY season
-        """)).fetchall()
-        barrels_by_season = {int(r.season): r.barrel_count for r in barrel_rows}
-
-        # --- Top WPA moment per season ---
-        wpa_rows = conn.execute(text("""
-            SELECT DISTINCT ON (season)
-                   EXTRACT(YEAR FROM g.date)::int AS season,
-                   se.wpa, se.batter_name, se.event_type, se.raw_description,
-                   g.date, g.home_team, g.away_team
-            FROM statcast_events se
-            JOIN games g ON se.mlb_game_pk = g.mlb_game_pk
-            WHERE g.attended = true AND se.wpa IS NOT NULL
-            ORDER BY season, ABS(se.wpa) DESC
-        """)).fetchall()
-        top_wpa_by_season = {}
-        for r in wpa_rows:
-            top_wpa_by_season[int(r.season)] = {
-                "wpa": float(r.wpa),
-                "batter": r.batter_name,
-                "event_type": r.event_type,
-                "description": r.raw_description,
-                "date": r.date.isoformat(),
-                "matchup": f"{r.away_team} @ {r.home_team}",
+from config import is_barrel
+from scraper import profiling
+from scraper.artifacts import write_json_atomic
+from scripts.export_pipeline import Stage, run_pipeline
+
+# Columns of a home run row that build_season_stats reads
+HR_FIELDS = ("hit_distance_sc", "launch_speed", "batter_name", "date", "home_team", "away_team")
+
+
+class SeasonStatsStage(Stage):
+    name = "season_stats"
+    output = "season_stats.json"
+    requires = ("heartbeat",)
+
+    def __init__(self):
+        self.hr_rows = []
+        self.barrels_by_season = defaultdict(int)
+        self.top_wpa_rows = {}
+
+    def feed(self, rows):
+        for r in rows:
+            season = r["date"].year
+            if r["event_type"] == "home_run":
+                self.hr_rows.append({field: r[field] for field in HR_FIELDS})
+            if is_barrel(r["launch_angle"], r["launch_speed"]):
+                self.barrels_by_season[season] += 1
+            if r["wpa"] is not None:
+                best = self.top_wpa_rows.get(season)
+                if best is None or abs(r["wpa"]) > abs(best["wpa"]):
+                    self.top_wpa_rows[season] = r
+
+    @staticmethod
+    def _seasons(ctx) -> set[int] | None:
+        """Seasons an incremental export must rebuild (None = all of them)."""
+        if not ctx.incremental:
+            return None
+        return {g["date"].year for g in ctx.games if g["mlb_game_pk"] in ctx.changed_pks}
+
+    def scope(self, ctx):
+        # Every game of each affected season, since the stats are per-season aggregates
+        seasons = self._seasons(ctx)
+        if seasons is None:
+            return None
+        return {g["mlb_game_pk"] for g in ctx.games if g["date"].year in seasons}
+
+    def finish(self, ctx):
+        seasons = self._seasons(ctx)
+        games = [g for g in reversed(ctx.games) if seasons is None or g["date"].year in seasons]
+
+        # Longest first, missing distances first (Postgres DESC order)
+        hr_rows = sorted(
+            self.hr_rows,
+            key=lambda r: (r["hit_distance_sc"] is None, r["hit_distance_sc"] or 0),
+            reverse=True,
+        )
+        top_wpa_by_season = {
+            season: {
+                "wpa": float(r["wpa"]),
+                "batter": r["batter_name"],
+                "event_type": r["event_type"],
+                "description": r["raw_description"],
+                "date": r["date"].isoformat(),
+                "matchup": f"{r['away_team']} @ {r['home_team']}",
             }
-
-        # --- Load drama scores from heartbeat data ---
-        drama_by_pk = {}
-        try:
-            with open("web/public/heartbeat_data.json") as f:
-                for game in json.load(f):
-                    drama_by_pk[game["game_pk"]] = {
-                        "drama_score": game["drama_score"],
-                        "drama_category": game["drama_category"],
-                        "matchup": game["matchup"],
-                        "date": game["date"],
-                        "score": game["score"],
-                    }
-        except FileNotFoundError:
-            print("Warning: heartbeat_data.json not found, drama stats will be empty")
-
+            for season, r in self.top_wpa_rows.items()
+        }
+        drama_by_pk = {
+            game["game_pk"]: {
+                "drama_score": game["drama_score"],
+                "drama_category": game["drama_category"],
+                "matchup": game["matchup"],
+                "date": game["date"],
+                "score": game["score"],
+            }
+            for game in ctx.results["heartbeat"]
+        }
+        return build_season_stats(
+            games, hr_rows, self.barrels_by_season, top_wpa_by_season, drama_by_pk
+        )
+
+    def merge(self, existing, partial, ctx):
+        if not ctx.changed_pks <= ctx.game_rank.keys():
+            return None  # a game left the log; we no longer know which season it was in
+        rebuilt = self._seasons(ctx)
+        kept = [entry for entry in existing if entry["season"] not in rebuilt]
+        return sorted(kept + partial, key=lambda entry: entry["season"], reverse=True)
+
+    def write(self, result, ctx):
+        output_path = ctx.out_dir / self.output
+        write_json_atomic(output_path, result, indent=2)
+
+        print(f"Exported {len(result)} seasons to {output_path}")
+        for entry in result:
+            print(f"  {entry['season']}: {entry['games_attended']} games, {entry['total_home_runs']} HRs, "
+                  f"avg drama {entry['avg_drama_score']}")
+
+
+def build_season_stats(games_rows, hr_rows, barrels_by_season, top_wpa_by_season, drama_by_pk):
+    """Assemble season_stats.json entries (newest season first) from attended games
+    (oldest first), HRs (longest first) and the per-season aggregates."""
     # --- Build per-season stats ---
     seasons: dict[int, dict] = {}
 
     for g in games_rows:
-        s = int(g.season)
+        s = int(g["date"].year)
         if s not in seasons:
             seasons[s] = {
                 "season": s,
@@ -117,18 +139,18 @@ def main():
 
         entry = seasons[s]
         entry["games_attended"] += 1
-        entry["venues"][g.venue_name or "Unknown"] += 1
+        entry["venues"][g["venue_name"] or "Unknown"] += 1
 
         # W/L from the perspective of the home team you saw
         # (simplified: did the team with the higher score win?)
-        if g.home_score is not None and g.away_score is not None:
-            if g.home_score > g.away_score:
+        if g["home_score"] is not None and g["away_score"] is not None:
+            if g["home_score"] > g["away_score"]:
                 entry["wins"] += 1
             else:
                 entry["losses"] += 1
 
         # Drama
-        pk = g.mlb_game_pk
+        pk = g["mlb_game_pk"]
         if pk in drama_by_pk:
             d = drama_by_pk[pk]
             entry["drama_scores"].append(d["drama_score"])
@@ -137,21 +159,21 @@ def main():
 
     # Add HR stats per season
     for hr in hr_rows:
-        s = int(hr.season)
+        s = int(hr["date"].year)
         if s not in seasons:
             continue
         entry = seasons[s]
         hr_info = {
-            "distance": hr.hit_distance_sc,
-            "exit_velo": hr.launch_speed,
-            "batter": hr.batter_name,
-            "date": hr.date.isoformat(),
-            "matchup": f"{hr.away_team} @ {hr.home_team}",
+            "distance": hr["hit_distance_sc"],
+            "exit_velo": hr["launch_speed"],
+            "batter": hr["batter_name"],
+            "date": hr["date"].isoformat(),
+            "matchup": f"{hr['away_team']} @ {hr['home_team']}",
         }
         entry["home_runs"].append(hr_info)
-        if entry["longest_hr"] is None or (hr.hit_distance_sc or 0) > (entry["longest_hr"]["distance"] or 0):
+        if entry["longest_hr"] is None or (hr["hit_distance_sc"] or 0) > (entry["longest_hr"]["distance"] or 0):
             entry["longest_hr"] = hr_info
-        if entry["highest_exit_velo"] is None or (hr.launch_speed or 0) > (entry["highest_exit_velo"]["exit_velo"] or 0):
+        if entry["highest_exit_velo"] is None or (hr["launch_speed"] or 0) > (entry["highest_exit_velo"]["exit_velo"] or 0):
             entry["highest_exit_velo"] = hr_info
 
     # Finalize
@@ -166,14 +188,13 @@ def main():
         del entry["drama_scores"]
         result.append(entry)
 
-    output_path = "web/public/season_stats.json"
-    with open(output_path, "w") as f:
-        json.dump(result, f, indent=2)
+    return result
 
-    print(f"Exported {len(result)} seasons to {output_path}")
-    for entry in result:
-        print(f"  {entry['season']}: {entry['games_attended']} games, {entry['total_home_runs']} HRs, "
-              f"avg drama {entry['avg_drama_score']}")
+
+@profiling.entry_point("export_season_stats")
+def main():
+    print("Exporting season stats...")
+    run_pipeline(only=["season_stats"])
 
 
 if __name__ == "__main__":
@@ -1,68 +1,71 @@
 #!/usr/bin/env python3
 """
 Export top WPA moments (Drama Index) to JSON for the web frontend
+
+The Drama Index is a stage of the unified export pipeline (scripts/export_pipeline.py);
+this script runs just that stage.
 """
 
-import json
+import heapq
+
+from scraper import profiling
+from scraper.artifacts import write_json_atomic
+from scripts.export_pipeline import Stage, merge_top, run_pipeline
+
+
+class DramaIndexStage(Stage):
+    """Top WPA swings (by absolute WPA) with game context, from attended games."""
+
+    name = "drama_index"
+    output = "drama_index.json"
+    limit = 50
+
+    def __init__(self):
+        self.top = []
 
-from sqlalchemy import text
+    def feed(self, rows):
+        # Only the running top-N is kept, not every WPA event.  Rows arrive newest
+        # game first, and nlargest keeps arrival order for ties.
+        candidates = [r for r in rows if r["wpa"] is not None]
+        self.top = heapq.nlargest(self.limit, self.top + candidates, key=lambda r: abs(r["wpa"]))
 
-from config import engine
+    def finish(self, ctx):
+        return [
+            {
+                'wpa': float(row["wpa"]),
+                'batter_name': row["batter_name"],
+                'pitcher_name': row["pitcher_name"],
+                'event_type': row["event_type"],
+                'raw_description': row["raw_description"],
+                'mlb_game_pk': row["mlb_game_pk"],
+                'clip_uuid': row["clip_uuid"],
+                'video_url': row["video_url"],
+                'date': row["date"].isoformat() if hasattr(row["date"], 'isoformat') else str(row["date"]),
+                'home_team': row["home_team"],
+                'away_team': row["away_team"],
+                'home_score': row["home_score"],
+                'away_score': row["away_score"]
+            }
+            for row in self.top
+        ]
 
+    def merge(self, existing, partial, ctx):
+        return merge_top(
+            existing, partial, ctx, self.limit, lambda e: -abs(e['wpa']), key='mlb_game_pk'
+        )
 
+    def write(self, drama_events, ctx):
+        output_path = ctx.out_dir / self.output
+        write_json_atomic(output_path, drama_events, indent=2)
+
+        print(f"Exported {len(drama_events)} drama moments to {output_path}")
+
+
+@profiling.entry_point("export_wpa_drama")
 def main():
     print("Exporting Drama Index (WPA moments)...")
-    
-    with engine.connect() as conn:
-        # Get top WPA swings with game context
-        query = text('''
-            SELECT 
-                se.wpa,
-                se.batter_name,
-                se.pitcher_name,
-                se.event_type,
-                se.raw_description,
-                se.mlb_game_pk,
-                se.clip_uuid,
-                se.video_url,
-                g.date,
-                g.home_team,
-                g.away_team,
-                g.home_score,
-                g.away_score
-            FROM statcast_events se
-            JOIN games g ON se.mlb_game_pk = g.mlb_game_pk
-            WHERE se.wpa IS NOT NULL
-            ORDER BY ABS(se.wpa) DESC
-            LIMIT 50
-        ''')
-        results = conn.execute(query).fetchall()
-        
-        # Convert to JSON-serializable format
-        drama_events = []
-        for row in results:
-            drama_events.append({
-                'wpa': float(row.wpa),
-                'batter_name': row.batter_name,
-                'pitcher_name': row.pitcher_name,
-                'event_type': row.event_type,
-                'raw_description': row.raw_description,
-                'mlb_game_pk': row.mlb_game_pk,
-                'clip_uuid': row.clip_uuid,
-                'video_url': row.video_url,
-                'date': row.date.isoformat() if hasattr(row.date, 'isoformat') else str(row.date),
-                'home_team': row.home_team,
-                'away_team': row.away_team,
-                'home_score': row.home_score,
-                'away_score': row.away_score
-            })
-        
-        # Write to web/public directory
-        output_path = 'web/public/drama_index.json'
-        with open(output_path, 'w') as f:
-            json.dump(drama_events, f, indent=2)
-        
-        print(f"Exported {len(drama_events)} drama moments to {output_path}")
+    run_pipeline(only=["drama_index"])
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
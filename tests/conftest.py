@@ -1,8 +1,12 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import os
+import random
 import pytest
 
+# Exports in tests don't need the slow, smallest brotli output
+os.environ.setdefault("EXPORT_BROTLI_QUALITY", "4")
+
 @pytest.fixture(scope="session")
 def db_session():
     """Yield a SQLAlchemy Session bound to DATABASE_URL env var.
@@ -20,4 +24,108 @@ def db_session():
     try:
         yield sess
     finally:
-        sess.close() 
\ No newline at end of file
+        sess.close() 
+
+@pytest.fixture(scope="session")
+def integrity_report(db_session):
+    """Every data validation rule, checked once per session in one pass per table."""
+    from scraper.validation import validate
+
+    return validate(db_session.connection())
+
+
+# gamePks no real game uses; scratch games draw from here
+SCRATCH_PKS = (900_000_000, 999_999_998)
+
+
+def _add_scratch_game(conn) -> int:
+    """Insert a past attended game, not yet scored, under an unused gamePk."""
+    from sqlalchemy import text
+
+    pk = random.randint(*SCRATCH_PKS)
+    conn.execute(text(
+        "INSERT INTO games (date, home_team, away_team, attended, mlb_game_pk) "
+        "VALUES ('2024-04-01', 'BOS', 'NYY', true, :pk)"
+    ), {"pk": pk})
+    return pk
+
+
+@pytest.fixture
+def db_conn():
+    """A connection to DATABASE_URL whose work is rolled back when the test ends."""
+    from config import get_engine
+
+    with get_engine().connect() as conn:
+        transaction = conn.begin()
+        try:
+            yield conn
+        finally:
+            transaction.rollback()
+
+
+@pytest.fixture
+def scratch_game(db_conn):
+    """The gamePk of a scratch attended game that only exists in ``db_conn``'s transaction."""
+    return _add_scratch_game(db_conn)
+
+
+@pytest.fixture
+def committed_scratch_game():
+    """A scratch attended game for code that opens its own connections.
+
+    It is committed, so afterwards every row written for its gamePk, or for
+    gamePk + 1 (a game that does not exist), is deleted.
+    """
+    from sqlalchemy import text
+
+    from config import get_engine
+
+    with get_engine().begin() as conn:
+        pk = _add_scratch_game(conn)
+    yield pk
+    with get_engine().begin() as conn:
+        for table in ("statcast_events", "game_changes", "games"):
+            conn.execute(text(f"DELETE FROM {table} WHERE mlb_game_pk IN (:pk, :next)"),
+                         {"pk": pk, "next": pk + 1})
+
+
+@pytest.fixture
+def insert_events():
+    """``insert_events(conn, pk, {column: value}, ...)`` adds events to a game; returns their ids."""
+    from sqlalchemy import text
+
+    def insert(conn, game_pk, *rows):
+        ids = []
+        for row in rows:
+            values = {"mlb_game_pk": game_pk, "event_datetime": "2024-04-01", **row}
+            columns = list(values)
+            ids.append(conn.execute(text(
+                f"INSERT INTO statcast_events ({', '.join(columns)}) "
+                f"VALUES ({', '.join(':' + c for c in columns)}) RETURNING id"
+            ), values).scalar_one())
+        return ids
+
+    return insert
+
+
+@pytest.fixture
+def restore_change_log():
+    """Undo what a test adds to the change log and its consumers' checkpoints."""
+    from sqlalchemy import text
+
+    from config import get_engine
+
+    with get_engine().connect() as conn:
+        last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM game_changes")).scalar_one()
+        checkpoints = conn.execute(text(
+            "SELECT consumer, last_change_id, last_xmin, updated_at FROM consumer_checkpoints"
+        )).mappings().all()
+    yield
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM game_changes WHERE id > :id"), {"id": last_id})
+        conn.execute(text("DELETE FROM consumer_checkpoints"))
+        if checkpoints:
+            conn.execute(text(
+                "INSERT INTO consumer_checkpoints (consumer, last_change_id, last_xmin, updated_at) "
+                "VALUES (:consumer, :last_change_id, :last_xmin, :updated_at)"
+            ), [dict(row) for row in checkpoints])
@@ -0,0 +1,71 @@
+"""Tests for API compression negotiation and the response cache (no database needed)."""
+
+import asyncio
+import gzip
+
+from api import cache as api_cache
+from api.cache import ResponseCache, compress, negotiate_encoding
+
+
+def test_negotiate_prefers_brotli_when_available():
+    from api.cache import SUPPORTED_ENCODINGS
+
+    assert negotiate_encoding("gzip, deflate, br") == SUPPORTED_ENCODINGS[0]
+
+
+def test_negotiate_respects_q_values():
+    assert negotiate_encoding("br;q=0, gzip;q=0.5") == "gzip"
+
+
+def test_negotiate_identity_only():
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding(None) is None
+
+
+def test_negotiate_wildcard():
+    assert negotiate_encoding("*") is not None
+
+
+def test_gzip_roundtrip():
+    body = b'{"matchup": "NYY @ BOS"}' * 200
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+
+def test_cached_encoding_computed_once(monkeypatch):
+    calls = []
+
+    def counting_compress(body, encoding, *, cached=False):
+        calls.append(encoding)
+        return compress(body, encoding, cached=cached)
+
+    monkeypatch.setattr(api_cache, "compress", counting_compress)
+    cache = ResponseCache(ttl_seconds=60)
+    entry = cache.put("/x?", 200, [], b"a" * 4096)
+
+    async def requests():
+        # Concurrent misses share one compression, later hits reuse its result
+        first = await asyncio.gather(*(entry.encoded("gzip") for _ in range(3)))
+        return first, await entry.encoded("gzip")
+
+    first, again = asyncio.run(requests())
+    assert calls == ["gzip"]
+    assert all(data is again for data in first)
+    assert gzip.decompress(again) == b"a" * 4096
+    assert cache.get("/x?") is entry
+
+
+def test_cache_expires_entries():
+    cache = ResponseCache(ttl_seconds=-1)
+    cache.put("/x?", 200, [], b"body")
+    assert cache.get("/x?") is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", 200, [], b"1")
+    cache.put("b", 200, [], b"2")
+    cache.get("a")
+    cache.put("c", 200, [], b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
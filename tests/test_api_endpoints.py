@@ -2,7 +2,7 @@
 
 from fastapi.testclient import TestClient
 
-from api.main import app
+from api.main import app, response_cache
 
 client = TestClient(app)
 
@@ -111,3 +111,128 @@ def test_wpa_player_nonexistent_returns_empty():
     assert response.status_code == 200
     data = response.json()
     assert data["games"] == []
+    assert data["total_games"] == 0
+    assert data["total_wpa"] == 0
+
+
+def test_wpa_player_pagination_and_events(db_session):
+    from api.models import Game, StatcastEvent
+
+    row = (
+        db_session.query(StatcastEvent.batter_name)
+        .join(Game, StatcastEvent.mlb_game_pk == Game.mlb_game_pk)
+        .filter(Game.attended.is_(True), StatcastEvent.wpa.isnot(None))
+        .first()
+    )
+    player_name = row[0] if row else "TestPlayer"
+
+    data = client.get(f"/statcast/wpa/player/{player_name}?limit=1").json()
+    assert len(data["games"]) <= 1
+    assert all("events" not in game for game in data["games"])
+
+    data = client.get(f"/statcast/wpa/player/{player_name}?limit=1&include_events=true").json()
+    for game in data["games"]:
+        assert len(game["events"]) == game["event_count"]
+
+
+# --------------- columnar format ---------------
+
+def test_barrel_map_columnar_format():
+    response = client.get("/statcast/barrel-map?format=columnar")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["format"] == "columnar"
+    columns = data["batted_balls"]
+    assert "exit_velocity" in columns
+    assert all(len(values) == data["total_balls"] for values in columns.values())
+
+
+def test_longest_homers_columnar_format():
+    response = client.get("/statcast/longest-homers?format=columnar&limit=5")
+    assert response.status_code == 200
+    columns = response.json()["homers"]
+    assert set(columns) >= {"distance", "batter", "pitcher"}
+    assert len(columns["distance"]) <= 5
+
+
+def test_barrel_map_rejects_unknown_format():
+    response = client.get("/statcast/barrel-map?format=xml")
+    assert response.status_code == 422
+
+
+# --------------- compression / response cache ---------------
+
+def test_barrel_map_gzip_negotiated():
+    response = client.get("/statcast/barrel-map", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "Accept-Encoding" in response.headers.get("vary", "")
+    # TestClient transparently decodes the body, so the JSON must still parse.
+    assert "batted_balls" in response.json()
+
+
+def test_cached_route_reports_hit_on_repeat(monkeypatch):
+    # The cache is off unless API_CACHE_TTL_SECONDS is set
+    monkeypatch.setattr(response_cache, "ttl_seconds", 60)
+    response_cache.clear()
+    client.get("/statcast/wpa/leaders?limit=3")
+    response = client.get("/statcast/wpa/leaders?limit=3")
+    assert response.status_code == 200
+    assert response.headers.get("x-cache") == "HIT"
+    response_cache.clear()
+
+
+def test_health_not_cached():
+    response = client.get("/health")
+    assert "x-cache" not in response.headers
+
+
+# --------------- /games heartbeat ---------------
+
+def test_heartbeat_index_has_no_curve_points():
+    response = client.get("/games/heartbeat-index")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == len(data["games"])
+    for game in data["games"]:
+        assert "heartbeat_points" not in game
+        assert "drama_score" in game
+
+
+def test_game_heartbeat_matches_index():
+    index = client.get("/games/heartbeat-index").json()["games"]
+    if not index:
+        return
+    summary = index[0]
+    response = client.get(f"/games/{summary['game_pk']}/heartbeat")
+    assert response.status_code == 200
+    game = response.json()
+    assert game["drama_score"] == summary["drama_score"]
+    assert game["total_events"] == summary["total_events"]
+    assert len(game["heartbeat_points"]) >= 2
+
+
+def test_game_heartbeat_unknown_game_404():
+    response = client.get("/games/1/heartbeat")
+    assert response.status_code == 404
+
+
+# --------------- /metrics ---------------
+
+def test_metrics_reports_route_templates_and_sql_timings():
+    client.get("/games/heartbeat-index")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    route = 'route="/games/heartbeat-index"'
+    assert f'http_request_duration_seconds_count{{method="GET",{route},status="200"}}' in body
+    assert f'db_query_duration_seconds_count{{{route},operation="SELECT"}}' in body
+    assert "http_requests_in_flight" in body
+    assert "db_pool_checked_out" in body
+
+
+def test_metrics_labels_path_params_by_template():
+    client.get("/games/999999999/heartbeat")
+    body = client.get("/metrics").text
+    assert 'route="/games/{game_pk}/heartbeat",status="404"' in body
+    assert "999999999" not in body
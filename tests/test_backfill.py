@@ -0,0 +1,84 @@
+"""Tests for the resumable backfill jobs (scraper/backfill.py)."""
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from config import get_engine
+from scraper import backfill
+
+
+@pytest.fixture
+def job():
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    yield name
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM backfill_jobs WHERE job = :job"), {"job": name})
+
+
+def _fast_limiter():
+    return backfill.AdaptiveRateLimiter(rate=1000, min_rate=100, max_rate=2000)
+
+
+def test_run_resumes_and_classifies_failures(job):
+    with get_engine().begin() as conn:
+        assert backfill.enqueue(conn, job, [1, 2, 3, 4]) == 4
+        assert backfill.enqueue(conn, job, [3, 4, 5]) == 1
+
+    calls = []
+    flaky_attempts = []
+
+    def process(game_pk):
+        calls.append(game_pk)
+        if game_pk == 2:
+            raise backfill.JobError("no data")
+        if game_pk == 3:
+            flaky_attempts.append(game_pk)
+            if len(flaky_attempts) < 2:
+                raise ConnectionError("upstream reset")
+        if game_pk == 4:
+            raise TimeoutError("always slow")
+
+    outcomes = backfill.run_jobs(job, process, workers=2, limiter=_fast_limiter(), max_attempts=2)
+    assert outcomes == {"done": 3, "failed": 2, "retried": 2}
+    with get_engine().connect() as conn:
+        assert backfill.job_status(conn, job) == {"pending": 0, "running": 0, "done": 3, "failed": 2}
+        failed = {pk: (attempts, error) for pk, attempts, error in backfill.failed_games(conn, job)}
+    assert failed == {2: (1, "no data"), 4: (2, "TimeoutError: always slow")}
+
+    # A second run has nothing to redo; --retry-failed requeues only the failures
+    calls.clear()
+    assert backfill.run_jobs(job, process, limiter=_fast_limiter()) == {}
+    with get_engine().begin() as conn:
+        assert backfill.retry_failed(conn, job) == 2
+        assert backfill.enqueue(conn, job, [1, 2, 3, 4, 5]) == 0
+    backfill.run_jobs(job, process, workers=1, limiter=_fast_limiter(), limit=1)
+    assert calls == [4]
+
+
+def test_stale_running_games_are_reclaimed(job):
+    with get_engine().begin() as conn:
+        backfill.enqueue(conn, job, [7, 8])
+        conn.execute(text(
+            "UPDATE backfill_jobs SET state = 'running', attempts = 1, claimed_by = 'dead', "
+            "updated_at = now() - interval '1 hour' WHERE job = :job AND mlb_game_pk = 7"
+        ), {"job": job})
+        conn.execute(text(
+            "UPDATE backfill_jobs SET state = 'running', claimed_by = 'alive' "
+            "WHERE job = :job AND mlb_game_pk = 8"
+        ), {"job": job})
+        assert backfill.reclaim_stale(conn, job, minutes=15) == 1
+        assert backfill.job_status(conn, job)["pending"] == 1
+
+
+def test_rate_limiter_is_aimd_within_bounds():
+    limiter = backfill.AdaptiveRateLimiter(rate=1.0, min_rate=0.3, max_rate=1.2, increase=0.1)
+    limiter.backoff()
+    assert limiter.rate == 0.5
+    limiter.backoff()
+    limiter.backoff()
+    assert limiter.rate == 0.3
+    for _ in range(20):
+        limiter.success()
+    assert limiter.rate == 1.2
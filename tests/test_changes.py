@@ -0,0 +1,40 @@
+"""Tests for the per-game change log (scraper/changes.py)."""
+
+import random
+
+import pytest
+from sqlalchemy import text
+
+from config import get_engine
+from scraper.changes import advance_checkpoint, log_position, pending_changes, record_game_change
+
+
+@pytest.fixture
+def consumer():
+    name = f"test-{random.randint(0, 10**9)}"
+    yield name
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM consumer_checkpoints WHERE consumer = :consumer"),
+                     {"consumer": name})
+
+
+def test_a_change_committed_after_a_higher_one_is_not_lost(consumer, committed_scratch_game):
+    early, late = committed_scratch_game, committed_scratch_game + 1
+    engine = get_engine()
+    with engine.begin() as conn:
+        advance_checkpoint(conn, consumer, log_position(conn))
+
+    with engine.connect() as slow:
+        slow_transaction = slow.begin()
+        record_game_change(slow, early, "test")  # takes the lower id, commits last
+        with engine.begin() as conn:
+            record_game_change(conn, late, "test")
+        with engine.begin() as conn:
+            changed, upto = pending_changes(conn, consumer)
+            advance_checkpoint(conn, consumer, upto)
+        assert {early, late} & changed == {late}
+        slow_transaction.commit()
+
+    with engine.begin() as conn:
+        changed, _ = pending_changes(conn, consumer)
+    assert early in changed
@@ -0,0 +1,78 @@
+"""Tests for the corrupted-event cleanup (scraper/cleanup.py)."""
+
+from types import SimpleNamespace
+
+from sqlalchemy import text
+
+from config import get_engine
+from gamelog.pipeline import Pipeline
+from scraper import enrich_games, statcast_fetcher
+from scraper.cleanup import cleanup
+from scraper.taskgraph import run_graph
+
+
+def _event(batter, description, wpa):
+    return {"batter_name": batter, "raw_description": description, "wpa": wpa,
+            "launch_speed": 95, "launch_angle": 20}
+
+
+def test_cleanup_keeps_the_first_event_of_each_corrupted_group(db_conn, scratch_game,
+                                                               insert_events):
+    batter = f"Test Batter {scratch_game}"
+    ids = insert_events(db_conn, scratch_game, *(
+        _event(batter, description, wpa) for description, wpa in [
+            ("hit_into_play", 0.12), ("foul", 0.12), ("foul", 0.12),
+            # Non-final pitches all have WPA 0; never treated as corrupted
+            ("foul", 0.0), ("foul_tip", 0.0), ("foul", 0.0),
+        ]
+    ))
+
+    assert cleanup(db_conn, [scratch_game + 1]).groups == []
+    dry = cleanup(db_conn, [scratch_game], dry_run=True)
+    assert [(g.event_count, g.outcomes, g.deleted) for g in dry.groups] == [(3, 2, 2)]
+    assert db_conn.execute(text("SELECT COUNT(*) FROM statcast_events WHERE mlb_game_pk = :pk"),
+                           {"pk": scratch_game}).scalar_one() == 6
+
+    report = cleanup(db_conn, [scratch_game])
+    assert (report.deleted, report.affected_games) == (2, {scratch_game})
+    remaining = db_conn.execute(text(
+        "SELECT id FROM statcast_events WHERE mlb_game_pk = :pk ORDER BY id"
+    ), {"pk": scratch_game}).scalars().all()
+    changes = db_conn.execute(text(
+        "SELECT change_type FROM game_changes WHERE mlb_game_pk = :pk"
+    ), {"pk": scratch_game}).scalars().all()
+    assert remaining == [ids[0], *ids[3:]]
+    assert changes == ["cleanup"]
+
+
+def test_gamelog_cleanup_does_not_make_the_next_run_refetch(committed_scratch_game, tmp_path,
+                                                            monkeypatch, insert_events):
+    game_pk = committed_scratch_game
+    fetched, deleted = [], []
+
+    def ingest_game(db, game, ingest, force=False):
+        fetched.append(force)
+        insert_events(db, game.mlb_game_pk, *(
+            _event(f"Test Batter {game_pk}", description, 0.12)
+            for description in ("hit_into_play", "foul", "foul")
+        ))
+        db.commit()
+        return SimpleNamespace(status="inserted", error=None)
+
+    class ScopedPipeline(Pipeline):
+        # Only ever clean up the test game
+        def cleanup(self, run):
+            with get_engine().begin() as conn:
+                deleted.append(cleanup(conn, self.game_pks).deleted)
+
+    monkeypatch.setattr(statcast_fetcher, "ingest_game", ingest_game)
+    monkeypatch.setattr(enrich_games, "enrich_games", lambda: None)
+    pipeline = ScopedPipeline(game_pks=[game_pk], ingest_log=None)
+    state = tmp_path / "tasks.json"
+
+    first = {r.name: r.status for r in run_graph(pipeline.tasks(), ["cleanup"], state, log=None)}
+    again = {r.name: r.status for r in run_graph(pipeline.tasks(), ["cleanup"], state, log=None)}
+    assert first[f"fetch:{game_pk}"] == "ran" and first["cleanup"] == "ran"
+    # The events cleanup deleted are not a reason to fetch the game again
+    assert again[f"fetch:{game_pk}"] == "up-to-date"
+    assert fetched == [False] and deleted[0] == 2
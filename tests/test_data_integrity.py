@@ -1,42 +1,28 @@
-import datetime as _dt
-from sqlalchemy import func
+"""Data-integrity checks against the live database.
+
+The rules live in scraper/validation.py and are all checked in one pass by the
+session-scoped ``integrity_report`` fixture from conftest.py.
+"""
+
 from api.models import Game
 
 
-def test_no_missing_pks(db_session):
-    missing = (
-        db_session.query(Game)
-        .filter(
-            Game.attended.is_(True),
-            Game.date <= _dt.date.today(),
-            Game.mlb_game_pk.is_(None),
-        )
-        .count()
+def test_no_missing_pks(integrity_report):
+    assert integrity_report.violations("attended_games_have_pk") == 0, (
+        integrity_report.describe("attended_games_have_pk")
     )
-    assert missing == 0, f"{missing} attended games missing mlb_game_pk"
 
 
-def test_unique_game_pk(db_session):
-    dups = (
-        db_session.query(Game.mlb_game_pk, func.count(Game.id))
-        .group_by(Game.mlb_game_pk)
-        .having(func.count(Game.id) > 1)
-        .all()
+def test_unique_game_pk(integrity_report):
+    assert integrity_report.violations("game_pk_unique") == 0, (
+        integrity_report.describe("game_pk_unique")
     )
-    assert not dups, f"duplicate game_pk rows: {dups}"
-
 
-def test_statcast_only_attended(db_session):
-    from api.models import StatcastEvent  # local import to avoid circular
 
-    rows = (
-        db_session.query(StatcastEvent)
-        .join(Game, StatcastEvent.mlb_game_pk == Game.mlb_game_pk)
-        .filter(Game.attended.isnot(True))
-        .limit(1)
-        .all()
+def test_statcast_only_attended(integrity_report):
+    assert integrity_report.violations("events_only_attended") == 0, (
+        integrity_report.describe("events_only_attended")
     )
-    assert not rows, "Statcast contains events from unattended games"
 
 
 def test_statcast_clip_coverage_reasonable(db_session):
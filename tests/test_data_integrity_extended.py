@@ -1,86 +1,47 @@
 """Extended data-integrity tests against the live database.
 
-Uses the session-scoped ``db_session`` fixture from conftest.py.
+Uses the session-scoped ``integrity_report`` fixture from conftest.py: every rule
+of scraper/validation.py checked in one pass.
 """
 
-import datetime as _dt
 
-from api.models import Game, StatcastEvent
-
-
-def test_wpa_values_in_range(db_session):
+def test_wpa_values_in_range(integrity_report):
     """All stored WPA values must be between -1 and 1."""
-    bad = (
-        db_session.query(StatcastEvent)
-        .filter(
-            StatcastEvent.wpa.isnot(None),
-            ~StatcastEvent.wpa.between(-1.0, 1.0),
-        )
-        .count()
+    assert integrity_report.violations("wpa_in_range") == 0, (
+        integrity_report.describe("wpa_in_range")
     )
-    assert bad == 0, f"{bad} statcast events have WPA outside [-1, 1]"
 
 
-def test_no_blank_batter_name(db_session):
+def test_no_blank_batter_name(integrity_report):
     """Every statcast event should have a non-empty batter_name."""
-    bad = (
-        db_session.query(StatcastEvent)
-        .filter(
-            (StatcastEvent.batter_name.is_(None))
-            | (StatcastEvent.batter_name == "")
-        )
-        .count()
+    assert integrity_report.violations("batter_name_present") == 0, (
+        integrity_report.describe("batter_name_present")
     )
-    assert bad == 0, f"{bad} statcast events have blank/empty batter_name"
 
 
-def test_launch_speed_range(db_session):
+def test_launch_speed_range(integrity_report):
     """Launch speed should be 0-130 mph when present."""
-    bad = (
-        db_session.query(StatcastEvent)
-        .filter(
-            StatcastEvent.launch_speed.isnot(None),
-            ~StatcastEvent.launch_speed.between(0, 130),
-        )
-        .count()
+    assert integrity_report.violations("launch_speed_in_range") == 0, (
+        integrity_report.describe("launch_speed_in_range")
     )
-    assert bad == 0, f"{bad} events have launch_speed outside 0-130"
 
 
-def test_launch_angle_range(db_session):
+def test_launch_angle_range(integrity_report):
     """Launch angle should be -90 to 90 degrees when present."""
-    bad = (
-        db_session.query(StatcastEvent)
-        .filter(
-            StatcastEvent.launch_angle.isnot(None),
-            ~StatcastEvent.launch_angle.between(-90, 90),
-        )
-        .count()
+    assert integrity_report.violations("launch_angle_in_range") == 0, (
+        integrity_report.describe("launch_angle_in_range")
     )
-    assert bad == 0, f"{bad} events have launch_angle outside -90 to 90"
 
 
-def test_past_attended_games_have_scores(db_session):
+def test_past_attended_games_have_scores(integrity_report):
     """All attended games with dates in the past should have scores filled in."""
-    missing = (
-        db_session.query(Game)
-        .filter(
-            Game.attended.is_(True),
-            Game.date < _dt.date.today(),
-            (Game.home_score.is_(None) | Game.away_score.is_(None)),
-        )
-        .count()
+    assert integrity_report.violations("past_attended_games_have_scores") == 0, (
+        integrity_report.describe("past_attended_games_have_scores")
     )
-    assert missing == 0, f"{missing} past attended games are missing scores"
 
 
-def test_statcast_events_reference_valid_games(db_session):
+def test_statcast_events_reference_valid_games(integrity_report):
     """Every statcast event's mlb_game_pk should match a row in the games table."""
-    orphans = (
-        db_session.query(StatcastEvent.mlb_game_pk)
-        .outerjoin(Game, StatcastEvent.mlb_game_pk == Game.mlb_game_pk)
-        .filter(Game.id.is_(None))
-        .group_by(StatcastEvent.mlb_game_pk)
-        .count()
+    assert integrity_report.violations("events_reference_games") == 0, (
+        integrity_report.describe("events_reference_games")
     )
-    assert orphans == 0, f"{orphans} distinct game_pk(s) in statcast_events have no matching game"
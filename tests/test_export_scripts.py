@@ -1,6 +1,44 @@
-"""Tests for export helper functions (no database needed)."""
+"""Tests for export helper functions and the export pipeline."""
 
+import json
+import shutil
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from config import engine
+from scraper.artifacts import (
+    hashed_name,
+    publish,
+    write_json_array_atomic,
+    write_json_atomic,
+)
+from scraper.changes import record_game_change
+from scraper.columnar import decode_columnar, encode_columnar, is_columnar
+from scraper.heartbeat import (
+    OVERVIEW_POINTS,
+    build_game_heartbeat,
+    categorize_games,
+    load_heartbeats,
+    lttb_indices,
+    overview_heartbeat,
+    score_games,
+)
+from scraper.snapshot import SnapshotSource, write_snapshot
+from scraper.spray import field_coords, spray_angle
 from scripts.export_heartbeat_data import calculate_drama_score, categorize_drama
+from scripts import export_pipeline
+from scripts.export_pipeline import (
+    Spool,
+    default_stages,
+    dependency_levels,
+    run_pipeline,
+    select_stages,
+)
+
+# Exports advance their change-log checkpoints; put them back after each test
+pytestmark = pytest.mark.usefixtures("restore_change_log")
 
 
 # ===================== calculate_drama_score =====================
@@ -77,3 +115,334 @@ def test_categorize_cardiac_lower():
 def test_categorize_cardiac_100():
     cat = categorize_drama(100)
     assert cat["level"] == "cardiac_arrest"
+
+
+# ===================== export pipeline =====================
+
+
+def test_pipeline_only_pulls_in_dependencies_without_writing_them():
+    stages, to_write = select_stages(default_stages(), ["season_stats"])
+    assert {s.name for s in stages} == {"season_stats", "heartbeat"}
+    assert to_write == {"season_stats"}
+
+
+def test_pipeline_levels_respect_dependencies():
+    levels = [{s.name for s in level} for level in dependency_levels(default_stages())]
+    assert "heartbeat" in levels[0]
+    assert "season_stats" not in levels[0]
+    assert sum(len(level) for level in levels) == len(default_stages())
+
+
+def test_pipeline_rejects_unknown_stage():
+    with pytest.raises(ValueError, match="nope"):
+        select_stages(default_stages(), ["nope"])
+
+
+def test_pipeline_heartbeat_matches_api_loader(tmp_path):
+    results = run_pipeline(tmp_path, only=["season_stats"])
+    with engine.connect() as conn:
+        assert list(results["heartbeat"]) == load_heartbeats(conn)
+    written = {p.name for p in tmp_path.iterdir()}
+    assert {"season_stats.json", "manifest.json"} <= written
+    assert not {"heartbeat_data.json", "heartbeat"} & written
+
+
+def test_incremental_export_matches_full_export(tmp_path, committed_scratch_game,
+                                                insert_events):
+    # A lifetime WPA of exactly 0.9005, which float addition puts just below it
+    batter = f"Test Batter {committed_scratch_game}"
+    with engine.begin() as conn:
+        insert_events(conn, committed_scratch_game,
+                      *({"batter_name": batter, "wpa": wpa} for wpa in (0.3, 0.3, 0.3, 0.0005)))
+    full, incremental = tmp_path / "full", tmp_path / "incremental"
+    run_pipeline(full)
+    leaders = json.loads((full / "wpa_leaders.json").read_text())
+    assert {"batter_name": batter, "lifetime_wpa": 0.901} in leaders
+    shutil.copytree(full, incremental)
+
+    # Re-export the oldest and newest games: merges must reproduce the full output
+    with engine.begin() as conn:
+        pks = conn.execute(text(
+            "SELECT mlb_game_pk FROM games WHERE attended AND mlb_game_pk IS NOT NULL "
+            "ORDER BY date, mlb_game_pk"
+        )).scalars().all()
+        for pk in {pks[0], pks[-1]}:
+            record_game_change(conn, pk, "statcast")
+    run_pipeline(incremental, incremental=True)
+
+    for name in ("games.json", "longest_homers.json", "wpa_leaders.json", "wpa_sparkline.json",
+                 "barrel_map.json", "heartbeat_data.json", "drama_index.json",
+                 "season_stats.json", "heartbeat/index.json"):
+        assert (incremental / name).read_bytes() == (full / name).read_bytes(), name
+
+    # Nothing pending now
+    assert run_pipeline(incremental, incremental=True) == {}
+
+
+def test_sparkline_series_ends_at_game_total_wpa(tmp_path):
+    sparkline = run_pipeline(tmp_path, only=["wpa_sparkline"])["wpa_sparkline"]
+    with engine.connect() as conn:
+        totals = dict(conn.execute(text(
+            "SELECT se.mlb_game_pk, SUM(se.wpa) FROM statcast_events se "
+            "JOIN games g USING (mlb_game_pk) WHERE g.attended AND se.wpa IS NOT NULL "
+            "GROUP BY se.mlb_game_pk"
+        )).all())
+    assert {game["game_pk"] for game in sparkline} == set(totals)
+    for game in sparkline:
+        assert game["series"][-1] == pytest.approx(totals[game["game_pk"]], abs=1e-3)
+
+
+def test_spool_reads_back_records_in_any_order():
+    spool = Spool()
+    records = [{"game_pk": i, "points": [i, None, "x"]} for i in range(5)]
+    spool.extend(records)
+    assert len(spool) == 5 and list(spool) == records
+    assert spool[3] == records[3] and spool[-1] == records[-1] and spool[1:3] == records[1:3]
+    assert list(spool.reordered([4, 0, 2])) == [records[4], records[0], records[2]]
+
+
+def test_game_batches_do_not_change_per_game_artifacts(tmp_path, monkeypatch):
+    stages = ["barrel_map", "wpa_sparkline", "heartbeat", "spray_chart"]
+    run_pipeline(tmp_path / "default", only=stages)
+    # Build every game in its own batch
+    monkeypatch.setattr(export_pipeline, "GAME_BATCH_ROWS", 1)
+    run_pipeline(tmp_path / "single", only=stages)
+    for name in ("barrel_map.json", "wpa_sparkline.json", "heartbeat_data.json",
+                 "spray_chart.json"):
+        assert (tmp_path / "single" / name).read_bytes() == (tmp_path / "default" / name).read_bytes()
+
+
+# ===================== columnar format =====================
+
+
+def test_columnar_round_trip_keeps_nulls_absent_keys_and_nested_rows():
+    rows = [
+        {"team": "BOS", "speed": 101.2, "note": None, "points": [{"x": 0, "event": "game_start"}]},
+        {"team": "TOR", "speed": None, "note": "walk-off",
+         "points": [{"x": 0.5, "event": "single", "prev_y": 0.5}, {"x": 1, "event": "single"}]},
+        {"team": "BOS", "speed": 88, "extra": True, "points": None},
+    ]
+    table = encode_columnar(rows)
+    assert is_columnar(table)
+    assert table["columns"]["team"] == [0, 1, 0]
+    assert "note" not in table["dict"]  # never repeated, kept as plain strings
+    assert decode_columnar(json.loads(json.dumps(table))) == rows
+    assert decode_columnar(rows) is rows
+
+
+def test_columnar_export_decodes_to_json_export(tmp_path):
+    plain, columnar = tmp_path / "json", tmp_path / "columnar"
+    stages = ["barrel_map", "heartbeat"]
+    run_pipeline(plain, only=stages)
+    run_pipeline(columnar, only=stages, format="columnar")
+
+    for name in ("barrel_map.json", "heartbeat_data.json"):
+        encoded = json.loads((columnar / name).read_text())
+        assert is_columnar(encoded), name
+        assert decode_columnar(encoded) == json.loads((plain / name).read_text()), name
+        assert (columnar / name).stat().st_size * 3 < (plain / name).stat().st_size, name
+
+    shard = next((plain / "heartbeat").glob("[0-9]*.json")).name
+    encoded = json.loads((columnar / "heartbeat" / shard).read_text())
+    encoded["heartbeat_points"] = decode_columnar(encoded["heartbeat_points"])
+    assert encoded == json.loads((plain / "heartbeat" / shard).read_text())
+
+
+# ===================== published artifacts =====================
+
+
+def test_atomic_write_skips_unchanged_content(tmp_path):
+    path = tmp_path / "games.json"
+    assert write_json_atomic(path, [1, 2])
+    mtime = path.stat().st_mtime_ns
+    assert not write_json_atomic(path, [1, 2])
+    assert path.stat().st_mtime_ns == mtime
+    assert write_json_atomic(path, [1, 2, 3])
+    assert json.loads(path.read_text()) == [1, 2, 3]
+    assert [p.name for p in tmp_path.iterdir()] == ["games.json"]  # no temp files left
+
+
+@pytest.mark.parametrize("dump_kwargs", [{}, {"indent": 2}, {"separators": (",", ":")}])
+def test_streamed_json_array_matches_json_dumps(tmp_path, dump_kwargs):
+    path = tmp_path / "rows.json"
+    for items in ([], [{"a": [1, {"b": None}], "c": "x\ny"}, [], 2.5]):
+        _, count = write_json_array_atomic(path, iter(items), **dict(dump_kwargs))
+        assert count == len(items)
+        assert path.read_text() == json.dumps(items, **dump_kwargs)
+    assert write_json_array_atomic(path, iter(items), **dict(dump_kwargs)) == (False, len(items))
+
+
+def test_publish_writes_hashed_copies_and_keeps_one_previous_generation(tmp_path):
+    path = tmp_path / "heartbeat" / "1.json"
+    paths = []
+    for version in range(3):
+        write_json_atomic(path, {"version": version})
+        manifest = publish(tmp_path, [path])
+        entry = manifest["files"]["heartbeat/1.json"]
+        paths.append(entry["path"])
+        assert entry["path"] == hashed_name("heartbeat/1.json", entry["sha256"])
+        assert (tmp_path / entry["path"]).read_bytes() == path.read_bytes()
+        assert (tmp_path / f"{entry['path']}.gz").exists()
+    assert entry["previous"] == paths[1]
+    assert not (tmp_path / paths[0]).exists() and not (tmp_path / f"{paths[0]}.gz").exists()
+    assert json.loads((tmp_path / "manifest.json").read_text()) == manifest
+
+    # Unchanged content leaves the manifest untouched; a vanished source is dropped
+    mtime = (tmp_path / "manifest.json").stat().st_mtime_ns
+    assert publish(tmp_path, [path]) == manifest
+    assert (tmp_path / "manifest.json").stat().st_mtime_ns == mtime
+    path.unlink()
+    assert publish(tmp_path, [])["files"] == {}
+    assert sorted(p.name for p in (tmp_path / "heartbeat").iterdir()) == []
+
+
+def test_pipeline_manifest_lists_every_written_artifact(tmp_path):
+    run_pipeline(tmp_path, only=["games", "heartbeat"])
+    files = json.loads((tmp_path / "manifest.json").read_text())["files"]
+    shards = {f"heartbeat/{p.name}" for p in (tmp_path / "heartbeat").glob("[0-9]*.json")
+              if p.name.count(".") == 1}
+    assert set(files) == {"games.json", "heartbeat_data.json", "heartbeat/index.json"} | shards
+    for name, entry in files.items():
+        assert (tmp_path / entry["path"]).read_bytes() == (tmp_path / name).read_bytes()
+
+
+# ===================== parquet snapshot =====================
+
+SNAPSHOT_ARTIFACTS = ("games.json", "longest_homers.json", "wpa_leaders.json",
+                      "wpa_sparkline.json", "barrel_map.json", "heartbeat_data.json",
+                      "drama_index.json", "season_stats.json", "heartbeat/index.json",
+                      "spray_chart.json")
+
+
+def test_snapshot_export_matches_database_export(tmp_path):
+    pytest.importorskip("pyarrow")
+    metadata = write_snapshot(engine, tmp_path / "snapshot")
+    source = SnapshotSource(tmp_path / "snapshot")
+    assert len(source.games()) == metadata["games"]
+    assert sum(len(chunk) for chunk in source.events()) == sum(metadata["events"].values())
+
+    run_pipeline(tmp_path / "db")
+    run_pipeline(tmp_path / "parquet", snapshot=tmp_path / "snapshot")
+    for name in SNAPSHOT_ARTIFACTS:
+        assert (tmp_path / "parquet" / name).read_bytes() == (tmp_path / "db" / name).read_bytes(), name
+
+    with pytest.raises(ValueError):
+        run_pipeline(tmp_path / "parquet", snapshot=tmp_path / "snapshot", incremental=True)
+
+
+def test_incremental_snapshot_matches_full_snapshot(tmp_path):
+    pytest.importorskip("pyarrow")
+    full, incremental = tmp_path / "full", tmp_path / "incremental"
+    write_snapshot(engine, incremental)
+    with engine.begin() as conn:
+        pk = conn.execute(text(
+            "SELECT mlb_game_pk FROM games WHERE attended AND mlb_game_pk IS NOT NULL "
+            "ORDER BY date DESC LIMIT 1"
+        )).scalar_one()
+        record_game_change(conn, pk, "statcast")
+    write_snapshot(engine, incremental, incremental=True)
+    write_snapshot(engine, full)
+
+    assert SnapshotSource(incremental).games() == SnapshotSource(full).games()
+    def events(root):
+        return [row for chunk in SnapshotSource(root).events() for row in chunk]
+
+    assert events(incremental) == events(full)
+
+
+# ===================== spray chart =====================
+
+
+def test_field_coords_follow_hit_coordinates():
+    # Straight-away center, down the right-field line, and a ball without coordinates
+    x, y, distance, estimated = field_coords(
+        [125.42, 225.42, None], [98.27, 98.27, None], [400, None, 350], [1, 2, 3]
+    )
+    assert x[0] == pytest.approx(0) and y[0] == pytest.approx(400)
+    assert spray_angle(225.42, 98.27) == 45.0
+    assert x[1] == pytest.approx(y[1]) and distance[1] == pytest.approx(100 * 2.5 * 2 ** 0.5)
+    assert estimated.tolist() == [False, False, True]
+    assert distance[2] == 350 and abs(np.arctan2(x[2], y[2])) <= np.pi / 4
+
+
+def test_spray_chart_is_deterministic(tmp_path):
+    run_pipeline(tmp_path / "a", only=["spray_chart"])
+    run_pipeline(tmp_path / "b", only=["spray_chart"])
+    first = (tmp_path / "a" / "spray_chart.json").read_bytes()
+    assert first == (tmp_path / "b" / "spray_chart.json").read_bytes()
+    for ball in json.loads(first):
+        assert abs(np.arctan2(ball["field_x"], ball["field_y"])) <= np.pi / 4 + 1e-3
+
+
+# ===================== vectorized scoring =====================
+
+
+def _random_games(n_games, seed=11):
+    rng = np.random.default_rng(seed)
+    games = []
+    for _ in range(n_games):
+        n = int(rng.integers(0, 120))
+        scale = rng.choice([0.02, 0.1, 0.5])
+        games.append([{"wpa": float(w)} for w in rng.normal(0, scale, n)])
+    games.append([{"wpa": 0.9}, {"wpa": -0.9}] * 50)  # capped at 100
+    games.append([{"wpa": 0.05}])  # single event, no volatility
+    return games
+
+
+def test_score_games_matches_calculate_drama_score():
+    games = _random_games(500)
+    game_index = np.repeat(np.arange(len(games)), [len(g) for g in games])
+    wpa = np.array([e["wpa"] for g in games for e in g])
+
+    expected = [calculate_drama_score(g or [{"wpa": 0.0}]) for g in games]
+    assert score_games(game_index, wpa, len(games)) == expected
+
+
+def test_categorize_games_matches_categorize_drama():
+    scores = [0, 19.9, 20, 39.9, 40, 69.9, 70, 100]
+    assert categorize_games(scores) == [categorize_drama(s) for s in scores]
+
+
+def test_game_heartbeat_curve_is_clamped_and_normalized():
+    events = [
+        {"wpa": 0.3, "home_win_exp": 0.9, "batter_name": "A", "pitcher_name": "P",
+         "event_type": "single", "description": "", "situation": "", "score_context": ""},
+        {"wpa": -0.4, "home_win_exp": 0.2, "batter_name": "B", "pitcher_name": "P",
+         "event_type": "field_out", "description": "", "situation": "", "score_context": ""},
+    ]
+    game = {"mlb_game_pk": 1, "date": "2024-05-01", "home_team": "BOS", "away_team": "NYY",
+            "home_score": 3, "away_score": 2}
+    points = build_game_heartbeat(game, events)["heartbeat_points"]
+
+    assert [p["x"] for p in points] == [0, 0.5, 1.0]
+    assert [p["y"] for p in points] == [0.9, 1.0, 0.0]
+    assert points[2]["prev_y"] == 0.2
+
+
+# ===================== heartbeat overview =====================
+
+
+def test_lttb_keeps_endpoints_and_one_point_per_bucket():
+    x = np.linspace(0, 1, 301)
+    y = np.sin(x * 20)
+    keep = lttb_indices(x, y, 40)
+    assert len(keep) == 40 and keep[0] == 0 and keep[-1] == 300
+    assert (np.diff(keep) > 0).all()
+    # A spike is the largest triangle in its bucket
+    y[150] = 5
+    assert 150 in lttb_indices(x, y, 40)
+    assert lttb_indices(x[:10], y[:10], 40).tolist() == list(range(10))
+
+
+def test_overview_heartbeat_keeps_key_moments_and_is_idempotent():
+    rng = np.random.default_rng(3)
+    wpa = rng.normal(0, 0.02, 300)
+    wpa[[17, 123, 250]] = [0.3, -0.25, 0.12]
+    points = [{"x": i / 300, "y": 0.5, "wpa": float(w)} for i, w in enumerate(wpa)]
+    game = {"game_pk": 1, "heartbeat_points": points}
+
+    overview = overview_heartbeat(game)
+    kept = overview["heartbeat_points"]
+    assert overview["detail_points"] == 300 and len(kept) <= OVERVIEW_POINTS + 3
+    assert {17, 123, 250} <= {round(p["x"] * 300) for p in kept}
+    assert overview_heartbeat(overview) == overview
@@ -0,0 +1,79 @@
+"""Tests for the record/replay HTTP transport and its stand-in server.
+
+No network or database connection required: "upstream" is an httpx.MockTransport.
+"""
+
+import time
+
+import httpx
+import pytest
+import requests
+
+from scraper.http_replay import (
+    FixtureMissing,
+    FixtureStore,
+    ReplayTransport,
+    StandInServer,
+    canonical_url,
+)
+
+
+def _upstream(calls):
+    def handler(request):
+        calls.append(str(request.url))
+        if "csv" in request.url.path:
+            return httpx.Response(200, text="game_pk,events\n1,single\n",
+                                  headers={"content-type": "text/csv", "x-served-by": "savant"})
+        return httpx.Response(200, json={"people": [{"fullName": "Rafael Devers"}]})
+
+    return httpx.MockTransport(handler)
+
+
+def test_canonical_url_sorts_query_parameters():
+    assert canonical_url("https://x.test/s?b=2&a=1") == canonical_url("https://x.test/s?a=1&b=2")
+
+
+def test_record_then_replay_without_upstream(tmp_path):
+    calls = []
+    store = FixtureStore(tmp_path)
+    url = "https://statsapi.mlb.com/api/v1/people/646240"
+    with httpx.Client(transport=ReplayTransport("record", store, transport=_upstream(calls))) as c:
+        recorded = c.get(url)
+    assert calls == [url] and store.path("GET", url).exists()
+
+    with httpx.Client(transport=ReplayTransport("replay", store, transport=_upstream(calls))) as c:
+        replayed = c.get(url)
+        with pytest.raises(FixtureMissing):
+            c.get("https://statsapi.mlb.com/api/v1/people/1")
+    assert len(calls) == 1
+    assert replayed.json() == recorded.json() == {"people": [{"fullName": "Rafael Devers"}]}
+
+
+def test_replay_injects_latency(tmp_path):
+    store = FixtureStore(tmp_path)
+    url = "https://statsapi.mlb.com/api/v1/schedule?sportId=1"
+    with httpx.Client(transport=ReplayTransport("record", store, transport=_upstream([]))) as c:
+        c.get(url)
+    with httpx.Client(transport=ReplayTransport("replay", store, latency_ms=50)) as c:
+        started = time.perf_counter()
+        c.get(url)
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_stand_in_server_replays_for_requests_clients(tmp_path):
+    store = FixtureStore(tmp_path)
+    upstream = "https://baseballsavant.mlb.com/statcast_search/csv?game_pk=1&all=true"
+    with httpx.Client(transport=ReplayTransport("record", store, transport=_upstream([]))) as c:
+        c.get(upstream)
+
+    with StandInServer(ReplayTransport("replay", store)) as server:
+        root = server.url_for("https://baseballsavant.mlb.com")
+        resp = requests.get(root + "/statcast_search/csv?all=true&game_pk=1", timeout=5)
+        assert resp.status_code == 200 and resp.text == "game_pk,events\n1,single\n"
+        assert resp.headers["content-type"] == "text/csv"
+        assert requests.get(root + "/statcast_search/csv?game_pk=2", timeout=5).status_code == 502
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ReplayTransport("offline")
@@ -0,0 +1,86 @@
+"""Cold-start budgets for the entry points.
+
+Each entry point is imported in a fresh interpreter; the test fails when the import
+pulls in a dependency it should defer or loads more modules than its budget.  The
+failure message lists the slowest imports from ``python -X importtime``.
+
+Wall-clock budgets depend on the machine, so they are only checked when
+``IMPORT_BUDGET_SCALE`` is set (best of two runs): ``1`` for the budgets as written,
+roughly twice what a development machine measures, or more on a slower one.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# None: time budgets are not checked
+TIME_SCALE = float(os.environ["IMPORT_BUDGET_SCALE"]) if os.getenv("IMPORT_BUDGET_SCALE") else None
+HEAVY = ("numpy", "pandas", "pyarrow", "pybaseball", "httpx", "sqlalchemy", "fastapi")
+
+# module: (max seconds, max new modules, dependencies that must not be imported)
+BUDGETS = {
+    "config": (0.05, 10, HEAVY),
+    "scripts.pk_finder": (0.05, 20, HEAVY),
+    "gamelog.__main__": (0.15, 80, HEAVY),
+    "api.main": (1.8, 600, ("numpy", "pandas", "pyarrow", "pybaseball", "httpx")),
+    "scraper.statcast_fetcher": (0.9, 400, ("numpy", "pandas", "pyarrow", "pybaseball")),
+    "scraper.enrich_games": (0.9, 400, ("numpy", "pandas", "pyarrow", "pybaseball")),
+    "scraper.snapshot": (0.6, 260, ("numpy", "pandas", "pyarrow", "httpx")),
+    "scripts.export_pipeline": (0.6, 270, ("numpy", "pandas", "pyarrow", "pybaseball")),
+    "scripts.export_json": (0.7, 280, ("numpy", "pandas", "pyarrow", "pybaseball")),
+    "scripts.export_heartbeat_data": (0.7, 280, ("numpy", "pandas", "pyarrow", "pybaseball")),
+    "scripts.export_spray_chart": (0.7, 280, ("numpy", "pandas", "pyarrow", "pybaseball")),
+}
+
+PROBE = """
+import json, sys, time
+before = set(sys.modules)
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+new = set(sys.modules) - before
+print(json.dumps({{"seconds": seconds, "modules": len(new),
+                  "top": sorted({{m.split(".")[0] for m in new}})}}))
+"""
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, cwd=ROOT, env=env, check=True
+    )
+
+
+def _slowest_imports(module: str, n: int = 15) -> str:
+    stderr = _run("-X", "importtime", "-c", f"import {module}").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                rows.append((int(cumulative), name.rstrip()))
+    return "\n".join(f"{us / 1000:8.1f} ms {name}" for us, name in sorted(rows)[-n:][::-1])
+
+
+@pytest.mark.parametrize("module", BUDGETS)
+def test_entry_point_import_budget(module):
+    max_seconds, max_modules, forbidden = BUDGETS[module]
+    repeats = 1 if TIME_SCALE is None else 2
+    runs = [json.loads(_run("-c", PROBE.format(module=module)).stdout) for _ in range(repeats)]
+    best = min(runs, key=lambda r: r["seconds"])
+
+    loaded = sorted(set(forbidden) & set(best["top"]))
+    assert not loaded, f"import {module} loads {loaded}; defer them to the code that needs them"
+    problems = []
+    if best["modules"] > max_modules:
+        problems.append(f"{best['modules']} modules > budget {max_modules}")
+    if TIME_SCALE is not None and best["seconds"] > max_seconds * TIME_SCALE:
+        problems.append(f"{best['seconds']:.3f}s > budget {max_seconds * TIME_SCALE:.3f}s")
+    assert not problems, (
+        f"import {module}: {', '.join(problems)}\n{_slowest_imports(module)}"
+    )
@@ -0,0 +1,68 @@
+"""Tests for the opt-in profiling hooks (scraper/profiling.py)."""
+
+import pstats
+import sys
+import time
+import tracemalloc
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from scraper import profiling
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += len(bytearray(1024))
+    return total
+
+
+def test_profile_writes_pstats_flamegraphs_and_memory_snapshot(tmp_path):
+    with profiling.profile("unit", "cpu,sample,memory", out_dir=tmp_path) as written:
+        _busy(0.1)
+
+    by_kind = {p.name.removeprefix(written[0].stem): p for p in written}
+    assert set(by_kind) == {".folded", ".pstats", "-cpu.txt", ".tracemalloc",
+                            "-memory.txt", "-memory.folded"}
+
+    stats = pstats.Stats(str(by_kind[".pstats"]))
+    assert any(func[2] == "_busy" for func in stats.stats)
+    samples = by_kind[".folded"].read_text().splitlines()
+    assert any("_busy (" in line for line in samples)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in samples)
+    assert tracemalloc.Snapshot.load(str(by_kind[".tracemalloc"])).traces
+    assert not tracemalloc.is_tracing()
+
+
+def test_profile_is_a_no_op_without_modes(tmp_path):
+    with profiling.profile("unit", "", out_dir=tmp_path) as written:
+        _busy(0.01)
+    assert written == [] and not any(tmp_path.iterdir())
+    with pytest.raises(ValueError, match="flame"):
+        profiling.parse_modes("cpu,flame")
+
+
+def test_entry_point_takes_profile_flag_off_argv(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(sys, "argv", ["export_x.py", "out/", "--profile=sample", "--only", "a"])
+    seen = []
+
+    @profiling.entry_point("export_x")
+    def main():
+        seen.append(list(sys.argv))
+        _busy(0.05)
+
+    main()
+    assert seen == [["export_x.py", "out/", "--only", "a"]]
+    assert [p.suffix for p in tmp_path.iterdir()] == [".folded"]
+
+
+def test_api_lifespan_profiles_when_enabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE", "sample")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+    assert [p.name.split("-")[0] for p in tmp_path.iterdir()] == ["api"]
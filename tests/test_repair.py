@@ -0,0 +1,76 @@
+"""Tests for column-level repair of statcast_events (scraper/repair.py)."""
+
+import httpx
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from config import get_engine
+from scraper import repair
+from scraper.http_replay import FixtureStore, savant_game_csv_url
+
+
+@pytest.fixture
+def store(tmp_path, committed_scratch_game):
+    payload = pd.DataFrame({
+        "at_bat_number": [1, 1, 2],
+        "pitch_number": [1, 2, 1],
+        "play_id": ["p-1-1", "p-1-2", "p-2-1"],
+        "home_win_exp": [0.6, 0.55, 0.25],
+        "delta_home_win_exp": [0.0, -0.05, -0.3],
+        "hc_x": [None, None, 120.5],
+    })
+    store = FixtureStore(tmp_path)
+    store.save(httpx.Request("GET", savant_game_csv_url(committed_scratch_game)), 200,
+               {"content-type": "text/csv"}, payload.to_csv(index=False).encode())
+    return store
+
+
+def _events(conn, pk):
+    return conn.execute(text(
+        "SELECT clip_uuid, at_bat_number, pitch_number, home_win_exp, away_win_exp, wpa, hc_x "
+        "FROM statcast_events WHERE mlb_game_pk = :pk ORDER BY clip_uuid"
+    ), {"pk": pk}).all()
+
+
+def test_repair_patches_only_missing_values_in_place(committed_scratch_game, store,
+                                                     insert_events):
+    game_pk = committed_scratch_game
+    with get_engine().begin() as conn:
+        insert_events(
+            conn, game_pk,
+            # complete: a different payload value must not overwrite it
+            {"at_bat_number": 1, "pitch_number": 1, "clip_uuid": "p-1-1",
+             "home_win_exp": 0.5, "away_win_exp": 0.5, "wpa": 0.0},
+            {"at_bat_number": 1, "pitch_number": 2, "clip_uuid": "p-1-2"},
+            # stored before the pitch identity was kept: matched on its clip
+            {"clip_uuid": "p-2-1", "hc_x": 120.5},
+        )
+        [game] = repair.missing_columns(conn, repair.WIN_PROBABILITY_COLUMNS, [game_pk])
+    assert (game.events, game.missing) == (3, {"home_win_exp": 2, "away_win_exp": 2, "wpa": 2})
+
+    dry = repair.repair_game(game, fetch=False, dry_run=True, store=store)
+    assert (dry.rows_patched, dry.source) == (2, "cache")
+    with get_engine().connect() as conn:
+        assert _events(conn, game_pk)[1].home_win_exp is None
+
+    assert repair.repair_game(game, fetch=False, store=store).rows_patched == 2
+    with get_engine().connect() as conn:
+        assert _events(conn, game_pk) == [
+            ("p-1-1", 1, 1, 0.5, 0.5, 0.0, None),
+            ("p-1-2", 1, 2, 0.55, 0.45, -0.05, None),
+            ("p-2-1", 2, 1, 0.25, 0.75, -0.3, 120.5),
+        ]
+        assert repair.missing_columns(conn, repair.WIN_PROBABILITY_COLUMNS, [game_pk]) == []
+        changes = conn.execute(text(
+            "SELECT change_type FROM game_changes WHERE mlb_game_pk = :pk"
+        ), {"pk": game_pk}).scalars().all()
+    assert changes == ["statcast_repair"]
+
+
+def test_uncached_payload_is_not_fetched_with_fetch_off(tmp_path):
+    game = repair.GameRepair(999_999_999, 1, {"wpa": 1})
+    with pytest.raises(repair.RepairError):
+        repair.repair_game(game, fetch=False, store=FixtureStore(tmp_path))
+    with pytest.raises(ValueError, match="Not repairable"):
+        repair.missing_columns(None, ["batter_name"])
@@ -1,11 +1,18 @@
-"""Tests for pure functions: sort_statcast_dataframe, safe_int, normalize_player_name, is_barrel.
+"""Tests for pure functions: sort_statcast_dataframe, safe_int, normalize_player_name, is_barrel,
+and the ingest instrumentation.
 
 No database connection required.
 """
 
+import json
+import threading
+import time
+
 import pandas as pd
+import pytest
 
 from config import is_barrel
+from scraper import instrumentation
 from scraper.players import normalize_player_name
 from scraper.statcast_fetcher import safe_int, sort_statcast_dataframe
 
@@ -144,3 +151,90 @@ def test_barrel_none_velo():
 
 def test_barrel_both_none():
     assert is_barrel(None, None) is False
+
+
+# ===================== instrumentation =====================
+
+
+def test_stage_times_are_exclusive_of_nested_stages():
+    ingest = instrumentation.IngestRun()
+    with ingest.game(1) as record:
+        with instrumentation.stage("transform"):
+            with instrumentation.stage("fetch:savant_statcast"):
+                time.sleep(0.05)
+            with pytest.raises(ValueError), instrumentation.stage("fetch:savant_gf"):
+                raise ValueError("upstream down")
+        instrumentation.count("rows_written", 3)
+    # Outside a game the helpers are no-ops
+    with instrumentation.stage("transform"):
+        instrumentation.count("rows_written")
+
+    assert record.stages["fetch:savant_statcast"].seconds >= 0.05
+    assert record.stages["transform"].seconds < 0.05
+    assert record.stages["fetch:savant_gf"].errors == 1
+    assert record.counters == {"rows_written": 3}
+
+
+def test_ingest_run_logs_games_and_summary(tmp_path):
+    @instrumentation.counted_cache("name_cache")
+    def lookup(pid):
+        return str(pid)
+
+    log = tmp_path / "logs" / "ingest.jsonl"
+    ingest = instrumentation.IngestRun(log)
+    with ingest.game(1, "2024-04-01") as record:
+        for pid in (10, 11, 10):
+            lookup(pid)
+        record.status = "inserted"
+    with pytest.raises(RuntimeError), ingest.game(2), instrumentation.stage("db_write"):
+        raise RuntimeError("connection lost")
+    summary = ingest.finish()
+
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [line["event"] for line in lines] == ["game", "game", "run"]
+    assert {line["run_id"] for line in lines} == {ingest.run_id}
+    assert lines[0]["counters"] == {"name_cache_hits": 1, "name_cache_misses": 2}
+    assert lines[1]["status"] == "failed" and "connection lost" in lines[1]["error"]
+    assert summary["games"] == {"failed": 1, "inserted": 1}
+    assert summary["stages"]["db_write"]["errors"] == 1
+    assert "db_write" in ingest.summary_table()
+
+
+def test_games_ingested_in_parallel_are_charged_only_their_own_work():
+    @instrumentation.counted_cache("name_cache")
+    def lookup(pid):
+        return str(pid)
+
+    ingest = instrumentation.IngestRun()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def busy(game_pk, pids):
+        with ingest.game(game_pk):
+            barrier.wait()
+            with instrumentation.stage("work"):
+                deadline = time.perf_counter() + 0.2
+                while time.perf_counter() < deadline:
+                    pass
+                for pid in pids:
+                    lookup(pid)
+
+    def idle(game_pk, pids):
+        with ingest.game(game_pk):
+            barrier.wait()
+            with instrumentation.stage("work"):
+                time.sleep(0.2)
+                for pid in pids:
+                    lookup(pid)
+
+    threads = [threading.Thread(target=busy, args=(1, (10, 11, 10))),
+               threading.Thread(target=idle, args=(2, (20, 20, 20, 20)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    games = {record.game_pk: record for record in ingest.games}
+    assert games[1].counters == {"name_cache_hits": 1, "name_cache_misses": 2}
+    assert games[2].counters == {"name_cache_hits": 3, "name_cache_misses": 1}
+    assert games[1].stages["work"].cpu_seconds > 0.1
+    assert games[2].stages["work"].cpu_seconds < 0.05
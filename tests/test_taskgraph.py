@@ -0,0 +1,86 @@
+"""Tests for the fingerprinted task graph (scraper/taskgraph.py)."""
+
+import threading
+
+from scraper.taskgraph import Files, Task, Value, run_graph
+
+
+def _statuses(results):
+    return {r.name: r.status for r in results}
+
+
+def test_tasks_rerun_only_when_inputs_or_outputs_change(tmp_path):
+    source, target = tmp_path / "in.txt", tmp_path / "out.txt"
+    source.write_text("a")
+    state = tmp_path / "tasks.json"
+    runs = []
+
+    def build(run):
+        runs.append(run.changed)
+        target.write_text(source.read_text().upper())
+
+    def graph(fmt="upper"):
+        return [Task("build", build, inputs=(Files("source", [source], content=True),
+                                             Value("format", fmt)),
+                     outputs=(Files("target", [target]),))]
+
+    assert _statuses(run_graph(graph(), state_path=state, log=None)) == {"build": "ran"}
+    assert _statuses(run_graph(graph(), state_path=state, log=None)) == {"build": "up-to-date"}
+    source.write_text("b")
+    run_graph(graph(), state_path=state, log=None)
+    run_graph(graph("lower"), state_path=state, log=None)
+    target.unlink()
+    run_graph(graph("lower"), state_path=state, log=None)
+    assert runs == [None, {"source"}, {"format"}, {"target"}]
+    assert target.read_text() == "B"
+
+    dry = run_graph(graph(), state_path=state, dry_run=True, force=["b*"], log=None)
+    assert _statuses(dry) == {"build": "stale"} and len(runs) == 4
+
+
+def test_independent_tasks_run_in_parallel_and_failures_block_downstream(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+    state = tmp_path / "tasks.json"
+
+    def meet(run):
+        barrier.wait()  # times out unless both sides run at once
+
+    def fail(run):
+        raise RuntimeError("upstream down")
+
+    tasks = [
+        Task("left", meet),
+        Task("right", meet),
+        Task("join", requires=("left", "right")),
+        Task("broken", fail),
+        Task("after_broken", requires=("broken",)),
+        Task("pending", lambda run: False),
+    ]
+    results = run_graph(tasks, state_path=state, jobs=2, log=None)
+    assert _statuses(results) == {
+        "left": "ran", "right": "ran", "join": "ran",
+        "broken": "failed", "after_broken": "blocked", "pending": "incomplete",
+    }
+    again = _statuses(run_graph(tasks, targets=["join"], state_path=state, log=None))
+    # Only the target's requirements are pulled in; an incomplete task is retried
+    assert again == {"left": "up-to-date", "right": "up-to-date", "join": "up-to-date"}
+    assert _statuses(run_graph(tasks[5:], state_path=state, log=None)) == {"pending": "incomplete"}
+
+
+def test_groups_expand_into_children_and_force_reaches_them(tmp_path):
+    state = tmp_path / "tasks.json"
+    ran = []
+
+    def games():
+        return [Task(f"fetch:{pk}", lambda run, pk=pk: ran.append((pk, run.forced)),
+                     inputs=(Value("game", pk),)) for pk in (1, 2)]
+
+    tasks = [Task("fetch", expand=games), Task("export", requires=("fetch",))]
+    first = run_graph(tasks, state_path=state, log=None)
+    assert [r.name for r in first][-1] == "export"
+    assert _statuses(first)["fetch"] == "ran"
+
+    second = run_graph(tasks, targets=["export"], state_path=state, force=["fetch"], log=None)
+    assert _statuses(second) == {"fetch:1": "ran", "fetch:2": "ran", "fetch": "ran",
+                                 "export": "up-to-date"}
+    assert sorted(ran) == [(1, False), (1, True), (2, False), (2, True)]
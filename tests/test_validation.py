@@ -0,0 +1,63 @@
+"""Tests for the one-pass validation engine (scraper/validation.py)."""
+
+from sqlalchemy import text
+
+from config import get_engine
+from scraper.snapshot import SnapshotSource, write_snapshot
+from scraper.validation import validate, validate_snapshot
+
+
+def test_rules_report_counts_and_sample_ids_from_db_and_snapshot(committed_scratch_game, tmp_path,
+                                                                  insert_events):
+    game_pk = committed_scratch_game  # attended and in the past, but never scored
+    events = [
+        (game_pk, "Good Batter", 0.1, 100, 20),
+        (game_pk, "Good Batter", 1.5, None, None),
+        (game_pk, "", -0.2, 95, 10),
+        (game_pk, None, 0.0, 140, -95),
+        (game_pk + 1, "Orphan Batter", 0.0, None, None),
+    ]
+    with get_engine().begin() as conn:
+        ids = [
+            insert_events(conn, pk, {"batter_name": batter, "wpa": wpa,
+                                     "launch_speed": ls, "launch_angle": la})[0]
+            for pk, batter, wpa, ls, la in events
+        ]
+        game_id = conn.execute(text("SELECT id FROM games WHERE mlb_game_pk = :pk"),
+                               {"pk": game_pk}).scalar_one()
+        report = validate(conn, [game_pk, game_pk + 1], samples=1)
+
+    assert report.scanned == {"statcast_events": 5, "games": 1}
+    found = {name: (r.violations, r.sample_ids) for name, r in report.results.items()}
+    assert found == {
+        "wpa_in_range": (1, [ids[1]]),
+        "batter_name_present": (2, [ids[2]]),
+        "launch_speed_in_range": (1, [ids[3]]),
+        "launch_angle_in_range": (1, [ids[3]]),
+        "events_only_attended": (0, []),
+        "events_reference_games": (1, [ids[4]]),
+        "attended_games_have_pk": (0, []),
+        "game_pk_unique": (0, []),
+        "past_attended_games_have_scores": (1, [game_id]),
+    }
+
+    write_snapshot(get_engine(), tmp_path / "snapshot")
+    snapshot = validate_snapshot(SnapshotSource(tmp_path / "snapshot"), [game_pk], samples=1)
+    assert snapshot.scanned == {"statcast_events": 4}
+    assert {name: (r.violations, r.sample_ids) for name, r in snapshot.results.items()} == {
+        name: found[name] for name in
+        ("wpa_in_range", "batter_name_present", "launch_speed_in_range", "launch_angle_in_range")
+    }
+
+
+def test_scoped_validation_still_finds_attended_games_without_a_pk(db_conn, scratch_game):
+    orphan_id = db_conn.execute(text(
+        "INSERT INTO games (date, home_team, away_team, attended, home_score, away_score) "
+        "VALUES ('2024-04-02', 'BOS', 'NYY', true, 1, 0) RETURNING id"
+    )).scalar_one()
+    report = validate(db_conn, [scratch_game])
+
+    assert report.violations("attended_games_have_pk") == 1
+    assert report.results["attended_games_have_pk"].sample_ids == [orphan_id]
+    assert report.scanned == {"statcast_events": 0, "games": 1}
+    assert "attended_games_have_pk over all games" in report.summary()
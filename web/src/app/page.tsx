@@ -8,6 +8,8 @@ import WinLossSparkline from "@/components/WinLossSparkline";
 import HeartbeatChart from "@/components/HeartbeatChart";
 import SeasonStats from "@/components/SeasonStats";
 import SprayChart from "@/components/SprayChart";
+import { fetchArtifact } from "@/lib/artifacts";
+import { decodeRows } from "@/lib/columnar";
 
 const formatDate = (dateString: string): string => {
   const date = new Date(dateString);
@@ -103,7 +105,8 @@ interface HeartbeatGame {
     label: string;
   };
   total_events: number;
-  heartbeat_points: HeartbeatPoint[];
+  heartbeat_points?: HeartbeatPoint[];  // Overview curve; full curve loaded by HeartbeatChart
+  detail_points?: number;
 }
 
 
@@ -156,16 +159,16 @@ export default function Home() {
         if (isStatic) {
           // Static mode: fetch JSON files directly
           const [gamesRes, homersRes, barrelRes, wpaRes, heartbeatRes] = await Promise.all([
-            fetch("/games.json"),
-            fetch("/longest_homers.json"),
-            fetch("/barrel_map.json"),
-            fetch("/drama_index.json"),
-            fetch("/heartbeat_data.json")
+            fetchArtifact("games.json"),
+            fetchArtifact("longest_homers.json"),
+            fetchArtifact("barrel_map.json"),
+            fetchArtifact("drama_index.json"),
+            fetchArtifact("heartbeat/index.json")
           ]);
           
           const gamesData = await gamesRes.json();
           const homersData: JsonLongestHomer[] = await homersRes.json();
-          const barrelData: JsonBattedBall[] = await barrelRes.json();
+          const barrelData = decodeRows<JsonBattedBall>(await barrelRes.json());
           const wpaData: WpaEvent[] = await wpaRes.json();
           const heartbeatData: HeartbeatGame[] = await heartbeatRes.json();
           
@@ -214,16 +217,16 @@ export default function Home() {
         } else {
           // Development mode: fetch JSON files directly for now
           const [gamesRes, homersRes, barrelRes, wpaRes, heartbeatRes] = await Promise.all([
-            fetch("/games.json"),
-            fetch("/longest_homers.json"),
-            fetch("/barrel_map.json"),
-            fetch("/drama_index.json"),
-            fetch("/heartbeat_data.json")
+            fetchArtifact("games.json"),
+            fetchArtifact("longest_homers.json"),
+            fetchArtifact("barrel_map.json"),
+            fetchArtifact("drama_index.json"),
+            fetchArtifact("heartbeat/index.json")
           ]);
           
           const gamesData = await gamesRes.json();
           const homersData: JsonLongestHomer[] = await homersRes.json();
-          const barrelData: JsonBattedBall[] = await barrelRes.json();
+          const barrelData = decodeRows<JsonBattedBall>(await barrelRes.json());
           const wpaData: WpaEvent[] = await wpaRes.json();
           const heartbeatData: HeartbeatGame[] = await heartbeatRes.json();
           
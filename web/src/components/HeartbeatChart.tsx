@@ -1,5 +1,7 @@
 "use client";
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
+import { fetchArtifact } from '@/lib/artifacts';
+import { decodeRows } from '@/lib/columnar';
 
 interface HeartbeatPoint {
   x: number;
@@ -28,10 +30,14 @@ interface HeartbeatGame {
     label: string;
   };
   total_events: number;
-  heartbeat_points: HeartbeatPoint[];
+  heartbeat_points?: HeartbeatPoint[];  // Overview curve in heartbeat/index.json
+  detail_points?: number;  // Set when heartbeat_points is downsampled; full curve fetched per game
   home_team?: string;  // Optional for backward compatibility
 }
 
+// Per-game curves are small shards, so fetch a few at a time in display order.
+const SHARD_FETCH_CONCURRENCY = 4;
+
 interface HeartbeatChartProps {
   games: HeartbeatGame[];
 }
@@ -46,9 +52,50 @@ export default function HeartbeatChart({ games }: HeartbeatChartProps) {
   } | null>(null);
 
 
+  const [pointsByGame, setPointsByGame] = useState<Record<number, HeartbeatPoint[]>>({});
+  const requestedPks = useRef<Set<number>>(new Set());
+
   // Sort games chronologically (recent first)
   const sortedGames = [...games].sort((a, b) => new Date(b.date).getTime() - new Date(a.date).getTime());
 
+  // Full curves once loaded, else the overview curve from the index
+  const pointsFor = (game: HeartbeatGame): HeartbeatPoint[] =>
+    pointsByGame[game.game_pk] ?? game.heartbeat_points ?? [];
+
+  // Lazily load full curves from heartbeat/<game_pk>.json: for the single-game view,
+  // and for stacked games that came without an overview curve
+  const visibleGames = viewMode === 'single' ? (selectedGame ? [selectedGame] : []) : sortedGames;
+  const needsDetail = (game: HeartbeatGame) =>
+    !game.heartbeat_points || (viewMode === 'single' && game.detail_points !== undefined);
+  const missingPks = visibleGames
+    .filter(game => needsDetail(game) && !(game.game_pk in pointsByGame))
+    .map(game => game.game_pk);
+  const missingKey = missingPks.join(',');
+
+  useEffect(() => {
+    const queue = missingKey
+      ? missingKey.split(',').map(Number).filter(pk => !requestedPks.current.has(pk))
+      : [];
+    queue.forEach(pk => requestedPks.current.add(pk));
+
+    const worker = async () => {
+      while (queue.length) {
+        const pk = queue.shift()!;
+        try {
+          const res = await fetchArtifact(`heartbeat/${pk}.json`);
+          const shard = await res.json();
+          // Shards from a columnar export hold the points as a columnar table
+          const points = decodeRows<HeartbeatPoint>(shard.heartbeat_points ?? []);
+          setPointsByGame(prev => ({ ...prev, [pk]: points }));
+        } catch (error) {
+          console.error(`Error fetching heartbeat for game ${pk}:`, error);
+          // Nothing is stored, so the overview curve (if any) stays on screen
+        }
+      }
+    };
+    Array.from({ length: SHARD_FETCH_CONCURRENCY }, worker);
+  }, [missingKey]);
+
   // Chart dimensions - make responsive to container width
   const chartWidth = 1200; // Increased width
   const chartHeight = 200;
@@ -57,14 +104,15 @@ export default function HeartbeatChart({ games }: HeartbeatChartProps) {
   const innerHeight = chartHeight - margin.top - margin.bottom;
 
   const renderSingleGameChart = (game: HeartbeatGame, index: number = 0) => {
-    if (!game.heartbeat_points.length) return null;
+    const heartbeatPoints = pointsFor(game);
+    if (!heartbeatPoints.length) return null;
 
     // Scale functions for win probability (0-1 range)
     const xScale = (x: number) => x * innerWidth;
     const yScale = (y: number) => innerHeight - (y * innerHeight);  // y is 0-1 win probability
 
     // Generate smooth path for the line - ensure unique x positions
-    const sortedPoints = [...game.heartbeat_points]
+    const sortedPoints = [...heartbeatPoints]
       .sort((a, b) => a.x - b.x)
       .filter((point, i, arr) => i === 0 || point.x !== arr[i-1].x); // Remove duplicate x positions
     
@@ -152,7 +200,7 @@ export default function HeartbeatChart({ games }: HeartbeatChartProps) {
         />
 
         {/* Drama peaks/valleys */}
-        {game.heartbeat_points.map((point, i) => {
+        {heartbeatPoints.map((point, i) => {
           // Dynamic threshold based on game drama level
           let threshold = 0.15; // Default for high drama
           if (game.drama_score >= 70) {
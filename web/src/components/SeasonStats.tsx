@@ -1,5 +1,6 @@
 "use client";
 import { useState, useEffect } from "react";
+import { fetchArtifact } from "@/lib/artifacts";
 
 interface SeasonData {
   season: number;
@@ -22,7 +23,7 @@ export default function SeasonStats() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetch("/season_stats.json")
+    fetchArtifact("season_stats.json")
       .then((r) => r.json())
       .then((data: SeasonData[]) => {
         setSeasons(data);
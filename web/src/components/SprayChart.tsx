@@ -1,10 +1,13 @@
 "use client";
 import { useState, useEffect, useMemo } from "react";
+import { fetchArtifact } from "@/lib/artifacts";
+import { decodeRows } from "@/lib/columnar";
 
 interface SprayBall {
   field_x: number;
   field_y: number;
   distance: number;
+  spray_angle: number | null; // null when the angle is estimated
   exit_velo: number;
   launch_angle: number;
   batter: string;
@@ -53,10 +56,10 @@ export default function SprayChart() {
   const [hoveredBall, setHoveredBall] = useState<SprayBall | null>(null);
 
   useEffect(() => {
-    fetch("/spray_chart.json")
+    fetchArtifact("spray_chart.json")
       .then((r) => r.json())
-      .then((d: SprayBall[]) => {
-        setData(d);
+      .then((d) => {
+        setData(decodeRows<SprayBall>(d));
         setLoading(false);
       })
       .catch(() => setLoading(false));
@@ -0,0 +1,50 @@
+// Resolves exported data files through /manifest.json (written by
+// scripts/export_pipeline.py, see scraper/artifacts.py) to their immutable,
+// content-hashed copies, e.g. "barrel_map.json" -> "/barrel_map.3f9a0c1d2e4b.json".
+// Without a manifest, or for a name it does not list, the fixed file name is used.
+
+interface ManifestEntry {
+  path: string;
+  sha256: string;
+  size: number;
+  encodings: string[];
+  previous?: string;
+}
+
+interface Manifest {
+  version: number;
+  files: Record<string, ManifestEntry>;
+}
+
+let manifestPromise: Promise<Manifest | null> | null = null;
+
+function loadManifest(): Promise<Manifest | null> {
+  if (!manifestPromise) {
+    // The manifest itself must not be cached long; the files it points to can be.
+    manifestPromise = fetch("/manifest.json", { cache: "no-cache" })
+      .then((res) => (res.ok ? (res.json() as Promise<Manifest>) : null))
+      .catch(() => null);
+  }
+  return manifestPromise;
+}
+
+/** URL for an exported file, e.g. artifactUrl("heartbeat/700035.json"). */
+export async function artifactUrl(name: string): Promise<string> {
+  const manifest = await loadManifest();
+  const entry = manifest?.files?.[name];
+  return `/${entry ? entry.path : name}`;
+}
+
+/** Fetch an exported file, falling back to its fixed name if the hashed copy fails. */
+export async function fetchArtifact(name: string): Promise<Response> {
+  const url = await artifactUrl(name);
+  if (url !== `/${name}`) {
+    try {
+      const res = await fetch(url);
+      if (res.ok) return res;
+    } catch {
+      // fall through to the fixed name
+    }
+  }
+  return fetch(`/${name}`);
+}
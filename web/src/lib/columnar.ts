@@ -0,0 +1,66 @@
+// Reader for the columnar, dictionary-encoded JSON written by
+// `scripts/export_pipeline.py --format columnar` (see scraper/columnar.py).
+// Every helper also accepts a plain array of objects, so components work with
+// either export format.
+
+import { fetchArtifact } from "./artifacts";
+
+const FORMAT = "columnar-dict";
+const VERSION = 1;
+
+interface ColumnarTable {
+  length: number;
+  columns: Record<string, unknown[]>;
+  dict?: string[];
+  nested?: string[];
+  absent?: Record<string, number[]>;
+}
+
+interface ColumnarArtifact extends ColumnarTable {
+  format: typeof FORMAT;
+  version: number;
+  strings: string[];
+}
+
+export function isColumnar(data: unknown): data is ColumnarArtifact {
+  return typeof data === "object" && data !== null && (data as { format?: unknown }).format === FORMAT;
+}
+
+function decodeTable<T>(table: ColumnarTable, strings: string[]): T[] {
+  const rows: Record<string, unknown>[] = Array.from({ length: table.length }, () => ({}));
+  const dictColumns = new Set(table.dict ?? []);
+  const nested = new Set(table.nested ?? []);
+
+  for (const [name, values] of Object.entries(table.columns)) {
+    const skip = new Set(table.absent?.[name] ?? []);
+    for (let i = 0; i < table.length; i++) {
+      if (skip.has(i)) continue;
+      const value = values[i];
+      if (value === null) {
+        rows[i][name] = null;
+      } else if (dictColumns.has(name)) {
+        rows[i][name] = strings[value as number];
+      } else if (nested.has(name)) {
+        rows[i][name] = decodeTable(value as ColumnarTable, strings);
+      } else {
+        rows[i][name] = value;
+      }
+    }
+  }
+  return rows as T[];
+}
+
+/** Return the rows of a columnar artifact; plain arrays are returned unchanged. */
+export function decodeRows<T>(data: unknown): T[] {
+  if (!isColumnar(data)) return data as T[];
+  if (data.version !== VERSION) {
+    throw new Error(`Unsupported ${FORMAT} version: ${data.version}`);
+  }
+  return decodeTable<T>(data, data.strings);
+}
+
+/** Fetch a row-array artifact (e.g. "barrel_map.json") in either export format. */
+export async function fetchRows<T>(name: string): Promise<T[]> {
+  const res = await fetchArtifact(name);
+  return decodeRows<T>(await res.json());
+}